@@ -0,0 +1,242 @@
+"""
+Benchmark harness for the pipeline's hot paths on synthetic data.
+
+Every stage runs in a fresh temporary working directory against synthetic inputs (fake
+transcripts, random-walk prices, a fake LLM client and a fake browser with set latencies),
+at each requested universe size. Wall time, throughput and peak Python memory (tracemalloc)
+are reported per stage and saved as JSON, so two runs can be compared with --baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py                       # 10, 50 and 500 tickers, all stages
+    python benchmarks/run_benchmarks.py --scales 10 50 --stages backtest sweep
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/old.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import numpy as np
+import pandas as pd
+import metrics
+import portfolio
+import prices
+import scraper
+import sentiment
+import store
+import strategy
+import sweep
+import telemetry
+from fakes import FakeResponsesClient
+import synthetic
+
+
+SCALES = [10, 50, 500]
+QUARTERS = 20
+TRANSCRIPT_CHARS = 20_000
+PAGE_LATENCY = 0.005      # seconds per fake page load
+DRIVER_STARTUP = 0.05     # seconds per fake browser start
+LLM_LATENCY = 0.005       # seconds per fake LLM request
+SWEEP_GRID = {"stop_loss": [0.05, 0.10, 0.15], "upper": [0.5, 0.75, 1.0], "lower": [-0.75]}
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+class Scenario:
+    """Synthetic inputs for one universe size, generated once and shared by the stages."""
+
+    def __init__(self, n_tickers: int, quarters: int, chars: int, seed: int = 0):
+        self.tickers = synthetic.make_tickers(n_tickers)
+        self.quarters = synthetic.make_quarters(quarters)
+        self.start = scraper.parse_quarter(self.quarters[0])
+        self.end = scraper.parse_quarter(self.quarters[-1]) + pd.offsets.QuarterEnd(0)
+        self.calls = synthetic.make_transcripts(self.tickers, quarters, chars, seed)
+        self.scores = synthetic.make_scores(self.calls, strategy.score_columns, seed)
+        self.prices = synthetic.make_prices(self.tickers, self.start - pd.Timedelta(days=10),
+                                            self.end + pd.Timedelta(days=10), seed)
+
+
+# --- Stages: each returns the number of items processed (for throughput) ---
+
+def bench_scrape(sc: Scenario, args) -> int:
+    factory = synthetic.FakeDriverFactory(args.driver_startup, args.page_latency, args.chars)
+    scraper.make_driver = factory
+    scraper.scrape_universe(sc.tickers, sc.start, sc.end, requests_per_second=0, probe=False)
+    return len(sc.tickers) * len(sc.quarters)
+
+
+def bench_score(sc: Scenario, args) -> int:
+    client = FakeResponsesClient(latency=args.llm_latency, seed=0)
+    # Unless asked otherwise, measure the code rather than the account's rate limits
+    limiter = sentiment.RateLimiter() if args.rate_limited else sentiment.RateLimiter(None, None)
+    sentiment.analyze_sentiment(sc.calls, llm_client=client, limiter=limiter)
+    return len(sc.calls)
+
+
+def bench_store(sc: Scenario, args) -> int:
+    store.ensure_migrated(scraper.BASE_PATH)
+    store.write_transcripts(sc.calls)
+    store.write_scores(sc.scores)
+    scraper.combine_all_calls(sc.start, sc.end)
+    store.read_scores(columns=["ticker", "date"] + strategy.score_columns)
+    return 2 * len(sc.calls)
+
+
+def bench_prepare(sc: Scenario, args) -> int:
+    strategy.prepare_inputs(sc.scores, price_df=sc.prices)
+    return len(sc.tickers)
+
+
+def bench_backtest(sc: Scenario, args) -> int:
+    inputs = strategy.prepare_inputs(sc.scores, price_df=sc.prices)
+    strategy.backtest_sentiment_strategy(None, inputs=inputs, n_jobs=args.n_jobs)
+    return len(sc.tickers)
+
+
+def bench_sweep(sc: Scenario, args) -> int:
+    inputs = strategy.prepare_inputs(sc.scores, price_df=sc.prices)
+    results = sweep.sweep_parameters(SWEEP_GRID, inputs=inputs, n_jobs=args.n_jobs)
+    return len(results) * len(sc.tickers)
+
+
+def bench_analytics(sc: Scenario, args) -> int:
+    inputs = strategy.prepare_inputs(sc.scores, price_df=sc.prices)
+    curves, trades, positions = strategy.backtest_sentiment_strategy(None, inputs=inputs, return_trades=True)
+    metrics.performance_metrics(curves, trades, positions)
+    portfolio.build_portfolio(positions, inputs["price_df"], max_positions=max(1, len(sc.tickers) // 5))
+    return len(sc.tickers)
+
+
+STAGES = {
+    "scrape": bench_scrape,
+    "score": bench_score,
+    "store": bench_store,
+    "prepare": bench_prepare,
+    "backtest": bench_backtest,
+    "sweep": bench_sweep,
+    "analytics": bench_analytics,
+}
+
+
+def run_stage(name: str, sc: Scenario, args) -> dict:
+    """Run one stage in a fresh working directory, timing it and tracking peak memory."""
+    cwd = os.getcwd()
+    work = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    saved = (scraper.make_driver, prices._default_store, sentiment._response_cache)
+    sentiment._response_cache = None
+    recorder = telemetry.Telemetry(None)
+    previous = telemetry.set_telemetry(recorder)
+    out = io.StringIO()
+    try:
+        os.chdir(work)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(out if not args.verbose else sys.stdout):
+            items = STAGES[name](sc, args)
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        if sentiment._response_cache is not None:
+            sentiment._response_cache.close()
+        scraper.make_driver, prices._default_store, sentiment._response_cache = saved
+        telemetry.set_telemetry(previous)
+        os.chdir(cwd)
+        shutil.rmtree(work, ignore_errors=True)
+    return {
+        "stage": name,
+        "tickers": len(sc.tickers),
+        "calls": len(sc.calls),
+        "seconds": round(seconds, 4),
+        "items": items,
+        "items_per_second": round(items / seconds, 2) if seconds > 0 else None,
+        "peak_mb": round(peak / 1e6, 2),
+        "telemetry": recorder.summary().to_dict(orient="index"),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: list, baseline_path: str):
+    """Print the speedup of each (stage, tickers) against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["tickers"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["stage"], r["tickers"]))
+        if old is None or not r["seconds"]:
+            continue
+        print(f"  {r['stage']:<10} {r['tickers']:>5} tickers: {old['seconds']:>9.3f}s -> {r['seconds']:>9.3f}s "
+              f"({old['seconds'] / r['seconds']:.2f}x), peak {old['peak_mb']:.1f} -> {r['peak_mb']:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="universe sizes (tickers)")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--quarters", type=int, default=QUARTERS)
+    parser.add_argument("--chars", type=int, default=TRANSCRIPT_CHARS, help="characters per fake transcript")
+    parser.add_argument("--page-latency", type=float, default=PAGE_LATENCY)
+    parser.add_argument("--driver-startup", type=float, default=DRIVER_STARTUP)
+    parser.add_argument("--llm-latency", type=float, default=LLM_LATENCY)
+    parser.add_argument("--rate-limited", action="store_true",
+                        help="apply sentiment's REQUESTS_PER_MINUTE / TOKENS_PER_MINUTE limits to the fake LLM")
+    parser.add_argument("--n-jobs", type=int, default=1, help="worker processes for backtest/sweep")
+    parser.add_argument("--output", default=None, help="results JSON (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.scales:
+        sc = Scenario(n, args.quarters, args.chars)
+        for name in args.stages:
+            r = run_stage(name, sc, args)
+            results.append(r)
+            print(f"{name:<10} {n:>5} tickers: {r['seconds']:>9.3f}s  {r['items_per_second'] or 0:>12,.1f} items/s  "
+                  f"peak {r['peak_mb']:>8.1f} MB")
+
+    report = {
+        "meta": {
+            "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"✅ Saved benchmark results to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+from scraper import get_year_quarters_from_dates, parse_quarter
+
+
+TICKER_LISTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ticker_lists")
+UNIVERSES = {
+    50: "spx2015_midcapish_50.csv",
+    500: "universe_sp500.csv",
+}
+
+_WORDS = ("revenue", "margin", "growth", "guidance", "demand", "customers", "pipeline", "pricing",
+          "costs", "quarter", "outlook", "strong", "softer", "headwinds", "tailwinds", "investment")
+
+
+def make_tickers(n: int) -> list:
+    """
+    n ticker symbols: the first n of the matching ticker_lists/ universe (50 or 500 names) when
+    it exists, padded with synthetic symbols otherwise.
+    """
+    tickers = []
+    path = os.path.join(TICKER_LISTS, UNIVERSES.get(n, UNIVERSES[500]))
+    if os.path.exists(path):
+        df = pd.read_csv(path)
+        tickers = [str(t) for t in df.iloc[:, 0].dropna().tolist()][:n]
+    tickers += [f"SYN{i:04d}" for i in range(n - len(tickers))]
+    return tickers
+
+
+def make_quarters(quarters: int, end: str = "2024-12-31") -> list:
+    """The last `quarters` year_quarter strings up to `end` (roic.ai format)."""
+    end = pd.Timestamp(end)
+    start = end - pd.DateOffset(months=3 * (quarters - 1))
+    return get_year_quarters_from_dates(start, end)[-quarters:]
+
+
+def make_transcript(rng: random.Random, chars: int) -> str:
+    """A fake call with an operator intro, prepared remarks and a Q&A session of about `chars` characters."""
+    def paragraph(speaker, n):
+        return f"{speaker}: " + " ".join(rng.choice(_WORDS) for _ in range(n)) + "."
+
+    intro = "Operator: Good day and welcome to the call. A question-and-answer session will follow the prepared remarks."
+    prepared, qa = [intro], ["Operator: We will now open the line for questions. Our first question comes from an analyst."]
+    size = len(intro)
+    while size < chars * 0.6:
+        prepared.append(paragraph(rng.choice(["CEO", "CFO"]), 60))
+        size += len(prepared[-1])
+    while size < chars:
+        qa.append(paragraph("Analyst", 25))
+        qa.append(paragraph(rng.choice(["CEO", "CFO"]), 45))
+        size += len(qa[-1]) + len(qa[-2])
+    return "\n".join(prepared + qa)
+
+
+def make_transcripts(tickers: list, quarters: int, chars: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    """
+    N tickers x Q quarters of fake transcripts.
+
+    Output:
+    calls (pd.DataFrame): ticker, year_quarter, date, earnings_call_raw_text
+    """
+    rng = random.Random(seed)
+    rows = []
+    for ticker in tickers:
+        for yq in make_quarters(quarters):
+            rows.append({"ticker": ticker, "year_quarter": yq, "date": parse_quarter(yq),
+                         "earnings_call_raw_text": make_transcript(rng, chars)})
+    return pd.DataFrame(rows)
+
+
+def make_scores(calls: pd.DataFrame, score_columns: list, seed: int = 0) -> pd.DataFrame:
+    """Calls with random sentiment scores in [-1, 1] (the transcript column is dropped)."""
+    rng = np.random.default_rng(seed)
+    out = calls.drop(columns=["earnings_call_raw_text"], errors="ignore").copy()
+    for c in score_columns:
+        out[c] = np.round(rng.uniform(-1, 1, len(out)), 3)
+    return out
+
+
+def make_prices(tickers: list, start, end, seed: int = 0, vol: float = 0.02) -> pd.DataFrame:
+    """Random-walk close prices on business days (dates x tickers)."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, end)
+    steps = rng.normal(0.0002, vol, (len(index), len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=tickers)
+
+
+class FakeElement:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeDriver:
+    """
+    Stand-in for a Selenium driver: `get` sleeps for `latency` seconds and the page body is a
+    fake transcript generated from the URL (so repeated pages are identical).
+    """
+
+    def __init__(self, latency: float = 0.0, chars: int = 20_000):
+        self.latency = latency
+        self.chars = chars
+        self.url = None
+
+    def get(self, url: str):
+        if self.latency:
+            time.sleep(self.latency)
+        self.url = url
+
+    def find_element(self, *args):
+        rng = random.Random(self.url)
+        return FakeElement("Menu\nEarnings Call Transcript\n" + make_transcript(rng, self.chars) + "\nFooter")
+
+    def quit(self):
+        pass
+
+
+class FakeDriverFactory:
+    """Callable building FakeDrivers with a startup latency, counting how many were started."""
+
+    def __init__(self, startup: float = 0.0, latency: float = 0.0, chars: int = 20_000):
+        self.startup = startup
+        self.latency = latency
+        self.chars = chars
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if self.startup:
+            time.sleep(self.startup)
+        with self._lock:
+            self.started += 1
+        return FakeDriver(self.latency, self.chars)
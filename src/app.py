@@ -1,12 +1,86 @@
+import time
 import streamlit as st
 import pandas as pd
-from scraper import scrape_ticker, combine_all_calls
-from sentiment import analyze_sentiment
-from strategy import backtest_sentiment_strategy
+import factors
+import pipeline
+import strategy
+import telemetry
+import whatif
 import matplotlib.pyplot as plt
 
+POLL_SECONDS = 0.5       # progress refresh interval while a run is in flight
+
 st.set_page_config(page_title="Earnings Call Sentiment Trading", layout="wide")
 
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def start_run(tickers: tuple, start_date: pd.Timestamp, end_date: pd.Timestamp,
+              strategy_key: tuple, data_version: int) -> pipeline.PipelineRun:
+    """
+    Start (or reuse) the background pipeline run for these inputs. The run object is shared
+    across reruns, so changing a chart option never restarts the pipeline.
+
+    Inputs:
+    tickers (tuple[str]): ticker symbols
+    start_date, end_date (pd.Timestamp): date range
+    strategy_key (tuple): strategy parameters and thresholds (cache key only)
+    data_version (int): bumped by "Refresh data" to force a new run (cache key only)
+    """
+    return pipeline.PipelineRun(list(tickers), start_date, end_date)
+
+
+@st.cache_resource(show_spinner="Preparing signals and prices...", max_entries=8)
+def load_inputs(run_key: tuple, _scores: pd.DataFrame) -> dict:
+    """
+    Prices, entry positions and factor statistics of a finished run, shared by every what-if rerun.
+
+    Inputs:
+    run_key (tuple): inputs of the run (cache key)
+    _scores (pd.DataFrame): the run's scored calls (not hashed)
+    """
+    return strategy.prepare_inputs(_scores)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_whatif(run_key: tuple, weighting: str, _scores: pd.DataFrame) -> whatif.WhatIfBacktester:
+    """
+    What-if backtester of a finished run for one score weighting (re-blends the cached factor statistics).
+
+    Inputs:
+    run_key (tuple): inputs of the run (cache key)
+    weighting (str): factors.WEIGHTINGS name
+    _scores (pd.DataFrame): the run's scored calls (not hashed)
+    """
+    return whatif.WhatIfBacktester(strategy.with_weights(load_inputs(run_key, _scores), weighting))
+
+
+def strategy_key() -> tuple:
+    """Strategy settings that change the backtest, as a hashable cache key."""
+    params = strategy.strategy_params()
+    params.update(upper=strategy.Z_UPPER, lower=strategy.Z_LOWER, weights=repr(strategy.SIGNAL_WEIGHTS))
+    return tuple(sorted(params.items()))
+
+
+def format_seconds(seconds) -> str:
+    if seconds is None:
+        return "estimating..."
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def plot_curves(curves: pd.DataFrame, show_buyhold: bool, log_scale: bool):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    cols = [c for c in curves.columns if show_buyhold or not c.endswith("_buyhold")]
+    if cols:
+        curves[cols].plot(ax=ax, logy=log_scale)
+        ax.legend(title="Strategy")
+    ax.set_title("Sentiment Strategy vs Buy & Hold", fontsize=16)
+    ax.set_ylabel("Cumulative Returns", fontsize=12)
+    ax.set_xlabel("Date", fontsize=12)
+    ax.grid(True)
+    return fig
+
+
 # --- Sidebar ---
 st.sidebar.header("Configuration")
 tickers_input = st.sidebar.text_area(
@@ -20,50 +94,111 @@ date_range = st.sidebar.date_input(
 )
 
 run_pipeline = st.sidebar.button("Run Pipeline")
+refresh_data = st.sidebar.button("Refresh data", help="Start a new run even if these inputs were run before")
+
+# What-if controls re-simulate the cached signals and prices; they never restart the pipeline
+st.sidebar.header("What-if")
+stop_loss = st.sidebar.slider("Stop loss", 0.01, 0.50, float(strategy.STOP_LOSS), 0.01)
+take_profit = st.sidebar.slider("Take profit", 0.05, 1.00, float(strategy.TAKE_PROFIT), 0.05)
+position_size = st.sidebar.slider("Position size", 0.05, 1.00, float(strategy.POSITION_SIZE), 0.05)
+z_upper = st.sidebar.slider("Long when z-score ≥", 0.0, 3.0, float(strategy.Z_UPPER), 0.05)
+z_lower = st.sidebar.slider("Short when z-score ≤", -3.0, 0.0, float(strategy.Z_LOWER), 0.05)
+weightings = list(factors.WEIGHTINGS)
+weighting = st.sidebar.selectbox("Score weighting", weightings,
+                                 index=weightings.index(strategy.SIGNAL_WEIGHTS) if strategy.SIGNAL_WEIGHTS in weightings else 0,
+                                 help="Blend of the sentiment scores that is z-scored into signals")
+
+# Chart options only change the rendering
+st.sidebar.header("Chart")
+show_buyhold = st.sidebar.checkbox("Show buy & hold", value=True)
+log_scale = st.sidebar.checkbox("Log scale", value=False)
+
+st.session_state.setdefault("data_version", 0)
 
 st.title("📈 Earnings Call Sentiment Trading App")
 
-if run_pipeline:
+if run_pipeline or refresh_data:
     # Validate tickers
     tickers = [t.strip().upper() for t in tickers_input.split(",") if t.strip()]
     if not tickers:
         st.warning("Please enter at least one ticker.")
         st.stop()
-    
+
     # Validate date range
     if len(date_range) != 2:
         st.warning("Please select a start and end date.")
         st.stop()
-    
-    start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
-
-    # Step 1: Scrape Earnings Calls
-    st.header("Step 1: Scrape Earnings Calls")
-    all_calls_list = []
-    for t in tickers:
-        st.write(f"Scraping {t} from {start_date.date()} to {end_date.date()}...")
-        df = scrape_ticker(ticker=t, start_date=start_date, end_date=end_date)
-        all_calls_list.append(df)
-    all_calls = pd.concat(all_calls_list, ignore_index=True)
-    st.dataframe(all_calls.head())
-
-    # Step 2: Sentiment Analysis
-    st.header("Step 2: Sentiment Analysis")
-    st.write("Running sentiment model on earnings calls...")
-    all_calls = analyze_sentiment(all_calls)
-    st.dataframe(all_calls.head())
-
-    # Step 3: Trading Strategy Backtest
-    st.header("Step 3: Trading Strategy Backtest")
-    st.write("Backtesting sentiment-based trading strategy...")
-
-    curves = backtest_sentiment_strategy(all_calls)
 
-    fig, ax = plt.subplots(figsize=(12, 6))
-    curves.plot(ax=ax)
-    ax.set_title("Sentiment Strategy vs Buy & Hold", fontsize=16)
-    ax.set_ylabel("Cumulative Returns", fontsize=12)
-    ax.set_xlabel("Date", fontsize=12)
-    ax.grid(True)
-    ax.legend(title="Strategy")
-    st.pyplot(fig)
\ No newline at end of file
+    if refresh_data:
+        st.session_state["data_version"] += 1
+    st.session_state["run_inputs"] = (tuple(tickers), pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
+
+if "run_inputs" not in st.session_state:
+    st.stop()
+
+tickers, start_date, end_date = st.session_state["run_inputs"]
+run_key = (tickers, start_date, end_date, strategy_key(), st.session_state["data_version"])
+run = start_run(*run_key)
+
+# Scrape, score and backtest run as overlapping stages in the background; poll for progress
+st.header("Pipeline")
+st.write(f"Scraping, scoring and backtesting {', '.join(tickers)} from {start_date.date()} to {end_date.date()}...")
+bars = {stage: st.progress(0.0) for stage in pipeline.PipelineRun.STAGES}
+failed_box = st.empty()
+st.header("Trading Strategy Backtest")
+chart = st.empty()
+st.header("Sentiment Scores")
+table = st.empty()
+
+shown = None
+while True:
+    finished = run.done
+    for stage, bar in bars.items():
+        p = run.stage_progress(stage)
+        eta = "done" if finished else f"ETA {format_seconds(p['eta'])}"
+        bar.progress(p["fraction"], text=f"{stage.capitalize()}: {p['done']}/{p['total']} tickers · {eta}")
+
+    scores, curves, failed = run.snapshot()
+    if failed:
+        failed_box.warning("Failed: " + ", ".join(f"{t} ({stage}: {msg})" for t, (stage, msg) in failed.items()))
+    if finished:
+        break
+    # Only redraw when new tickers have been backtested
+    if shown != list(curves.columns):
+        shown = list(curves.columns)
+        if not curves.empty:
+            fig = plot_curves(curves, show_buyhold, log_scale)
+            chart.pyplot(fig)
+            plt.close(fig)
+            table.dataframe(scores.head())
+    time.sleep(POLL_SECONDS)
+
+if run.error is not None:
+    st.error(f"Pipeline run failed: {run.error}")
+    st.stop()
+
+scores, _, _ = run.snapshot()
+if scores.empty:
+    chart.info("No scored calls to backtest.")
+    st.stop()
+
+# Finished runs are re-simulated from the cached signals with the what-if parameters
+params = {"stop_loss": stop_loss, "take_profit": take_profit, "position_size": position_size}
+curves = load_whatif(run_key, weighting, scores).curves(params, upper=z_upper, lower=z_lower)
+fig = plot_curves(curves, show_buyhold, log_scale)
+chart.pyplot(fig)
+plt.close(fig)
+table.dataframe(scores.head())
+
+# Where the time and the money went (all runs since the app started)
+with st.expander("Telemetry"):
+    summary = telemetry.summary()
+    if summary.empty:
+        st.write("No events recorded yet.")
+    else:
+        totals = summary.sum(numeric_only=True)
+        cols = st.columns(3)
+        cols[0].metric("LLM cost (est.)", f"${totals.get('cost_usd', 0.0):.4f}")
+        cols[1].metric("Tokens in / out", f"{int(totals.get('input_tokens', 0)):,} / {int(totals.get('output_tokens', 0)):,}")
+        cols[2].metric("LLM retries", f"{int(totals.get('retries', 0)):,}")
+        st.dataframe(summary)
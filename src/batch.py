@@ -0,0 +1,193 @@
+import json
+import os
+import time
+import uuid
+
+
+BATCH_ENDPOINT = "/v1/responses"
+
+
+def write_batch_requests(requests, path: str) -> int:
+    """
+    Write requests to a JSONL batch file, one request per line:
+    {"custom_id": ..., "method": "POST", "url": "/v1/responses", "body": {...}}
+
+    Inputs:
+    requests (iterable[tuple[str, dict]]): (custom_id, responses.create keyword arguments) pairs
+    path (str): output file path
+
+    Output:
+    n (int): number of requests written
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests:
+            f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}) + "\n")
+            n += 1
+    return n
+
+
+def response_text(body: dict):
+    """
+    Extract the output text from a Responses API body (the `output_text` convenience
+    field if present, otherwise the concatenated `output_text` content parts).
+    """
+    if not body:
+        return None
+    if body.get("output_text"):
+        return body["output_text"]
+    parts = []
+    for item in body.get("output") or []:
+        for content in item.get("content") or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts) or None
+
+
+def read_batch_results(path: str) -> dict:
+    """
+    Parse a batch result file into {custom_id: output text or None (failed request)}.
+
+    Input:
+    path (str): JSONL result file
+    """
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            response = rec.get("response") or {}
+            ok = not rec.get("error") and response.get("status_code", 200) == 200
+            results[rec["custom_id"]] = response_text(response.get("body")) if ok else None
+    return results
+
+
+class BatchSubmitter:
+    """
+    Interface for handing a batch request file to a backend.
+
+    submit(request_path) -> batch_id
+    poll(batch_id) -> local path of the result file, or None while the batch is still running
+
+    `shared_cache` tells analyze_sentiment whether results may go to (and be answered from) the
+    shared response cache; backends not calling the real model set it to False.
+    """
+
+    shared_cache = True
+
+    def submit(self, request_path: str) -> str:
+        raise NotImplementedError
+
+    def poll(self, batch_id: str):
+        raise NotImplementedError
+
+    def wait(self, batch_id: str, poll_interval: float = 30.0, timeout: float = None) -> str:
+        """Poll until the result file is available and return its path."""
+        start = time.monotonic()
+        while True:
+            result_path = self.poll(batch_id)
+            if result_path is not None:
+                return result_path
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Batch {batch_id} not finished after {timeout}s")
+            time.sleep(poll_interval)
+
+
+class LocalBatchSubmitter(BatchSubmitter):
+    """
+    Filesystem batch backend: the request file is copied into `work_dir/{batch_id}/` and
+    executed on a later poll against a local client, writing a result file in the same
+    format as the hosted Batch API. Used for tests and offline runs.
+
+    Inputs:
+    work_dir (str): directory holding submitted batches
+    llm_client: object exposing `responses.create` (e.g. fakes.FakeResponsesClient)
+    polls_until_done (int): number of polls that report "still running" before executing
+    """
+
+    shared_cache = False
+
+    def __init__(self, work_dir: str, llm_client, polls_until_done: int = 0):
+        self.work_dir = work_dir
+        self.llm_client = llm_client
+        self.polls_until_done = polls_until_done
+        self._polls = {}
+
+    def submit(self, request_path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch_dir = os.path.join(self.work_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        with open(request_path, "r", encoding="utf-8") as src, \
+                open(os.path.join(batch_dir, "input.jsonl"), "w", encoding="utf-8") as dst:
+            dst.write(src.read())
+        self._polls[batch_id] = 0
+        return batch_id
+
+    def poll(self, batch_id: str):
+        batch_dir = os.path.join(self.work_dir, batch_id)
+        output_path = os.path.join(batch_dir, "output.jsonl")
+        if os.path.exists(output_path):
+            return output_path
+        self._polls[batch_id] = self._polls.get(batch_id, 0) + 1
+        if self._polls[batch_id] <= self.polls_until_done:
+            return None
+
+        tmp_path = f"{output_path}.tmp"
+        with open(os.path.join(batch_dir, "input.jsonl"), "r", encoding="utf-8") as src, \
+                open(tmp_path, "w", encoding="utf-8") as dst:
+            for line in src:
+                req = json.loads(line)
+                out = {"id": f"req_{uuid.uuid4().hex[:12]}", "custom_id": req["custom_id"], "response": None, "error": None}
+                try:
+                    resp = self.llm_client.responses.create(**req["body"])
+                    out["response"] = {"status_code": 200, "body": {"output_text": resp.output_text}}
+                except Exception as e:
+                    out["error"] = {"message": str(e)}
+                dst.write(json.dumps(out) + "\n")
+        os.replace(tmp_path, output_path)
+        return output_path
+
+
+class OpenAIBatchSubmitter(BatchSubmitter):
+    """
+    OpenAI Batch API backend: uploads the request file, creates a batch against the
+    Responses endpoint and downloads the output file once the batch completes.
+
+    Inputs:
+    client: OpenAI client
+    result_dir (str): where downloaded result files are written
+    completion_window (str): batch completion window
+    """
+
+    def __init__(self, client, result_dir: str = "batches", completion_window: str = "24h"):
+        self.client = client
+        self.result_dir = result_dir
+        self.completion_window = completion_window
+
+    def submit(self, request_path: str) -> str:
+        with open(request_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str):
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+        if batch.status != "completed":
+            return None
+        os.makedirs(self.result_dir, exist_ok=True)
+        result_path = os.path.join(self.result_dir, f"{batch_id}_output.jsonl")
+        with open(result_path, "w", encoding="utf-8") as f:
+            if batch.output_file_id:
+                f.write(self.client.files.content(batch.output_file_id).text)
+            if batch.error_file_id:
+                f.write(self.client.files.content(batch.error_file_id).text)
+        return result_path
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import store
+
+
+# Named weightings of the score columns. Only the direction of a weight vector matters (the
+# blend's z-score is scale-free); weights are normalized to sum(|w|) = 1 so the blend stays on
+# the score scale. Factors left out of a weighting get weight 0.
+WEIGHTINGS = {
+    # Unweighted mean of every score (the original overall_sentiment)
+    "equal": dict.fromkeys(store.SCORE_COLUMNS, 1),
+    # Same, but more risk and uncertainty counts against the call
+    "risk_adjusted": {**dict.fromkeys(store.SCORE_COLUMNS, 1), "risk_and_uncertainty": -1},
+    # Outlook and how management handles questions, net of risk
+    "outlook": {
+        "forward_looking_sentiment": 2,
+        "management_confidence": 1,
+        "qa_sentiment": 1,
+        "risk_and_uncertainty": -1,
+    },
+    # Reported results only
+    "fundamentals": {
+        "financial_performance_sentiment": 1,
+    },
+}
+
+
+def resolve_weights(weights, factors: list) -> np.ndarray:
+    """
+    Weight vector over `factors` from a weighting name, a {factor: weight} dict or a sequence
+    of weights in factor order, normalized to sum(|w|) = 1.
+
+    Inputs:
+    weights (str | dict | sequence): weighting
+    factors (list[str]): factor (score column) names
+
+    Output: np.ndarray[float] of len(factors)
+    """
+    if isinstance(weights, str):
+        if weights not in WEIGHTINGS:
+            raise ValueError(f"resolve_weights: unknown weighting {weights!r} (known: {sorted(WEIGHTINGS)})")
+        weights = WEIGHTINGS[weights]
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(factors)
+        if unknown:
+            raise ValueError(f"resolve_weights: unknown factors {sorted(unknown)}")
+        w = np.array([float(weights.get(f, 0.0)) for f in factors])
+    else:
+        w = np.asarray(weights, dtype=float)
+        if w.shape != (len(factors),):
+            raise ValueError(f"resolve_weights: expected {len(factors)} weights, got shape {w.shape}")
+    total = np.abs(w).sum()
+    if not np.isfinite(total) or total == 0:
+        raise ValueError("resolve_weights: weights must be finite and not all zero")
+    return w / total
+
+
+class FactorSignals:
+    """
+    Expanding z-scores of every factor for every ticker, computed in one vectorized pass.
+
+    Calls are sorted by (ticker, date). For each call it keeps, over that ticker's earlier calls,
+    the mean of every factor and their covariance matrix, from one grouped cumulative sum of the
+    factors and of their pairwise products. From those:
+      - `z` is the (calls x factors) array of per-factor z-scores
+      - `blend(weights)` is the z-score of any weighted sum of the factors, exactly as if the
+        blend had been computed first and z-scored on its own (its mean is m·w and its variance
+        w'Cw), so new weight vectors never recompute the statistics
+    A call's z-scores are NaN until its ticker has two earlier calls. Missing scores count as 0.
+
+    Inputs:
+    all_calls (pd.DataFrame): calls with ticker, date and the factor columns
+    factors (list[str]): factor (score column) names
+    """
+
+    def __init__(self, all_calls: pd.DataFrame, factors: list):
+        self.factors = list(factors)
+        codes, tickers = pd.factorize(all_calls["ticker"].astype(str))
+        dates = pd.to_datetime(all_calls["date"]).to_numpy(dtype="datetime64[ns]")
+        order = np.lexsort((dates, codes))
+        codes = codes[order]
+        self.tickers = tickers.tolist()
+        self.dates = dates[order]
+        self.values = all_calls[self.factors].fillna(0).to_numpy(dtype=float)[order]
+
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        self.bounds = {self.tickers[codes[s]]: (int(s), int(e)) for s, e in zip(starts, ends)}
+
+        # Center each ticker's factors on its own mean first: z-scores are unchanged and the
+        # cumulative sums below stay well conditioned
+        n_calls, n_factors = self.values.shape
+        sizes = np.bincount(codes, minlength=len(self.tickers))
+        sums = np.zeros((len(self.tickers), n_factors))
+        np.add.at(sums, codes, self.values)
+        centered = self.values - (sums / np.maximum(sizes, 1)[:, None])[codes]
+
+        # Sums over each ticker's earlier calls (shifted cumulative sums) of x and of x x'
+        products = (centered[:, :, None] * centered[:, None, :]).reshape(n_calls, -1)
+        frame = pd.DataFrame(np.hstack([centered, products]))
+        prior = frame.groupby(codes).cumsum().groupby(codes).shift().fillna(0).to_numpy()
+        n = np.arange(n_calls) - np.repeat(starts, ends - starts)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = prior[:, :n_factors] / n[:, None]
+            cov = (prior[:, n_factors:].reshape(n_calls, n_factors, n_factors)
+                   - n[:, None, None] * mean[:, :, None] * mean[:, None, :]) / (n - 1)[:, None, None]
+        cov[n < 2] = np.nan
+        self.count = n
+        self.deviation = centered - mean        # x - prior mean, (calls x factors)
+        self.cov = cov                          # prior covariance, (calls x factors x factors)
+        std = np.sqrt(np.maximum(np.diagonal(cov, axis1=1, axis2=2), 0))
+        self.z = self.deviation / (std + 1e-12)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def blend_many(self, weightings) -> np.ndarray:
+        """
+        Z-scores of several weighted blends at once.
+
+        Input:
+        weightings (list): weightings accepted by resolve_weights
+
+        Output: np.ndarray (calls x weightings)
+        """
+        W = np.column_stack([resolve_weights(w, self.factors) for w in weightings])
+        var = np.einsum("nij,ik,jk->nk", self.cov, W, W)
+        return (self.deviation @ W) / (np.sqrt(np.maximum(var, 0)) + 1e-12)
+
+    def blend(self, weights) -> np.ndarray:
+        """Z-scores (one per call) of a weighted blend of the factors (see resolve_weights)."""
+        return self.blend_many([weights])[:, 0]
+
+    def frame(self, weights=None) -> pd.DataFrame:
+        """
+        Calls with their per-factor z-scores (`z_{factor}` columns), plus `z_blend` when weights are given.
+        """
+        out = pd.DataFrame({"ticker": np.repeat(self.tickers, [e - s for s, e in self.bounds.values()]),
+                            "date": self.dates})
+        for i, f in enumerate(self.factors):
+            out[f"z_{f}"] = self.z[:, i]
+        if weights is not None:
+            out["z_blend"] = self.blend(weights)
+        return out
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+import store
+
+
+def fake_scores(prompt: str) -> dict:
+    """
+    Deterministic pseudo-scores in [-1, 1] derived from a hash of the prompt, so the same
+    transcript always gets the same result.
+
+    Input:
+    prompt (str): prompt text
+
+    Output: dict of score name -> float
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return {k: round(digest[i] / 127.5 - 1.0, 3) for i, k in enumerate(store.SCORE_COLUMNS)}
+
+
+class FakeResponsesClient:
+    """
+    Local stand-in for the OpenAI client's `responses.create`, for tests and benchmarks.
+
+    Each call sleeps for a random latency, fails with probability `error_rate` (the first
+    `fail_first` calls always fail), and otherwise returns a response with `output_text` (a JSON
+    object of fake_scores) and `usage`.
+
+    Inputs:
+    latency (float | tuple[float, float]): seconds per call, or a (min, max) range
+    error_rate (float): probability that a call raises RuntimeError
+    seed (int): seed for the latency / error draws
+    fail_first (int): number of initial calls that raise RuntimeError
+    """
+
+    def __init__(self, latency=0.0, error_rate: float = 0.0, seed: int = None, fail_first: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.responses = SimpleNamespace(create=self.create)
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if isinstance(self.latency, (tuple, list)):
+                delay = self._rng.uniform(*self.latency)
+            else:
+                delay = self.latency
+            fail = self.calls <= self.fail_first or self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def create(self, model=None, input="", max_output_tokens=None, **kwargs):
+        delay, fail = self._draw()
+        try:
+            if delay:
+                time.sleep(delay)
+            if fail:
+                raise RuntimeError("fake client: simulated API error")
+            text = json.dumps(fake_scores(input))
+            usage = SimpleNamespace(input_tokens=len(input) // 4, output_tokens=len(text) // 4)
+            return SimpleNamespace(output_text=text, usage=usage, model=model)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS = 252
+PORTFOLIO = "portfolio"   # row label of the equal-weight aggregate
+
+
+def curve_returns(curves: np.ndarray) -> np.ndarray:
+    """
+    Daily returns of a (dates x series) matrix of cumulative curves. Gaps (days a series has no
+    price) stay NaN, and the return after a gap is measured from the last valid value; the
+    first valid day is measured from 1.0 (curves start from the first day's return).
+    """
+    curves = np.asarray(curves, dtype=float)
+    filled = pd.DataFrame(curves).ffill().to_numpy()
+    prev = np.vstack([np.ones((1, curves.shape[1])), filled[:-1]])
+    prev = np.where(np.isnan(prev), 1.0, prev)
+    return curves / prev - 1.0
+
+
+def return_metrics(rets: np.ndarray, trading_days: int = TRADING_DAYS) -> dict:
+    """
+    Return-based metrics of every column of a (dates x series) daily-return matrix in one pass.
+    NaN days are ignored.
+
+    Output:
+    metrics (dict[str, np.ndarray]): total_return, annual_return, volatility, sharpe, sortino
+    and max_drawdown, one value per column
+    """
+    rets = np.asarray(rets, dtype=float)
+    names = ("total_return", "annual_return", "volatility", "sharpe", "sortino", "max_drawdown")
+    if len(rets) == 0:
+        return {k: np.full(rets.shape[1], np.nan) for k in names}
+
+    valid = ~np.isnan(rets)
+    n = valid.sum(axis=0)
+    r = np.where(valid, rets, 0.0)
+    growth = np.cumprod(1.0 + r, axis=0)
+    total = growth[-1] - 1.0
+    drawdown = (growth / np.maximum.accumulate(growth, axis=0) - 1.0).min(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = r.sum(axis=0) / n
+        std = np.sqrt((np.where(valid, rets - mean, 0.0) ** 2).sum(axis=0) / (n - 1))
+        downside = np.sqrt((np.minimum(r, 0.0) ** 2).sum(axis=0) / n)
+        out = {
+            "total_return": np.where(n > 0, total, np.nan),
+            "annual_return": np.where(n > 0, (1.0 + total) ** (trading_days / n) - 1.0, np.nan),
+            "volatility": np.where(n > 1, std * np.sqrt(trading_days), np.nan),
+            "sharpe": np.where((n > 1) & (std > 0), mean / std * np.sqrt(trading_days), np.nan),
+            "sortino": np.where(downside > 0, mean / downside * np.sqrt(trading_days), np.nan),
+            "max_drawdown": np.where(n > 0, drawdown, np.nan),
+        }
+    return out
+
+
+def trade_metrics(trades: pd.DataFrame, tickers: list) -> pd.DataFrame:
+    """
+    Per-ticker trade statistics from a trade ledger (strategy.trade_ledger), with bincount over
+    the ticker codes instead of a groupby. A trade with positive PnL is a win and one with
+    negative PnL a loss; flat trades count in `trades` but are neither, so they are left out of
+    hit_rate (wins / (wins + losses)) and of avg_loss.
+
+    Output:
+    stats (pd.DataFrame): trades, hit_rate, avg_win and avg_loss per ticker, plus the PORTFOLIO row
+    """
+    k = len(tickers)
+    codes = pd.Categorical(trades["ticker"], categories=tickers).codes
+    pnl = trades["pnl"].to_numpy(dtype=float)
+    ok = codes >= 0
+    codes, pnl = np.append(codes[ok], np.full(ok.sum(), k)), np.tile(pnl[ok], 2)
+
+    win, loss = pnl > 0, pnl < 0
+    count = np.bincount(codes, minlength=k + 1)
+    wins = np.bincount(codes, weights=win, minlength=k + 1)
+    losses = np.bincount(codes, weights=loss, minlength=k + 1)
+    win_sum = np.bincount(codes, weights=np.where(win, pnl, 0.0), minlength=k + 1)
+    loss_sum = np.bincount(codes, weights=np.where(loss, pnl, 0.0), minlength=k + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stats = pd.DataFrame({
+            "trades": count,
+            "hit_rate": np.where(wins + losses > 0, wins / (wins + losses), np.nan),
+            "avg_win": np.where(wins > 0, win_sum / wins, np.nan),
+            "avg_loss": np.where(losses > 0, loss_sum / losses, np.nan),
+        }, index=list(tickers) + [PORTFOLIO])
+    return stats
+
+
+def position_metrics(positions: np.ndarray, trading_days: int = TRADING_DAYS) -> dict:
+    """
+    Turnover and exposure of every column of a (dates x series) position matrix (NaN = no price).
+
+    Output:
+    metrics (dict[str, np.ndarray]): exposure (share of days with an open position),
+    avg_gross (mean absolute position) and annual turnover (sum of |position changes| per year)
+    """
+    positions = np.asarray(positions, dtype=float)
+    valid = ~np.isnan(positions)
+    n = valid.sum(axis=0)
+    p = np.where(valid, positions, 0.0)
+    changes = np.abs(np.diff(np.vstack([np.zeros((1, p.shape[1])), p]), axis=0)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "exposure": np.where(n > 0, (p != 0).sum(axis=0) / n, np.nan),
+            "avg_gross": np.where(n > 0, np.abs(p).sum(axis=0) / n, np.nan),
+            "turnover": np.where(n > 0, changes / n * trading_days, np.nan),
+        }
+
+
+def performance_metrics(curves: pd.DataFrame, trades: pd.DataFrame = None, positions: pd.DataFrame = None,
+                        trading_days: int = TRADING_DAYS) -> pd.DataFrame:
+    """
+    Performance metrics of every ticker's sentiment strategy and of the equal-weight portfolio,
+    computed in one vectorized pass over the (dates x tickers) curve matrix.
+
+    The portfolio splits capital equally across the tickers with a price on each day (its
+    daily return is the cross-sectional mean of the tickers' returns); its trade statistics
+    pool all trades and its position metrics average the tickers'.
+
+    Inputs:
+    curves (pd.DataFrame): backtest_sentiment_strategy results ({ticker}_sentiment columns are used)
+    trades (pd.DataFrame): trade ledger (adds trades, hit_rate, avg_win, avg_loss)
+    positions (pd.DataFrame): daily positions, dates x tickers (adds exposure, avg_gross, turnover)
+    trading_days (int): trading days per year for annualization
+
+    Output:
+    metrics (pd.DataFrame): one row per ticker plus a PORTFOLIO row
+    """
+    cols = [c for c in curves.columns if c.endswith("_sentiment")]
+    tickers = [c[:-len("_sentiment")] for c in cols]
+    rets = curve_returns(curves[cols].to_numpy(dtype=float))
+    with np.errstate(invalid="ignore"):
+        portfolio = np.nanmean(np.where(np.isnan(rets).all(axis=1, keepdims=True), 0.0, rets), axis=1)
+    out = return_metrics(np.column_stack([rets, portfolio]), trading_days)
+    metrics = pd.DataFrame(out, index=tickers + [PORTFOLIO])
+
+    if trades is not None:
+        metrics = metrics.join(trade_metrics(trades, tickers))
+    if positions is not None:
+        pos = positions.reindex(index=curves.index, columns=tickers).to_numpy(dtype=float)
+        pm = position_metrics(pos, trading_days)
+        metrics = metrics.join(pd.DataFrame({k: np.append(v, np.nanmean(v) if len(v) else np.nan)
+                                             for k, v in pm.items()}, index=tickers + [PORTFOLIO]))
+    metrics.index.name = "ticker"
+    return metrics
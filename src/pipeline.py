@@ -0,0 +1,293 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import pandas as pd
+import sentiment
+import strategy
+from prices import load_prices
+from progress_log import ProgressLog
+import scraper
+from scraper import (DriverPool, HostRateLimiter, ScrapeLedger, get_year_quarters_from_dates, make_transcript_index,
+                     scrape_ticker)
+
+
+SCRAPE_WORKERS = 2       # tickers scraped concurrently (one browser each)
+SCORE_WORKERS = 2        # tickers scored concurrently
+SCORE_CONCURRENCY = 4    # LLM requests in flight per scoring ticker
+QUEUE_SIZE = 4           # tickers buffered between stages (backpressure)
+
+_DONE = object()
+
+
+def run_pipeline(tickers, start_date: pd.Timestamp, end_date: pd.Timestamp,
+                 scrape_workers: int = SCRAPE_WORKERS, score_workers: int = SCORE_WORKERS,
+                 score_concurrency: int = SCORE_CONCURRENCY, queue_size: int = QUEUE_SIZE,
+                 llm_client=None, on_progress=None, on_result=None):
+    """
+    Scrape, score and backtest a list of tickers as overlapping stages.
+
+    Each ticker flows through bounded queues as soon as the previous stage finishes it:
+    scraped transcripts go to the sentiment workers while other tickers are still being
+    scraped, and scored tickers are backtested while others are still being scored. A full
+    queue blocks the stage feeding it, so memory stays bounded. Prices for the whole universe
+    are loaded in the background while the first tickers are scraped, covering the requested
+    quarters plus a 10-day margin on each side; a ticker is backtested over the price window of
+    all its scored calls (strategy.price_window), topped up from the price store when its
+    processed history starts earlier.
+
+    Scrape jobs go through the same ScrapeLedger as scraper.scrape_universe: quarters without a
+    transcript stay negative-cached and failed quarters back off between runs instead of
+    starting a browser every time.
+
+    A ticker that fails in any stage is reported and skipped; the other tickers continue.
+
+    Inputs:
+    tickers (list[str]): ticker symbols
+    start_date (pd.Timestamp): start date
+    end_date (pd.Timestamp): end date
+    scrape_workers (int): tickers scraped concurrently (size of the shared browser pool)
+    score_workers (int): tickers scored concurrently
+    score_concurrency (int): LLM requests in flight per scoring ticker (all share one rate limiter)
+    queue_size (int): max tickers waiting between two stages
+    llm_client: object exposing `responses.create` (defaults to the OpenAI client)
+    on_progress (callable): called as on_progress(stage, ticker, error) each time a ticker leaves
+                            a stage ("scrape", "score" or "backtest"); error is None on success.
+                            Always called from the calling thread (safe for Streamlit widgets).
+    on_result (callable): called as on_result(ticker, scores, curves) as soon as a ticker is
+                          backtested, from the calling thread, to render results incrementally
+
+    Output:
+    scores (pd.DataFrame): consolidated processed rows (no transcripts)
+    curves (pd.DataFrame): strategy and buy & hold curves, as backtest_sentiment_strategy returns
+    """
+    tickers = list(dict.fromkeys(tickers))
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    quarters = set(get_year_quarters_from_dates(start_date, end_date))
+
+    scraped_q = queue.Queue(maxsize=queue_size)
+    scored_q = queue.Queue(maxsize=queue_size)
+    limiter = sentiment.RateLimiter()
+    host_limiter = HostRateLimiter()
+    index = make_transcript_index(host_limiter) if scraper.PROBE_BEFORE_SCRAPE else None
+    ledger = ScrapeLedger(scraper.LEDGER_PATH)
+    progress = ProgressLog(sentiment.ROOT_PROGRESS_PATH)
+    events = queue.Queue()
+    errors = {}
+
+    def report(stage, ticker, error=None):
+        # Workers only enqueue; the calling thread records errors and runs the callback
+        events.put((stage, ticker, error))
+
+    def drain_events():
+        while True:
+            try:
+                stage, ticker, error = events.get_nowait()
+            except queue.Empty:
+                return
+            if error is not None:
+                print(f"⚠️ {stage} failed for {ticker}: {error}")
+                errors[ticker] = f"{stage}: {error}"
+            if on_progress is not None:
+                on_progress(stage, ticker, error)
+
+    def scrape_stage(ticker, pool):
+        try:
+            df = scrape_ticker(ticker, start_date, end_date, max_workers=1, pool=pool, limiter=host_limiter,
+                               index=index, ledger=ledger)
+            df = df[df["year_quarter"].astype(str).isin(quarters)]
+        except Exception as e:
+            report("scrape", ticker, e)
+            return
+        if df.empty:
+            report("scrape", ticker, "no transcripts in the date range")
+            return
+        report("scrape", ticker)
+        # Only call metadata is queued; the score stage reads each transcript from the store as it builds the prompt
+        scraped_q.put((ticker, df.drop(columns=["earnings_call_raw_text"])))
+
+    def score_stage():
+        while True:
+            item = scraped_q.get()
+            if item is _DONE:
+                return
+            ticker, df = item
+            try:
+                scores = sentiment.analyze_sentiment(df, max_concurrency=score_concurrency, llm_client=llm_client,
+                                                     limiter=limiter, progress=progress, compact=False)
+            except Exception as e:
+                report("score", ticker, e)
+                continue
+            report("score", ticker)
+            scored_q.put((ticker, scores))
+
+    # Prices of the requested quarters are prefetched while scraping; a ticker's scores can reach
+    # further back (its whole processed history), which is topped up when it is backtested
+    first_call = pd.Timestamp(start_date.year, ((start_date.month - 1) // 3) * 3 + 1, 1)
+    price_start = first_call - pd.Timedelta(days=10)
+    price_end = end_date + pd.Timedelta(days=10)
+
+    all_scores, curves = [], {}
+    with DriverPool(size=scrape_workers) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, scrape_workers)) as scrape_ex, \
+            ThreadPoolExecutor(max_workers=max(1, score_workers) + 1) as score_ex:
+        price_future = score_ex.submit(load_prices, tickers, price_start, price_end)
+        scrape_futures = [scrape_ex.submit(scrape_stage, t, pool) for t in tickers]
+        score_futures = [score_ex.submit(score_stage) for _ in range(max(1, score_workers))]
+
+        def close_stages():
+            wait(scrape_futures)
+            for _ in score_futures:
+                scraped_q.put(_DONE)
+            wait(score_futures)
+            scored_q.put(_DONE)
+
+        threading.Thread(target=close_stages, daemon=True).start()
+
+        # Backtest stage runs here, one ticker at a time as scores arrive
+        price_df = None
+        while True:
+            drain_events()
+            try:
+                item = scored_q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            ticker, scores = item
+            all_scores.append(scores)
+            try:
+                if price_df is None:
+                    price_df = price_future.result()
+                if scores.empty:
+                    raise ValueError("no scored calls")
+                # Same price window as prepare_inputs would load for these scores
+                lo, hi = strategy.price_window(pd.to_datetime(scores["date"]))
+                if ticker in price_df and lo >= price_start and hi <= price_end:
+                    px = price_df.loc[(price_df.index >= lo) & (price_df.index < hi), [ticker]]
+                else:
+                    px = load_prices([ticker], lo, hi)
+                inputs = strategy.prepare_inputs(scores, price_df=px)
+                if not inputs["tickers"]:
+                    raise ValueError("no prices")
+                ticker_curves = strategy.backtest_sentiment_strategy(None, inputs=inputs)
+            except Exception as e:
+                report("backtest", ticker, e)
+                continue
+            for col, curve in ticker_curves.items():
+                curves[col] = curve
+            report("backtest", ticker)
+            if on_result is not None:
+                on_result(ticker, scores, ticker_curves)
+        drain_events()
+    ledger.compact()
+
+    scores = pd.concat(all_scores, ignore_index=True) if all_scores else pd.DataFrame()
+    progress.compact(base=scores)
+    ordered = [c for t in tickers for c in (f"{t}_sentiment", f"{t}_buyhold") if c in curves]
+    if errors:
+        print(f"⚠️ Pipeline finished with {len(errors)} failed tickers: {errors}")
+    return scores, pd.DataFrame({c: curves[c] for c in ordered})
+
+
+class PipelineRun:
+    """
+    run_pipeline in a background thread, with progress and partial results that a UI can poll
+    without blocking. All state is guarded by a lock; `snapshot` returns a consistent copy.
+
+    Inputs:
+    tickers (list[str]): ticker symbols
+    start_date, end_date (pd.Timestamp): date range
+    **kwargs: forwarded to run_pipeline
+    """
+
+    STAGES = ("scrape", "score", "backtest")
+
+    def __init__(self, tickers, start_date, end_date, **kwargs):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.started = time.monotonic()
+        self.finished = None
+        self.error = None
+        self.scores = None
+        self.curves = None
+        self._done = {s: 0 for s in self.STAGES}
+        self._failed = {}
+        self._partial_scores = []
+        self._partial_curves = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, args=(start_date, end_date, kwargs), daemon=True)
+        self._thread.start()
+
+    def _on_progress(self, stage, ticker, error):
+        with self._lock:
+            self._done[stage] += 1
+            if error is not None:
+                self._failed[ticker] = (stage, str(error))
+
+    def _on_result(self, ticker, scores, curves):
+        with self._lock:
+            self._partial_scores.append(scores)
+            for col, curve in curves.items():
+                self._partial_curves[col] = curve
+
+    def _run(self, start_date, end_date, kwargs):
+        try:
+            scores, curves = run_pipeline(self.tickers, start_date, end_date, on_progress=self._on_progress,
+                                          on_result=self._on_result, **kwargs)
+            with self._lock:
+                self.scores, self.curves = scores, curves
+        except Exception as e:
+            print(f"⚠️ Pipeline run failed: {e}")
+            with self._lock:
+                self.error = e
+        finally:
+            with self._lock:
+                self.finished = time.monotonic()
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def stage_progress(self, stage: str) -> dict:
+        """
+        Progress of one stage.
+
+        Input:
+        stage (str): "scrape", "score" or "backtest"
+
+        Output:
+        progress (dict): done, total, fraction, elapsed seconds and eta seconds (None until the
+        first ticker leaves the stage). Tickers that failed upstream are left out of the total.
+        """
+        upstream = self.STAGES[:self.STAGES.index(stage)]
+        with self._lock:
+            total = len(self.tickers) - sum(1 for s, _ in self._failed.values() if s in upstream)
+            done = self._done[stage]
+            end = self.finished or time.monotonic()
+        elapsed = end - self.started
+        if self.done:
+            eta = 0.0
+        elif done:
+            eta = elapsed / done * max(total - done, 0)
+        else:
+            eta = None
+        return {"done": done, "total": total, "fraction": min(done / total, 1.0) if total > 0 else 1.0,
+                "elapsed": elapsed, "eta": eta}
+
+    def snapshot(self):
+        """
+        Results so far (final results once the run is finished).
+
+        Output:
+        scores (pd.DataFrame): scored calls of the backtested tickers
+        curves (pd.DataFrame): strategy and buy & hold curves of the backtested tickers
+        failed (dict): ticker -> (stage, error message)
+        """
+        with self._lock:
+            failed = dict(self._failed)
+            if self.curves is not None:
+                return self.scores, self.curves, failed
+            scores = pd.concat(self._partial_scores, ignore_index=True) if self._partial_scores else pd.DataFrame()
+            ordered = [c for t in self.tickers for c in (f"{t}_sentiment", f"{t}_buyhold") if c in self._partial_curves]
+            curves = pd.DataFrame({c: self._partial_curves[c] for c in ordered})
+        return scores, curves, failed
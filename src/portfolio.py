@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import strategy
+
+
+# Portfolio Parameters
+ALLOCATION = "equal_weight"   # "equal_weight": 1/N of capital per ticker slot; "active": split across open positions
+GROSS_CAP = 1.0               # max sum of |weights| (1.0 = no leverage)
+MAX_POSITIONS = None          # max concurrent open positions (None = unlimited)
+INITIAL_CAPITAL = 1.0
+DTYPE = "float64"             # "float32" halves the memory of the (dates x tickers) arrays
+TICKER_CHUNK = 256            # tickers processed together (bounds peak memory)
+
+ALLOCATIONS = ("equal_weight", "active")
+
+
+def asset_returns(price_df: pd.DataFrame, dtype=DTYPE) -> np.ndarray:
+    """
+    Daily close-to-close returns (dates x tickers). Across a gap the return is measured from the
+    last valid price, as the per-ticker backtest does; days without a price are NaN.
+    """
+    prices = price_df.to_numpy(dtype=np.float64)
+    prev = pd.DataFrame(prices).ffill().shift().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = prices / prev - 1.0
+    rets[np.isnan(prev) & ~np.isnan(prices)] = 0.0
+    return rets.astype(dtype)
+
+
+def limit_positions(held: np.ndarray, new_trade: np.ndarray, max_positions: int) -> np.ndarray:
+    """
+    Enforce a cap on concurrent positions. A position keeps its slot until it is closed; new
+    trades fill free slots in column order and a trade that finds no slot is skipped for its
+    whole life.
+
+    Inputs:
+    held (np.ndarray[bool]): dates x tickers, ticker has an open position
+    new_trade (np.ndarray[bool]): dates x tickers, a trade is entered (or flipped) that day
+    max_positions (int): max concurrent positions
+
+    Output:
+    accepted (np.ndarray[bool]): dates x tickers, position is held in the portfolio
+    """
+    accepted = np.zeros(held.shape, dtype=bool)
+    prev = np.zeros(held.shape[1], dtype=bool)
+    for t in range(held.shape[0]):
+        keep = prev & held[t] & ~new_trade[t]
+        free = max_positions - int(keep.sum())
+        if free > 0:
+            candidates = np.flatnonzero(new_trade[t])[:free]
+            keep[candidates] = True
+        accepted[t] = keep
+        prev = keep
+    return accepted
+
+
+def build_portfolio(positions: pd.DataFrame, price_df: pd.DataFrame, allocation: str = None,
+                    gross_cap: float = None, max_positions: int = None, commission_bp: float = None,
+                    initial_capital: float = None, dtype: str = None, chunk_size: int = None,
+                    return_weights: bool = False):
+    """
+    Combine per-ticker strategy positions into one portfolio sharing a single pool of capital.
+
+    Each ticker's position (signal x position size, from backtest_sentiment_strategy with
+    return_trades=True) is scaled by its capital share: 1/N of capital per ticker ("equal_weight",
+    N = number of tickers, or max_positions when set) or an equal split across the positions
+    open that day ("active"). Weights are then scaled down on days their gross exposure exceeds
+    gross_cap. Costs are commission_bp per unit of weight traded. Everything is matrix
+    arithmetic over (dates x tickers) arrays, processed in chunks of tickers so peak memory
+    stays at a few chunk-sized arrays; float32 halves it again.
+
+    Inputs:
+    positions (pd.DataFrame): daily position per ticker (dates x tickers, NaN = no price)
+    price_df (pd.DataFrame): close prices of the same tickers
+    allocation (str): "equal_weight" or "active" (default ALLOCATION)
+    gross_cap (float): max sum of |weights| (default GROSS_CAP)
+    max_positions (int): max concurrent positions (default MAX_POSITIONS; None = unlimited)
+    commission_bp (float): cost per unit of weight traded, in bp (default strategy.COMMISSION_BP)
+    initial_capital (float): starting NAV (default INITIAL_CAPITAL)
+    dtype (str): "float64" or "float32" (default DTYPE)
+    chunk_size (int): tickers per chunk (default TICKER_CHUNK)
+    return_weights (bool): also return the (dates x tickers) weight matrix
+
+    Output:
+    portfolio (pd.DataFrame): per date: nav, return, cost, gross_exposure, net_exposure, n_positions
+    weights (pd.DataFrame): portfolio weights (only if return_weights)
+    """
+    allocation = ALLOCATION if allocation is None else allocation
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"build_portfolio: unknown allocation {allocation!r} (expected one of {ALLOCATIONS})")
+    gross_cap = GROSS_CAP if gross_cap is None else gross_cap
+    max_positions = MAX_POSITIONS if max_positions is None else max_positions
+    commission_bp = strategy.COMMISSION_BP if commission_bp is None else commission_bp
+    initial_capital = INITIAL_CAPITAL if initial_capital is None else initial_capital
+    dtype = np.dtype(DTYPE if dtype is None else dtype)
+    chunk_size = TICKER_CHUNK if chunk_size is None else chunk_size
+
+    tickers = list(positions.columns)
+    index = positions.index.union(price_df.index)
+    positions = positions.reindex(index=index)
+    price_df = price_df.reindex(index=index, columns=tickers)
+    n_days, n_tickers = len(index), len(tickers)
+    chunks = [slice(i, i + chunk_size) for i in range(0, n_tickers, chunk_size)]
+
+    def chunk_positions(sl):
+        # Positions carry through price gaps (the return across a gap lands on the next priced day)
+        p = positions.iloc[:, sl]
+        p = p.ffill().where(p.bfill().notna())
+        return np.nan_to_num(p.to_numpy(dtype=dtype), nan=0.0)
+
+    # Which positions the portfolio holds: all, or the first max_positions by slot
+    accepted = None
+    if max_positions is not None:
+        held = np.zeros((n_days, n_tickers), dtype=bool)
+        new_trade = np.zeros((n_days, n_tickers), dtype=bool)
+        for sl in chunks:
+            p = chunk_positions(sl)
+            prev = np.vstack([np.zeros((1, p.shape[1]), dtype=dtype), p[:-1]])
+            held[:, sl] = p != 0
+            new_trade[:, sl] = (p != 0) & (p != prev)
+        accepted = limit_positions(held, new_trade, max_positions)
+
+    # Pass 1: per-day open positions and gross exposure before scaling
+    n_open = np.zeros(n_days)
+    gross = np.zeros(n_days)
+    for sl in chunks:
+        p = chunk_positions(sl)
+        if accepted is not None:
+            p = np.where(accepted[:, sl], p, 0)
+        n_open += (p != 0).sum(axis=1)
+        gross += np.abs(p).sum(axis=1, dtype=np.float64)
+
+    if allocation == "active":
+        divisor = np.maximum(n_open, 1.0)
+    else:
+        divisor = np.full(n_days, float(max_positions if max_positions is not None else max(n_tickers, 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(gross / divisor > gross_cap, gross_cap * divisor / gross, 1.0) / divisor
+    scale = scale.astype(dtype)[:, None]
+
+    # Pass 2: weights, returns and traded weight, accumulated chunk by chunk
+    port_ret = np.zeros(n_days)
+    traded = np.zeros(n_days)
+    gross_w = np.zeros(n_days)
+    net_w = np.zeros(n_days)
+    weights = np.zeros((n_days, n_tickers), dtype=dtype) if return_weights else None
+    for sl in chunks:
+        p = chunk_positions(sl)
+        if accepted is not None:
+            p = np.where(accepted[:, sl], p, 0)
+        w = p * scale
+        r = np.nan_to_num(asset_returns(price_df.iloc[:, sl], dtype), nan=0.0)
+        port_ret += (w * r).sum(axis=1, dtype=np.float64)
+        traded += np.abs(np.diff(w, axis=0, prepend=np.zeros((1, w.shape[1]), dtype=dtype))).sum(axis=1, dtype=np.float64)
+        gross_w += np.abs(w).sum(axis=1, dtype=np.float64)
+        net_w += w.sum(axis=1, dtype=np.float64)
+        if weights is not None:
+            weights[:, sl] = w
+
+    cost = traded * commission_bp / 10000.0
+    daily = port_ret - cost
+    portfolio = pd.DataFrame({
+        "nav": initial_capital * np.cumprod(1.0 + daily),
+        "return": daily,
+        "cost": cost,
+        "gross_exposure": gross_w,
+        "net_exposure": net_w,
+        "n_positions": n_open.astype(np.int64),
+    }, index=index)
+    if return_weights:
+        return portfolio, pd.DataFrame(weights, index=index, columns=tickers)
+    return portfolio
@@ -0,0 +1,202 @@
+import json
+import os
+import pandas as pd
+import yfinance as yf
+
+
+PRICE_STORE_PATH = "price_cache"
+DOWNLOAD_CHUNK = 100     # tickers per yfinance request
+NO_PRICES_ERROR = "no price data found"   # yfinance error for a range without prices (not a failure)
+
+
+class PriceSource:
+    """
+    Interface for close-price providers.
+
+    fetch(tickers, start, end) -> pd.DataFrame of close prices (dates x tickers) for
+    start <= date < end. Tickers whose download failed are listed in the frame's
+    attrs["failed"]; any other ticker missing from the columns (or all NaN) had no prices in
+    the range, e.g. before its listing or after its delisting. Raising fails the whole request.
+    """
+
+    def fetch(self, tickers: list, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class YFinanceSource(PriceSource):
+    """
+    Yahoo Finance close prices, downloaded in chunks of `chunk_size` tickers. yfinance logs
+    per-ticker errors instead of raising; a ticker counts as failed unless its error only says
+    that the range has no prices.
+
+    Input:
+    chunk_size (int): tickers per request
+    """
+
+    def __init__(self, chunk_size: int = DOWNLOAD_CHUNK):
+        self.chunk_size = chunk_size
+
+    def fetch(self, tickers: list, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        frames, failed = [], []
+        for i in range(0, len(tickers), self.chunk_size):
+            chunk = tickers[i:i + self.chunk_size]
+            close = yf.download(chunk, start=start, end=end, progress=False)['Close']
+            if isinstance(close, pd.Series):
+                close = close.to_frame(chunk[0])
+            errors = getattr(yf.shared, "_ERRORS", {})
+            failed += [t for t in chunk if t in errors and NO_PRICES_ERROR not in str(errors[t])]
+            frames.append(close)
+        out = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+        out.attrs["failed"] = failed
+        return out
+
+
+class CSVPriceSource(PriceSource):
+    """
+    Close prices from a local CSV, for offline and reproducible runs. Accepts either a wide
+    file (a date column followed by one column per ticker) or a long file with
+    date, ticker and close columns.
+
+    Input:
+    path (str): CSV path
+    """
+
+    def __init__(self, path: str):
+        df = pd.read_csv(path)
+        date_col = df.columns[0]
+        df[date_col] = pd.to_datetime(df[date_col])
+        if {"ticker", "close"} <= set(df.columns):
+            df = df.pivot_table(index=date_col, columns="ticker", values="close")
+        else:
+            df = df.set_index(date_col)
+        df.index.name = "Date"
+        self.prices = df.sort_index().astype(float)
+
+    def fetch(self, tickers: list, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        cols = [t for t in tickers if t in self.prices.columns]
+        out = self.prices.loc[(self.prices.index >= start) & (self.prices.index < end), cols]
+        return out
+
+
+class PriceStore:
+    """
+    Local cache of close prices indexed by (date, ticker), stored as one wide Parquet file plus
+    a coverage file recording the date range already fetched for each ticker. Requests only
+    download what is missing: unseen tickers, and the dates before/after each ticker's covered
+    range. Tickers with the same missing range are fetched together. A successful fetch covers
+    its range even when it has no prices (before a listing, after a delisting); failed fetches
+    and dates after today stay uncovered and are fetched again next time.
+
+    Inputs:
+    path (str): cache directory
+    source (PriceSource): where missing prices come from (defaults to YFinanceSource)
+    """
+
+    def __init__(self, path: str = PRICE_STORE_PATH, source: PriceSource = None):
+        self.path = path
+        self.source = source or YFinanceSource()
+        self.prices_path = os.path.join(path, "close.parquet")
+        self.coverage_path = os.path.join(path, "coverage.json")
+
+    def _load(self):
+        prices = pd.read_parquet(self.prices_path) if os.path.exists(self.prices_path) else pd.DataFrame()
+        if prices.empty:
+            # Keep a DatetimeIndex even with nothing cached, so date filters work on the result
+            prices = pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+        coverage = {}
+        if os.path.exists(self.coverage_path):
+            with open(self.coverage_path) as f:
+                coverage = {t: (pd.Timestamp(a), pd.Timestamp(b)) for t, (a, b) in json.load(f).items()}
+        return prices, coverage
+
+    def _save(self, prices: pd.DataFrame, coverage: dict):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = f"{self.prices_path}.tmp"
+        prices.to_parquet(tmp)
+        os.replace(tmp, self.prices_path)
+        tmp = f"{self.coverage_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({t: [a.isoformat(), b.isoformat()] for t, (a, b) in coverage.items()}, f)
+        os.replace(tmp, self.coverage_path)
+
+    def missing_ranges(self, tickers: list, start: pd.Timestamp, end: pd.Timestamp, coverage: dict) -> dict:
+        """Map each missing [start, end) range to the tickers that need it."""
+        need = {}
+        for t in tickers:
+            if t not in coverage:
+                need.setdefault((start, end), []).append(t)
+                continue
+            have_start, have_end = coverage[t]
+            if start < have_start:
+                need.setdefault((start, have_start), []).append(t)
+            if end > have_end:
+                need.setdefault((have_end, end), []).append(t)
+        return need
+
+    def get(self, tickers: list, start, end) -> pd.DataFrame:
+        """
+        Close prices for `tickers` with start <= date < end, topping up the cache first.
+
+        Inputs:
+        tickers (list[str]): ticker symbols
+        start, end: date range (end exclusive, as in yfinance)
+
+        Output:
+        prices (pd.DataFrame): dates x tickers (columns in the order given)
+        """
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        prices, coverage = self._load()
+        need = self.missing_ranges(tickers, start, end, coverage)
+
+        if need:
+            # Dates after today can't have prices yet; leave them uncovered so they are fetched again
+            today = pd.Timestamp.today().normalize()
+            covered_until = today + pd.Timedelta(days=1)
+            for (a, b), group in need.items():
+                try:
+                    fetched = self.source.fetch(group, a, b)
+                except Exception as e:
+                    print(f"⚠️ Price fetch failed for {len(group)} tickers ({a.date()} to {b.date()}): {e}")
+                    continue
+                failed = set(fetched.attrs.get("failed", ()))
+                if failed:
+                    print(f"⚠️ Price fetch failed for {', '.join(sorted(failed))}; they will be fetched again.")
+                if not fetched.empty:
+                    fetched = fetched.dropna(how="all")
+                    prices = fetched if prices.empty else fetched.combine_first(prices)
+                covered_end = min(b, covered_until)
+                if covered_end <= a:
+                    continue
+                for t in group:
+                    if t in failed:
+                        continue
+                    if t in coverage:
+                        coverage[t] = (min(coverage[t][0], a), max(coverage[t][1], covered_end))
+                    else:
+                        coverage[t] = (a, covered_end)
+            prices = prices.sort_index()
+            self._save(prices, coverage)
+
+        out = prices.reindex(columns=tickers)
+        out = out.loc[(out.index >= start) & (out.index < end)]
+        return out.dropna(how="all")
+
+
+_default_store = None
+
+
+def load_prices(tickers: list, start, end, store: PriceStore = None) -> pd.DataFrame:
+    """
+    Close prices (dates x tickers) for start <= date < end from the local price store.
+
+    Inputs:
+    tickers (list[str]): ticker symbols
+    start, end: date range (end exclusive)
+    store (PriceStore): price store to use (defaults to a yfinance-backed store at PRICE_STORE_PATH)
+    """
+    global _default_store
+    if store is None:
+        if _default_store is None:
+            _default_store = PriceStore()
+        store = _default_store
+    return store.get(list(tickers), start, end)
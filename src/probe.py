@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import telemetry
+
+
+INDEX_PATH = "transcript_index.json"
+INDEX_TTL_DAYS = 7           # how long a ticker's quarter index is trusted before it is fetched again
+PROBE_TIMEOUT = 10           # seconds per HTTP request
+PROBE_WORKERS = 8            # concurrent HTTP probes (also the connection pool size)
+USER_AGENT = "Mozilla/5.0 (compatible; earnings-call-sentiment/1.0)"
+
+# Links to quarter pages in a transcript listing, e.g. ".../transcripts/2023-year/1-quarter"
+_QUARTER_LINK = re.compile(r"(\d{4})-year/([1-4])-quarter")
+_GONE = (404, 410)
+
+
+def make_session(pool_size: int = PROBE_WORKERS) -> requests.Session:
+    """
+    HTTP session with a connection pool sized for the probe workers and a short retry policy
+    for throttling and server errors (404s are answers, not failures).
+    """
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET", "HEAD"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def parse_quarter_index(html: str) -> list:
+    """
+    Quarters linked from a transcript listing page.
+
+    Input:
+    html (str): raw HTML of the page
+
+    Output: sorted list of '{year}-year/{quarter}-quarter' strings
+    """
+    return sorted({f"{y}-year/{q}-quarter" for y, q in _QUARTER_LINK.findall(html or "")})
+
+
+class TranscriptIndex:
+    """
+    Per-ticker index of which quarters have a transcript, built from plain HTTP fetches (no
+    browser) and cached in a JSON file with a TTL.
+
+    Each ticker's listing page (`base_url`) is fetched once per TTL and classified as:
+      - 'not_covered': the page does not exist (404/410), so no quarter can be scraped
+      - 'listed': the page links to quarter pages; a quarter between the oldest and newest
+        listed ones that is not linked has no transcript
+      - 'unknown': anything else (errors, pages rendered only by JavaScript); nothing is ruled out
+    Quarters the listing cannot decide (unknown tickers, or outside the listed span) are probed
+    individually; a quarter page answering 404/410 is ruled out and remembered with the listing
+    until it expires. Probes fail open: a job is only dropped on a definite "does not exist".
+
+    Inputs:
+    base_url (str): listing URL template with a {ticker} field; quarter pages are base_url + year_quarter
+    path (str): JSON cache file (None = in-memory only)
+    ttl_days (float): how long a cached listing is trusted
+    session (requests.Session): pooled HTTP session (default make_session())
+    limiter: optional rate limiter with a `wait(url)` method, shared with the browsers
+    timeout (float): seconds per request
+    """
+
+    def __init__(self, base_url: str, path: str = INDEX_PATH, ttl_days: float = INDEX_TTL_DAYS,
+                 session: requests.Session = None, limiter=None, timeout: float = PROBE_TIMEOUT):
+        self.base_url = base_url
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.session = session or make_session()
+        self.limiter = limiter
+        self.timeout = timeout
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    def _get(self, url: str, event: str, body: bool = True):
+        """Status code and body of a GET (None, None on a network error); the body is skipped unless asked for."""
+        if self.limiter is not None:
+            self.limiter.wait(url)
+        with telemetry.timer(event) as ev:
+            try:
+                with self.session.get(url, timeout=self.timeout, stream=not body) as resp:
+                    ev["status"] = str(resp.status_code)
+                    return resp.status_code, resp.text if body else None
+            except requests.RequestException as e:
+                ev["failed"] = 1
+                ev["reason"] = type(e).__name__
+                return None, None
+
+    def lookup(self, ticker: str, now: float = None) -> dict:
+        """
+        A ticker's index entry, fetched again when missing or older than the TTL.
+
+        Output:
+        entry (dict): status ('listed', 'not_covered' or 'unknown'), quarters (list[str]), missing
+                      (list[str], quarter pages found not to exist) and fetched_at
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.entries.get(ticker)
+        if entry is not None and now - entry["fetched_at"] < self.ttl:
+            return entry
+
+        code, html = self._get(self.base_url.format(ticker=ticker), "probe_index")
+        quarters = parse_quarter_index(html) if code == 200 else []
+        if code in _GONE:
+            status = "not_covered"
+        elif quarters:
+            status = "listed"
+        else:
+            status = "unknown"
+        entry = {"status": status, "quarters": quarters, "missing": [], "fetched_at": now}
+        with self._lock:
+            self.entries[ticker] = entry
+        return entry
+
+    def page_exists(self, ticker: str, year_quarter: str):
+        """False if a quarter page answers 404/410, True otherwise (including errors)."""
+        code, _ = self._get(f"{self.base_url.format(ticker=ticker)}{year_quarter}", "probe_page", body=False)
+        return code not in _GONE
+
+    def filter_jobs(self, jobs, max_workers: int = PROBE_WORKERS, save: bool = True):
+        """
+        Drop (ticker, year_quarter) jobs that cannot succeed, before any browser is started.
+
+        Inputs:
+        jobs (list[tuple[str, str]]): (ticker, year_quarter) pairs
+        max_workers (int): concurrent HTTP probes
+        save (bool): write the index cache afterwards
+
+        Output:
+        kept (list[tuple[str, str]]): jobs worth scraping, in their original order
+        skipped (list[tuple[str, str, str]]): (ticker, year_quarter, reason) of the dropped jobs
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return [], []
+        tickers = list(dict.fromkeys(t for t, _ in jobs))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as ex:
+            entries = dict(zip(tickers, ex.map(self.lookup, tickers)))
+
+        verdicts = {}
+        to_probe = []
+        for ticker, yq in jobs:
+            entry = entries[ticker]
+            listed = entry["quarters"]
+            if entry["status"] == "not_covered":
+                verdicts[(ticker, yq)] = "ticker not covered"
+            elif entry["status"] == "listed" and listed[0] <= yq <= listed[-1]:
+                verdicts[(ticker, yq)] = None if yq in listed else "quarter not listed"
+            elif yq in entry.get("missing", []):
+                verdicts[(ticker, yq)] = "page not found"
+            else:
+                to_probe.append((ticker, yq))
+
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_probe)))) as ex:
+                found = ex.map(lambda job: self.page_exists(*job), to_probe)
+                for job, exists in zip(to_probe, found):
+                    verdicts[job] = None if exists else "page not found"
+                    if not exists:
+                        with self._lock:
+                            entries[job[0]].setdefault("missing", []).append(job[1])
+
+        if save:
+            self.save()
+        kept = [job for job in jobs if verdicts[job] is None]
+        skipped = [(t, yq, verdicts[(t, yq)]) for t, yq in jobs if verdicts[(t, yq)] is not None]
+        return kept, skipped
+
+    def save(self):
+        """Write the index cache (atomic replace)."""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.entries)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import pandas as pd
+
+
+KEY_COLUMNS = ["ticker", "year_quarter", "date"]
+
+
+class ProgressLog:
+    """
+    Append-only, crash-safe progress log for processed rows.
+
+    Checkpoints append only the new rows to a JSON-lines log (flushed and fsynced), so their
+    cost depends on the batch size rather than on the universe size. The consolidated view is
+    the snapshot CSV plus the log, built lazily by `read`; `compact` folds the log into the
+    snapshot with an atomic rename and then truncates the log. A crash at any point leaves
+    either the old or the new snapshot plus a log whose rows are deduplicated on read.
+
+    Safe to share between threads.
+
+    Inputs:
+    snapshot_path (str): consolidated CSV (e.g. all_calls_progress.csv)
+    log_path (str): append-only log (defaults to `{snapshot_path}.log`)
+    """
+
+    def __init__(self, snapshot_path: str, log_path: str = None):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or f"{snapshot_path}.log"
+        self._lock = threading.Lock()
+
+    def append(self, rows: list):
+        """Durably append processed rows (list of dicts) to the log."""
+        if not rows:
+            return
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_log(self) -> list:
+        rows = []
+        if not os.path.exists(self.log_path):
+            return rows
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+        return rows
+
+    def read(self, base: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Consolidated view: snapshot rows, then `base` rows, then logged rows (latest wins),
+        sorted by ticker/date.
+
+        Input:
+        base (pd.DataFrame): optional extra rows to fold in (e.g. a run's full per-ticker results)
+        """
+        frames = []
+        if os.path.exists(self.snapshot_path):
+            snap = pd.read_csv(self.snapshot_path, dtype={"year_quarter": str})
+            if not snap.empty:
+                frames.append(snap)
+        if base is not None and not base.empty:
+            frames.append(base)
+        logged = self._read_log()
+        if logged:
+            frames.append(pd.DataFrame(logged))
+        if not frames:
+            return pd.DataFrame()
+        out = pd.concat(frames, ignore_index=True)
+        out["date"] = pd.to_datetime(out["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+        out = out.drop_duplicates(subset=KEY_COLUMNS, keep="last").sort_values(["ticker", "date"])
+        return out.reset_index(drop=True)
+
+    def compact(self, base: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Fold the log (and optional `base` rows) into the snapshot with an atomic rename, then
+        truncate the log. Returns the consolidated view.
+        """
+        with self._lock:
+            out = self.read(base)
+            if not out.empty:
+                tmp = f"{self.snapshot_path}.tmp"
+                out.to_csv(tmp, index=False)
+                os.replace(tmp, self.snapshot_path)
+            if os.path.exists(self.log_path):
+                tmp_log = f"{self.log_path}.tmp"
+                open(tmp_log, "w").close()
+                os.replace(tmp_log, self.log_path)
+        return out
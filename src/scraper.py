@@ -1,12 +1,41 @@
 import os
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlparse
 import pandas as pd
 from selenium.webdriver.chrome.options import Options
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+import store
+import telemetry
+from probe import TranscriptIndex
 
 
 BASE_PATH = "earnings_calls"
+BASE_URL = "https://www.roic.ai/quote/{ticker}/transcripts/"
+
+# Scraping engine parameters
+MAX_WORKERS = 4              # number of concurrent browsers
+REQUESTS_PER_SECOND = 2.0    # per-host rate limit shared by all workers
+
+# Batch scheduler parameters
+LEDGER_PATH = "scrape_ledger.jsonl"
+FLUSH_EVERY = 8              # transcripts buffered per ticker before they are written to the store
+RETRY_BASE_SECONDS = 3600    # backoff before retrying a failed job, doubled per attempt
+RETRY_MAX_SECONDS = 7 * 86400
+RETRY_MAX_ATTEMPTS = 5
+MISSING_TTL_DAYS = 30        # how long a page without a transcript stays negative-cached
+
+# Pre-check: plain HTTP probes drop jobs that cannot succeed before any browser starts (see probe.py)
+PROBE_BEFORE_SCRAPE = True
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
 
 def parse_quarter(quarter_str: str):
     """
@@ -20,42 +49,247 @@ def parse_quarter(quarter_str: str):
     return pd.Timestamp(f"{year}-{month:02d}-01")
 
 
-def get_earnings_call_text(url: str):
-    """Scrape transcript text from Roic.ai earnings call page.
-    
-    Input:
-    url (str): Roic.ai URL to scrape
+def get_driver_path():
+    """
+    Resolve the chromedriver binary once per process and reuse it for every browser.
+
+    Output:
+    path (str): path to the chromedriver executable
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def make_driver():
+    """
+    Start a headless Chrome driver using the cached driver binary.
+
+    Output:
+    driver (webdriver.Chrome): new browser session
     """
     options = Options()
+    options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=100,100")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    return webdriver.Chrome(service=Service(get_driver_path()), options=options)
+
+
+class DriverPool:
+    """
+    Bounded pool of reusable browser sessions.
+
+    Drivers are started lazily (at most `size` of them) and handed out one per worker, so a
+    browser is started once per run rather than once per URL. A driver that raises while
+    borrowed is quit and replaced on the next checkout.
+
+    Inputs:
+    size (int): maximum number of live drivers
+    factory (callable): zero-argument function returning a new driver (defaults to make_driver)
+    """
+
+    def __init__(self, size: int = MAX_WORKERS, factory=None):
+        self.size = max(1, int(size))
+        self.factory = factory or make_driver
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @contextmanager
+    def driver(self):
+        """Check out a driver for the duration of the with-block."""
+        self._slots.acquire()
+        try:
+            try:
+                drv = self._idle.get_nowait()
+            except queue.Empty:
+                with telemetry.timer("driver_start"):
+                    drv = self.factory()
+            try:
+                yield drv
+            except Exception:
+                _quit_quietly(drv)
+                raise
+            self._idle.put(drv)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle driver."""
+        while True:
+            try:
+                drv = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            _quit_quietly(drv)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _quit_quietly(driver):
     try:
-        driver.get(url)
-        body_text = driver.find_element("tag name", "body").text
+        driver.quit()
+    except Exception:
+        pass
 
-        # Try to isolate transcript section more cleanly
-        if "Earnings Call Transcript" in body_text:
-            transcript = body_text.split("Earnings Call Transcript", 1)[-1]
-        else:
-            transcript = body_text
 
-        # Cut off footer if present
-        if "Footer" in transcript:
-            transcript = transcript.split("Footer", 1)[0]
+class HostRateLimiter:
+    """
+    Thread-safe per-host rate limiter. Each call to `wait` reserves the next free slot for
+    the URL's host and sleeps until it arrives.
 
-        transcript = transcript.strip()
+    Input:
+    requests_per_second (float): allowed request rate per host (0 or None disables limiting)
+    """
 
-        if len(transcript) < 500:  # heuristic: too short = probably not valid transcript
-            print(f"⚠️ Transcript too short or invalid at {url}")
-            return None
+    def __init__(self, requests_per_second: float = REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
+
+def extract_transcript(body_text: str):
+    """
+    Isolate the transcript from a rendered page body.
+
+    Input:
+    body_text (str): full text of the page body
+
+    Output:
+    transcript (str | None): transcript text, or None if the page has no valid transcript
+    """
+    # Try to isolate transcript section more cleanly
+    if "Earnings Call Transcript" in body_text:
+        transcript = body_text.split("Earnings Call Transcript", 1)[-1]
+    else:
+        transcript = body_text
+
+    # Cut off footer if present
+    if "Footer" in transcript:
+        transcript = transcript.split("Footer", 1)[0]
+
+    transcript = transcript.strip()
+
+    if len(transcript) < 500:  # heuristic: too short = probably not valid transcript
+        return None
+
+    return transcript
+
+
+def fetch_transcript(url: str, driver):
+    """
+    Load a page with an existing driver and extract its transcript. Browser errors propagate.
+
+    Inputs:
+    url (str): Roic.ai URL to scrape
+    driver: live webdriver session
+
+    Output:
+    transcript (str | None): transcript text, or None if the page has no valid transcript
+    """
+    with telemetry.timer("page_fetch", host=urlparse(url).netloc) as ev:
+        driver.get(url)
+        body_text = driver.find_element("tag name", "body").text
+        transcript = extract_transcript(body_text)
+        ev["chars"] = len(transcript or "")
+    return transcript
+
+
+def get_earnings_call_text(url: str, driver=None):
+    """Scrape transcript text from Roic.ai earnings call page.
+    
+    Inputs:
+    url (str): Roic.ai URL to scrape
+    driver: optional live webdriver session to reuse; a temporary one is started otherwise
+    """
+    own_driver = driver is None
+    if own_driver:
+        with telemetry.timer("driver_start"):
+            driver = make_driver()
+    try:
+        transcript = fetch_transcript(url, driver)
+        if transcript is None:
+            print(f"⚠️ Transcript too short or invalid at {url}")
         return transcript
     except Exception as e:
         print(f"⚠️ Error scraping {url}: {e}")
         return None
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
+
+
+def make_transcript_index(limiter: HostRateLimiter = None) -> TranscriptIndex:
+    """Quarter index for roic.ai transcript pages, probed over plain HTTP and sharing the browsers' rate limiter."""
+    return TranscriptIndex(BASE_URL, limiter=limiter)
+
+
+def transcript_url(ticker: str, year_quarter: str) -> str:
+    """Build the Roic.ai transcript URL for a ticker and '{year}-year/{quarter}-quarter' string."""
+    return f"{BASE_URL.format(ticker=ticker)}{year_quarter}"
+
+
+def scrape_jobs(jobs, max_workers: int = MAX_WORKERS, requests_per_second: float = REQUESTS_PER_SECOND, pool=None,
+                limiter: HostRateLimiter = None):
+    """
+    Scrape (ticker, year_quarter) jobs concurrently across a pool of reusable drivers.
+    Results are yielded in completion order.
+
+    Inputs:
+    jobs (list[tuple[str, str]]): (ticker, year_quarter) pairs to scrape
+    max_workers (int): number of concurrent workers / browsers
+    requests_per_second (float): per-host rate limit shared across workers
+    pool (DriverPool): optional existing pool to reuse; otherwise one is created and closed here
+    limiter (HostRateLimiter): optional shared rate limiter (overrides requests_per_second)
+
+    Yields:
+    (ticker, year_quarter, transcript, error): transcript is None when the page had no transcript
+    or an error occurred; error is the exception message or None
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+
+    workers = max(1, min(int(max_workers), len(jobs)))
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(size=workers)
+    if limiter is None:
+        limiter = HostRateLimiter(requests_per_second)
+
+    def work(ticker, yq):
+        url = transcript_url(ticker, yq)
+        limiter.wait(url)
+        try:
+            with pool.driver() as driver:
+                return ticker, yq, fetch_transcript(url, driver), None
+        except Exception as e:
+            return ticker, yq, None, str(e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(work, t, yq) for t, yq in jobs]
+            for fut in as_completed(futures):
+                yield fut.result()
+    finally:
+        if own_pool:
+            pool.close()
 
 
 def get_year_quarters_from_dates(start_date: pd.Timestamp, end_date: pd.Timestamp):
@@ -86,109 +320,378 @@ def get_year_quarters_from_dates(start_date: pd.Timestamp, end_date: pd.Timestam
     return year_quarters
 
 
-def scrape_ticker(ticker: str, start_date: pd.Timestamp, end_date: pd.Timestamp):
+def load_scraped(ticker: str, include_text: bool = True) -> pd.DataFrame:
+    """
+    Load a ticker's scraped transcripts from the store (reading only its partitions), or an
+    empty frame with the expected columns. Per-ticker CSVs of the old layout are migrated first.
+
+    Inputs:
+    ticker (str): ticker symbol
+    include_text (bool): with False only the call metadata is read
+    """
+    store.ensure_migrated(BASE_PATH)
+    columns = None if include_text else ["ticker", "year_quarter", "date"]
+    return store.read_transcripts(tickers=[ticker], columns=columns)
+
+
+def save_new_transcripts(ticker: str, new_calls: list, existing: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Write newly scraped transcripts of a ticker to the store; quarters it already has are kept.
+
+    Inputs:
+    ticker (str): ticker symbol
+    new_calls (list[dict]): rows with year_quarter, earnings_call_raw_text, ticker, date
+    existing (pd.DataFrame): already loaded transcripts for the ticker (if None, their metadata is
+                             read from the store, without text)
+
+    Output:
+    combined (pd.DataFrame): all transcripts for the ticker
+    """
+    if existing is None:
+        existing = load_scraped(ticker, include_text=False)
+    if not new_calls:
+        return existing
+
+    new_df = pd.DataFrame(new_calls).drop_duplicates(subset=["ticker", "year_quarter"])
+    new_df = new_df[~new_df["year_quarter"].isin(set(existing["year_quarter"].astype(str)))]
+    if new_df.empty:
+        return existing
+
+    store.ensure_migrated(BASE_PATH)
+    store.write_transcripts(new_df)
+    print(f"Saved updated transcripts for {ticker}")
+
+    combined = pd.concat([existing, new_df], ignore_index=True) if not existing.empty else new_df
+    combined["date"] = pd.to_datetime(combined["date"], errors="coerce")
+    return combined.sort_values("date").reset_index(drop=True)
+
+
+def scrape_ticker(ticker: str, start_date: pd.Timestamp, end_date: pd.Timestamp,
+                  max_workers: int = MAX_WORKERS, pool=None, limiter: HostRateLimiter = None,
+                  index: TranscriptIndex = None, ledger=None):
     """
     This function incrementally scrape transcripts for a ticker.
-    - Loads existing CSV if available
-    - Finds only missing quarters in the requested range
-    - Scrapes & appends them
+    - Loads the ticker's transcripts from the store
+    - Finds only missing quarters in the requested range (and, with a ledger, only those due:
+      see ScrapeLedger.is_due)
+    - Drops quarters the transcript index rules out (when PROBE_BEFORE_SCRAPE)
+    - Scrapes them concurrently & appends them, recording each outcome in the ledger
 
     Inputs:
     ticker (str): ticker symbol
     start_date (pd.Timestamp): start date
     end_date (pd.Timestamp): end date
+    max_workers (int): number of concurrent browsers
+    pool (DriverPool): optional shared driver pool, so browsers survive across tickers
+    limiter (HostRateLimiter): optional rate limiter shared with other concurrent scrapes
+    index (TranscriptIndex): optional shared quarter index (one is made if PROBE_BEFORE_SCRAPE)
+    ledger (ScrapeLedger): optional job ledger shared with other scrapes, so pages without a
+                           transcript stay negative-cached and failed pages back off between runs
 
     Outputs:
     combined (pd.DataFrame): final combined df of all scraped data
     """
 
     year_quarters = get_year_quarters_from_dates(start_date, end_date)
-    ticker_dir = f"./earnings_calls/{ticker}/"
-    os.makedirs(ticker_dir, exist_ok=True)
-    file_path = f"{ticker_dir}scraped_earnings_calls.csv"
 
     # Load existing data if present
-    if os.path.exists(file_path):
-        existing = pd.read_csv(file_path)
-    else:
-        existing = pd.DataFrame(columns=["year_quarter", "earnings_call_raw_text", "ticker", "date"])
+    existing = load_scraped(ticker)
 
-    already_have = set(existing["year_quarter"].unique())
-    missing_quarters = [yq for yq in year_quarters if yq not in already_have]
+    if ledger is not None:
+        missing_quarters = [yq for _, yq in plan_scrape_jobs([ticker], start_date, end_date, ledger)]
+    else:
+        already_have = set(existing["year_quarter"].unique())
+        missing_quarters = [yq for yq in year_quarters if yq not in already_have]
 
     if not missing_quarters:
-        print(f"✅ All requested quarters for {ticker} already scraped.")
+        print(f"✅ All requested quarters for {ticker} already scraped"
+              f"{' or not due for a retry' if ledger is not None else ''}.")
         return existing
 
+    if index is None and PROBE_BEFORE_SCRAPE:
+        index = make_transcript_index(limiter)
+    if index is not None:
+        kept, skipped = index.filter_jobs([(ticker, yq) for yq in missing_quarters])
+        if skipped:
+            print(f"Skipping {len(skipped)} quarters for {ticker} without a transcript ({skipped[0][2]}, ...)")
+        if ledger is not None:
+            for _, yq, reason in skipped:
+                ledger.update(ticker, yq, "missing", f"probe: {reason}")
+        missing_quarters = [yq for _, yq in kept]
+        if not missing_quarters:
+            return existing
+
     print(f"Scraping {len(missing_quarters)} new transcripts for {ticker}...")
 
-    base_url = f"https://www.roic.ai/quote/{ticker}/transcripts/"
     new_calls = []
-    for yq in missing_quarters:
-        url = f"{base_url}{yq}"
-        txt = get_earnings_call_text(url)
+    jobs = [(ticker, yq) for yq in missing_quarters]
+    if ledger is not None:
+        for _, yq in jobs:
+            rec = ledger.get(ticker, yq)
+            if rec is None or rec["status"] != "pending":
+                ledger.update(ticker, yq, "pending")
+    for _, yq, txt, err in scrape_jobs(jobs, max_workers=max_workers, pool=pool, limiter=limiter):
         if txt:  # only add if scrape succeeded
-            new_calls.append({
-                "year_quarter": yq,
-                "earnings_call_raw_text": txt,
-                "ticker": ticker,
-                "date": parse_quarter(yq),
-            })
+            new_calls.append(_transcript_row(ticker, yq, txt))
+        elif err:
+            print(f"⚠️ Error scraping {transcript_url(ticker, yq)}: {err}")
+            if ledger is not None:
+                ledger.update(ticker, yq, "failed", err)
         else:
             print(f"⚠️ Skipped {ticker} {yq} (no transcript)")
+            if ledger is not None:
+                ledger.update(ticker, yq, "missing", "no transcript")
 
     if not new_calls:
         print(f"⚠️ No new transcripts successfully scraped for {ticker}.")
         return existing
 
-    new_df = pd.DataFrame(new_calls)
-    combined = pd.concat([existing, new_df], ignore_index=True)
-    combined["date"] = pd.to_datetime(combined["date"], errors="coerce")
+    combined = save_new_transcripts(ticker, new_calls, existing)
+    # Jobs are only done once their transcripts are on disk
+    if ledger is not None:
+        for row in new_calls:
+            ledger.update(ticker, row["year_quarter"], "done")
+    return combined
 
-    # Deduplicate just in case
-    combined = combined.drop_duplicates(subset=["ticker", "year_quarter"]).sort_values("date")
 
-    # Only write if something changed
-    if len(combined) > len(existing):
-        combined.to_csv(file_path, index=False)
-        print(f"Saved updated transcripts for {ticker}")
+def _transcript_row(ticker: str, year_quarter: str, text: str) -> dict:
+    return {
+        "year_quarter": year_quarter,
+        "earnings_call_raw_text": text,
+        "ticker": ticker,
+        "date": parse_quarter(year_quarter),
+    }
 
-    return combined
 
+class ScrapeLedger:
+    """
+    Small on-disk record of scrape job state, keyed by (ticker, year_quarter).
+
+    Every state change is appended as one JSON line, so a crash loses at most the line being
+    written; on load the last line per job wins. Each record holds:
+      - status: 'pending', 'done', 'failed' or 'missing' (page had no transcript)
+      - attempts: number of fetches that ended in 'failed' or 'missing'
+      - last_error: last error message, if any
+      - updated_at: unix time of the last change
+
+    Updates are thread-safe, so one ledger can be shared by concurrent scrapes.
+
+    Input:
+    path (str): ledger file location (JSON lines)
+    """
 
-def combine_all_calls(start_date=None, end_date=None):
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self.jobs = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash
+                    self.jobs[(rec["ticker"], rec["year_quarter"])] = rec
+
+    def get(self, ticker: str, year_quarter: str) -> dict:
+        return self.jobs.get((ticker, year_quarter))
+
+    def update(self, ticker: str, year_quarter: str, status: str, error: str = None):
+        """Record a new state for a job and append it to the ledger file."""
+        with self._lock:
+            prev = self.jobs.get((ticker, year_quarter), {})
+            attempts = prev.get("attempts", 0) + (status in ("failed", "missing"))
+            rec = {
+                "ticker": ticker,
+                "year_quarter": year_quarter,
+                "status": status,
+                "attempts": attempts,
+                "last_error": error if error is not None else prev.get("last_error"),
+                "updated_at": time.time(),
+            }
+            self.jobs[(ticker, year_quarter)] = rec
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        return rec
+
+    def is_due(self, ticker: str, year_quarter: str, now: float = None) -> bool:
+        """
+        Whether a job should be (re)tried now.
+        - failed jobs back off exponentially and give up after RETRY_MAX_ATTEMPTS
+        - missing pages are negative-cached for MISSING_TTL_DAYS
+        """
+        rec = self.get(ticker, year_quarter)
+        if rec is None or rec["status"] == "pending":
+            return True
+        now = time.time() if now is None else now
+        if rec["status"] == "failed":
+            if rec["attempts"] >= RETRY_MAX_ATTEMPTS:
+                return False
+            delay = min(RETRY_BASE_SECONDS * 2 ** (rec["attempts"] - 1), RETRY_MAX_SECONDS)
+            return now >= rec["updated_at"] + delay
+        if rec["status"] == "missing":
+            return now >= rec["updated_at"] + MISSING_TTL_DAYS * 86400
+        return False
+
+    def compact(self):
+        """Rewrite the ledger with one line per job (atomic replace)."""
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for rec in self.jobs.values():
+                    f.write(json.dumps(rec) + "\n")
+            os.replace(tmp, self.path)
+
+    def summary(self) -> dict:
+        """Count of jobs per status."""
+        counts = {}
+        for rec in self.jobs.values():
+            counts[rec["status"]] = counts.get(rec["status"], 0) + 1
+        return counts
+
+
+def plan_scrape_jobs(tickers, start_date: pd.Timestamp, end_date: pd.Timestamp, ledger: ScrapeLedger):
     """
-    Combine all per-ticker scraped earnings calls into one DataFrame.
-    Optionally filter by date range.
+    Plan every (ticker, year_quarter) job missing from the store and due per the ledger.
+
+    Inputs:
+    tickers (list[str]): ticker symbols
+    start_date (pd.Timestamp): start date
+    end_date (pd.Timestamp): end date
+    ledger (ScrapeLedger): job ledger
+
+    Output:
+    jobs (list[tuple[str, str]]): (ticker, year_quarter) pairs to scrape, grouped by ticker
+    """
+    year_quarters = get_year_quarters_from_dates(pd.Timestamp(start_date), pd.Timestamp(end_date))
+    tickers = list(tickers)
+    # One metadata-only read of the requested tickers' partitions (no transcript text)
+    store.ensure_migrated(BASE_PATH)
+    scraped = store.read_transcripts(tickers=tickers, columns=["ticker", "year_quarter", "date"])
+    have = set(zip(scraped["ticker"].astype(str), scraped["year_quarter"].astype(str)))
+    now = time.time()
+    jobs = []
+    for ticker in tickers:
+        for yq in year_quarters:
+            if (ticker, yq) in have:
+                continue
+            if ledger.is_due(ticker, yq, now):
+                jobs.append((ticker, yq))
+    return jobs
+
+
+def scrape_universe(tickers, start_date: pd.Timestamp, end_date: pd.Timestamp,
+                    max_workers: int = MAX_WORKERS, requests_per_second: float = REQUESTS_PER_SECOND,
+                    ledger_path: str = LEDGER_PATH, flush_every: int = FLUSH_EVERY, probe: bool = None):
+    """
+    Scrape every missing quarter for a universe of tickers through one worker pool.
+
+    All jobs are planned up front and recorded as pending in the ledger. A job is only marked
+    done after its transcript is written to the store, so an interrupted run resumes
+    exactly where it stopped. Failed jobs back off between runs and pages without a transcript
+    are negative-cached (see ScrapeLedger.is_due). With `probe`, jobs the transcript index rules
+    out over plain HTTP are recorded as missing without starting a browser.
+
+    Inputs:
+    tickers (list[str]): ticker symbols
+    start_date (pd.Timestamp): start date
+    end_date (pd.Timestamp): end date
+    max_workers (int): number of concurrent browsers
+    requests_per_second (float): per-host rate limit
+    ledger_path (str): location of the job ledger
+    flush_every (int): max transcripts buffered per ticker before writing them to the store
+    probe (bool): pre-check jobs with the transcript index (default PROBE_BEFORE_SCRAPE)
+
+    Output:
+    summary (dict): count of ledger jobs per status after the run
+    """
+    ledger = ScrapeLedger(ledger_path)
+    jobs = plan_scrape_jobs(tickers, start_date, end_date, ledger)
+    limiter = HostRateLimiter(requests_per_second)
+    if jobs and (PROBE_BEFORE_SCRAPE if probe is None else probe):
+        jobs, skipped = make_transcript_index(limiter).filter_jobs(jobs)
+        for ticker, yq, reason in skipped:
+            ledger.update(ticker, yq, "missing", f"probe: {reason}")
+        if skipped:
+            print(f"Probe ruled out {len(skipped)} jobs without a transcript; {len(jobs)} left to scrape.")
+    if not jobs:
+        print("✅ No scrape jobs due: every requested quarter is scraped, negative-cached or backing off.")
+        return ledger.summary()
+
+    for ticker, yq in jobs:
+        rec = ledger.get(ticker, yq)
+        if rec is None or rec["status"] != "pending":
+            ledger.update(ticker, yq, "pending")
+    print(f"Scraping {len(jobs)} transcripts across {len({t for t, _ in jobs})} tickers...")
+
+    remaining = {}
+    for ticker, _ in jobs:
+        remaining[ticker] = remaining.get(ticker, 0) + 1
+    buffers = {ticker: [] for ticker in remaining}
+
+    def flush(ticker):
+        rows = buffers[ticker]
+        if not rows:
+            return
+        save_new_transcripts(ticker, rows)
+        for row in rows:
+            ledger.update(ticker, row["year_quarter"], "done")
+        buffers[ticker] = []
+
+    try:
+        for ticker, yq, txt, err in scrape_jobs(jobs, max_workers=max_workers, limiter=limiter):
+            remaining[ticker] -= 1
+            if txt:
+                buffers[ticker].append(_transcript_row(ticker, yq, txt))
+            elif err:
+                print(f"⚠️ Error scraping {ticker} {yq}: {err}")
+                ledger.update(ticker, yq, "failed", err)
+            else:
+                ledger.update(ticker, yq, "missing", "no transcript")
+
+            if remaining[ticker] == 0 or len(buffers[ticker]) >= flush_every:
+                flush(ticker)
+    finally:
+        # Persist whatever finished before an interruption
+        for ticker in buffers:
+            flush(ticker)
+        ledger.compact()
+
+    summary = ledger.summary()
+    print(f"Scrape complete: {summary}")
+    return summary
+
+
+def combine_all_calls(start_date=None, end_date=None, tickers=None, include_text: bool = True):
+    """
+    Combine all scraped earnings calls into one DataFrame.
+    Reads from the partitioned store (migrating the per-ticker CSVs on first use), so only
+    the matching ticker/year partitions are scanned.
+    Optionally filter by date range and tickers.
 
     Inputs:
     start_date
     end_date
+    tickers (list[str]): optional subset of tickers
+    include_text (bool): load the transcripts and write all_calls.csv; with False only the call
+                         metadata is read (analyze_sentiment then streams transcripts from the store)
 
     Output:
     all_calls (pd.DataFrame): df containing all earnings calls
     """
 
-    files = glob.glob("earnings_calls/*/scraped_earnings_calls.csv")
-    dfs = []
-    for f in files:
-        df = pd.read_csv(f)
-        if "date" not in df:
-            continue
-        df['date'] = pd.to_datetime(df['date'])
-        dfs.append(df)
-
-    if not dfs:
+    store.ensure_migrated(BASE_PATH)
+    columns = None if include_text else ["ticker", "year_quarter", "date"]
+    all_calls = store.read_transcripts(tickers=tickers, start_date=start_date, end_date=end_date, columns=columns)
+    if all_calls.empty:
         return pd.DataFrame()
 
-    all_calls = pd.concat(dfs, ignore_index=True)
     all_calls = all_calls.drop_duplicates(subset=["ticker", "year_quarter"]).sort_values(['ticker', 'date']).reset_index(drop=True)
 
-    if start_date:
-        all_calls = all_calls[all_calls['date'] >= pd.Timestamp(start_date)]
-    if end_date:
-        all_calls = all_calls[all_calls['date'] <= pd.Timestamp(end_date)]
+    if not include_text:
+        return all_calls
 
-    all_calls.to_csv("all_calls.csv", index=False)
+    with telemetry.timer("csv_write", path="all_calls.csv", rows=len(all_calls)):
+        all_calls.to_csv("all_calls.csv", index=False)
 
     return all_calls
@@ -0,0 +1,77 @@
+import re
+
+
+# Lines of page chrome that roic.ai (and most transcript sites) render around the transcript
+BOILERPLATE_PATTERNS = [
+    r"^(sign in|log in|sign up|subscribe|upgrade|get started|menu|search|home|back to top)\s*$",
+    r"^(share|tweet|print|download|copy link|listen|play|pause|advertisement)\s*$",
+    r"^(previous|next)\s+(quarter|transcript|call)\b.{0,40}$",
+    r"^.*\b(privacy policy|terms of (use|service)|all rights reserved|we use cookies|cookie (policy|settings))\b.*$",
+    r"^(©|copyright\b).*$",
+]
+
+# Phrases that open the Q&A session
+QA_MARKERS = [
+    r"question[- ]and[- ]answer session",
+    r"questions?[- ]and[- ]answers?\b",
+    r"^\s*q\s*&\s*a\b",
+    r"(open|turn)(ing)? (up )?the (call|line|lines|floor) (up )?(for|to) (your )?questions",
+    r"(begin|start|move to|proceed with|now take) (the |our )?(question|q&a)",
+    r"(our|your|the) first question (comes|is|will come) from",
+]
+
+MIN_SECTION_CHARS = 500   # shorter sections are treated as missing (marker false positive)
+QA_MIN_OFFSET = 0.15      # markers in the first 15% of a call are the operator's agenda, not the Q&A
+
+_boilerplate = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE_PATTERNS), re.IGNORECASE)
+_qa_markers = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in QA_MARKERS]
+
+
+def clean_transcript(text: str) -> str:
+    """
+    Remove page boilerplate from a scraped transcript: navigation, legal and sharing lines, and
+    runs of blank lines. Speaker lines are kept even though they repeat.
+
+    Input:
+    text (str): transcript text as scraped
+
+    Output: cleaned transcript text
+    """
+    if not text:
+        return ""
+    kept = []
+    for line in str(text).splitlines():
+        line = line.strip()
+        if not line:
+            if kept and kept[-1]:
+                kept.append("")
+            continue
+        if _boilerplate.match(line):
+            continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def split_sections(text: str) -> dict:
+    """
+    Split a transcript into prepared remarks and Q&A at the first Q&A marker past the opening
+    agenda (the first QA_MIN_OFFSET of the text, where the operator announces the Q&A).
+
+    Input:
+    text (str): transcript text (ideally cleaned)
+
+    Output:
+    sections (dict): {"prepared": str, "qa": str}; "qa" is empty when no Q&A session is found
+    (or either side would be shorter than MIN_SECTION_CHARS)
+    """
+    text = text or ""
+    offset = int(len(text) * QA_MIN_OFFSET)
+    starts = [m.start() for m in (p.search(text, offset) for p in _qa_markers) if m is not None]
+    if starts:
+        cut = min(starts)
+        # Start the Q&A at the beginning of the marker's line
+        cut = text.rfind("\n", 0, cut) + 1
+        prepared, qa = text[:cut].strip(), text[cut:].strip()
+        if len(prepared) >= MIN_SECTION_CHARS and len(qa) >= MIN_SECTION_CHARS:
+            return {"prepared": prepared, "qa": qa}
+    return {"prepared": text.strip(), "qa": ""}
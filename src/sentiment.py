@@ -1,9 +1,19 @@
 import os
 import json
+import random
+import threading
+import uuid
 import pandas as pd
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from openai import OpenAI
 from typing import List
+from llm_cache import ResponseCache, request_key
+from batch import write_batch_requests, read_batch_results
+from progress_log import ProgressLog
+from sections import clean_transcript, split_sections
+import store
+import telemetry
 
 
 api_key = os.getenv("OPENAI_API_KEY")
@@ -13,9 +23,35 @@ ROOT_PROGRESS_PATH = "all_calls_progress.csv"
 
 MODEL = "gpt-5-nano"
 MAX_OUTPUT_TOKENS = 500
+# USD per million tokens (input, output), for the cost estimates in telemetry
+TOKEN_PRICES = {"gpt-5-nano": (0.05, 0.40)}
 CHAR_CAP = 80_000
+# Score prepared remarks and Q&A with separate, smaller prompts. Off by default: the signal
+# z-scores each call against the ticker's earlier calls, and processed calls are not rescored,
+# so switching methods on an existing store mixes the two in that history. Turn it on for a
+# fresh store (or after clearing the processed rows).
+SECTIONED_SCORING = False
+SECTION_CHAR_CAP = 40_000     # per-section cap when sectioned
 SAVE_EVERY = 20  # save frequently, but smaller than before for safety
 
+# Concurrency & rate limits
+MAX_CONCURRENCY = 8           # LLM requests kept in flight
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 2_000_000
+BACKOFF_BASE = 1.0            # seconds; retry delays are drawn from [0, BACKOFF_BASE * 2**attempt]
+BACKOFF_CAP = 30.0
+
+# Persistent response cache (shared across tickers, runs and notebooks)
+USE_RESPONSE_CACHE = True
+RESPONSE_CACHE_PATH = "llm_cache.sqlite"
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+# Offline batch mode
+BATCH_DIR = "batches"
+BATCH_POLL_SECONDS = 60
+
 PROMPT_HEADER = """I will provide the transcript of an earnings call. Your job is to analyze the text only based on what is actually present in the transcript. For each of the following categories, assign a score between -1 and 1:
 
 forward_looking_sentiment: How positive or negative is the company’s outlook or projections for the future?
@@ -42,6 +78,62 @@ Do not include any text or explanation—only return the JSON object. Do not gue
 
 Transcript:"""
 
+# Categories scored on each section; a category scored on both is averaged
+SECTION_FIELDS = {
+    "prepared": [
+        "forward_looking_sentiment",
+        "management_confidence",
+        "risk_and_uncertainty",
+        "opening_sentiment",
+        "financial_performance_sentiment",
+        "macroeconomic_reference_sentiment",
+    ],
+    "qa": [
+        "qa_sentiment",
+        "management_confidence",
+        "risk_and_uncertainty",
+    ],
+}
+SECTION_LABELS = {"prepared": "prepared remarks", "qa": "question-and-answer session"}
+
+SECTION_PROMPT_TEMPLATE = """I will provide the {label} of an earnings call. Your job is to analyze the text only based on what is actually present in it. For each of the following categories, assign a score between -1 and 1:
+
+{categories}
+
+If a category is not addressed clearly in the text, return exactly 0 for that category.
+
+Use the following format for your output:
+{{
+{fields}
+}}
+Do not include any text or explanation—only return the JSON object. Do not guess or infer information that is not directly stated in the text.
+
+{title}:"""
+
+
+def build_section_prompt(section: str, text: str) -> str:
+    """
+    Prompt scoring one section of a transcript on that section's SECTION_FIELDS only
+    (category descriptions are those of PROMPT_HEADER).
+
+    Inputs:
+    section (str): "prepared" or "qa"
+    text (str): section text
+
+    Output: formatted prompt
+    """
+    descriptions = dict(line.split(": ", 1) for line in PROMPT_HEADER.splitlines()
+                        if line.split(":", 1)[0] in SECTION_FIELDS[section])
+    label = SECTION_LABELS[section]
+    header = SECTION_PROMPT_TEMPLATE.format(
+        label=label,
+        categories="\n".join(f"{c}: {descriptions[c]}" for c in SECTION_FIELDS[section]),
+        fields=",\n".join(f'  "{c}": ___' for c in SECTION_FIELDS[section]),
+        title=label[0].upper() + label[1:],
+    )
+    return f"{header}\n{(text or '')[:SECTION_CHAR_CAP]}"
+
+
 def build_prompt(transcript: str) -> str:
     """
     This function takes the earnings call transcript as input and returns the final prompt
@@ -55,32 +147,190 @@ def build_prompt(transcript: str) -> str:
     return f"{PROMPT_HEADER}\n{(transcript or '')[:CHAR_CAP]}"
 
 
-def call_gpt_nano(prompt: str, max_retries: int = 5):
+def transcript_prompts(transcript: str) -> dict:
+    """
+    Prompts needed to score one transcript. With SECTIONED_SCORING, the transcript is cleaned of
+    page boilerplate and split into prepared remarks and Q&A, each scored by its own smaller
+    prompt; a transcript without a recognizable Q&A session gets one full prompt.
+
+    Input:
+    transcript (str): earnings call transcript string
+
+    Output:
+    prompts (dict): section ("prepared", "qa" or "full") -> prompt
+    """
+    if not SECTIONED_SCORING:
+        return {"full": build_prompt(transcript)}
+    text = clean_transcript(transcript)
+    parts = split_sections(text)
+    if not parts["qa"]:
+        return {"full": build_prompt(text)}
+    return {section: build_section_prompt(section, parts[section]) for section in SECTION_FIELDS}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    Inputs:
+    rate_per_minute (float): refill rate; None or 0 disables the bucket
+    capacity (float): burst size (defaults to one minute of tokens)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = (rate_per_minute or 0) / 60.0
+        self.capacity = capacity if capacity is not None else (rate_per_minute or 0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        """Block until `amount` tokens are available and take them."""
+        if not self.rate:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Requests/minute and tokens/minute limits shared by every worker.
+
+    Inputs:
+    requests_per_minute (float): request budget
+    tokens_per_minute (float): token budget (prompt estimate + max output tokens per request)
+    """
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE, tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int):
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough token budget for a request: ~4 characters per input token plus the output cap."""
+    return len(prompt) // 4 + MAX_OUTPUT_TOKENS
+
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)]."""
+    base = BACKOFF_BASE if base is None else base
+    cap = BACKOFF_CAP if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def get_response_cache() -> ResponseCache:
+    """Open the module-level response cache on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(RESPONSE_CACHE_PATH, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+    return _response_cache
+
+
+def request_params(prompt: str) -> dict:
+    """
+    Keyword arguments of the `responses.create` request for a prompt.
+
+    Input:
+    prompt (str): prompt to send to the LLM
+    """
+    return {
+        "model": MODEL,
+        "input": prompt,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+        "reasoning": {"effort": "low"},
+        "text": {"format": {"type": "json_object"}, "verbosity": "low"},
+    }
+
+
+def prompt_key(prompt: str) -> str:
+    """Cache key of the request for a prompt: changes whenever the model, prompt or settings change."""
+    return request_key(request_params(prompt))
+
+
+def prompts_key(prompts: dict) -> str:
+    """Key of a transcript's requests (see transcript_prompts): the prompt key, or a key over all section keys."""
+    if list(prompts) == ["full"]:
+        return prompt_key(prompts["full"])
+    return request_key({section: prompt_key(p) for section, p in prompts.items()})
+
+
+def estimate_cost(input_tokens: int, output_tokens: int, model: str = None) -> float:
+    """Estimated USD cost of a request from its token usage (0 for a model missing from TOKEN_PRICES)."""
+    price_in, price_out = TOKEN_PRICES.get(model or MODEL, (0.0, 0.0))
+    return (input_tokens * price_in + output_tokens * price_out) / 1e6
+
+
+def call_gpt_nano(prompt: str, max_retries: int = 5, llm_client=None, limiter: RateLimiter = None,
+                  cache: ResponseCache = None):
     """
     This function submits a GPT-5-nano request to analyze the sentiment of the earnings call. 
-    The request is submitted a max_retries number of times with exponential delays.
+    The response cache is checked first, so an identical request is never paid for twice; only
+    responses that parse as JSON are cached. The shared module cache only holds responses of the
+    module client: with another `llm_client` (a fake or test client) it is bypassed unless a
+    cache is passed explicitly.
+    The request is submitted a max_retries number of times with jittered exponential backoff.
+    Each call is recorded as an "llm_call" telemetry event with its retries, rate-limit wait,
+    token usage and estimated cost.
 
     Inputs:
     prompt (str): prompt to send to the LLM
     max_retries (int): maximum number of times to retry the OpenAI request
+    llm_client: object exposing `responses.create` (defaults to the module OpenAI client)
+    limiter (RateLimiter): optional shared rate limiter, acquired before every attempt
+    cache (ResponseCache): response cache (defaults to the module cache if USE_RESPONSE_CACHE
+                           and no llm_client is given)
     """
 
-    delays = [1, 2, 5, 10, 20]
-    for attempt in range(max_retries):
-        try:
-            resp = client.responses.create(
-                model=MODEL,
-                input=prompt,
-                max_output_tokens=MAX_OUTPUT_TOKENS,
-                reasoning={"effort": "low"},
-                text={"format": {"type": "json_object"}, "verbosity": "low"},
-            )
-            return resp.output_text.strip()
-        except Exception as e:
-            print(f"⚠️ OpenAI call failed (attempt {attempt+1}): {e}")
-            if attempt == max_retries - 1:
-                return None
-            time.sleep(delays[min(attempt, len(delays)-1)])
+    api = llm_client or client
+    params = request_params(prompt)
+    if cache is None and USE_RESPONSE_CACHE and llm_client is None:
+        cache = get_response_cache()
+    key = request_key(params) if cache is not None else None
+    if cache is not None:
+        with telemetry.timer("llm_cache_lookup") as ev:
+            cached = cache.get(key)
+            ev["hits"] = int(cached is not None)
+        if cached is not None:
+            return cached
+
+    with telemetry.timer("llm_call", model=MODEL, retries=0, wait_seconds=0.0) as ev:
+        for attempt in range(max_retries):
+            ev["retries"] = attempt
+            if limiter is not None:
+                t0 = time.perf_counter()
+                limiter.acquire(estimate_tokens(prompt))
+                ev["wait_seconds"] += time.perf_counter() - t0
+            try:
+                resp = api.responses.create(**params)
+                txt = resp.output_text.strip()
+                usage = getattr(resp, "usage", None)
+                if usage is not None:
+                    ev["input_tokens"] = getattr(usage, "input_tokens", 0) or 0
+                    ev["output_tokens"] = getattr(usage, "output_tokens", 0) or 0
+                    ev["cost_usd"] = estimate_cost(ev["input_tokens"], ev["output_tokens"])
+                if cache is not None and safe_json_load(txt):
+                    cache.put(key, txt)
+                return txt
+            except Exception as e:
+                print(f"⚠️ OpenAI call failed (attempt {attempt+1}): {e}")
+                if attempt == max_retries - 1:
+                    ev["failed"] = 1
+                    return None
+                time.sleep(backoff_delay(attempt))
 
 
 def safe_json_load(s: str):
@@ -111,164 +361,373 @@ def _result_cols() -> List[str]:
     Output: list of sentiment result columns
     """
 
-    return [
-        "forward_looking_sentiment",
-        "management_confidence",
-        "risk_and_uncertainty",
-        "qa_sentiment",
-        "opening_sentiment",
-        "financial_performance_sentiment",
-        "macroeconomic_reference_sentiment",
-    ]
+    return list(store.SCORE_COLUMNS)
+
+def merge_section_outputs(outputs: dict):
+    """
+    Merge the raw LLM outputs of a transcript's sections into one JSON result: each category
+    takes the mean of the sections that scored it (SECTION_FIELDS), and the parsed section
+    results are kept under "sections".
+
+    Input:
+    outputs (dict): section -> raw output text (None if the request failed)
+
+    Output: merged JSON text (the raw output for a single "full" prompt; None if any section failed)
+    """
+    if list(outputs) == ["full"]:
+        return outputs["full"]
+    if any(not txt for txt in outputs.values()):
+        return None
+    parsed = {section: safe_json_load(txt) for section, txt in outputs.items()}
+    merged = {}
+    for c in _result_cols():
+        values = []
+        for section, result in parsed.items():
+            if c in SECTION_FIELDS.get(section, []):
+                try:
+                    values.append(float(result[c]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        merged[c] = sum(values) / len(values) if values else None
+    merged["sections"] = parsed
+    return json.dumps(merged)
+
+
+def _load_processed(tickers: list) -> dict:
+    """
+    Processed rows (no transcripts) of each ticker, from one read of their store partitions.
+
+    Output:
+    procs (dict): ticker -> processed rows (an empty frame with the expected columns if none)
+    """
+    store.ensure_migrated()
+    rows = store.read_scores(tickers=tickers)
+    if not rows.empty:
+        rows["date"] = pd.to_datetime(rows["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+        rows["year_quarter"] = rows["year_quarter"].astype(str)
+    empty = pd.DataFrame(columns=["date", "ticker", "year_quarter", "url", "analysis_json", "prompt_key"] + _result_cols())
+    groups = dict(tuple(rows.groupby("ticker"))) if not rows.empty else {}
+    return {t: groups[t].reset_index(drop=True) if t in groups else empty.copy() for t in tickers}
+
+
+def _save_processed(ticker: str, proc: pd.DataFrame, new_entries: list) -> pd.DataFrame:
+    """Write new entries of a ticker to the store and merge them into its processed rows. Returns the merged frame."""
+    if new_entries:
+        new_df = pd.DataFrame(new_entries)
+        proc = pd.concat([proc, new_df], ignore_index=True) if not proc.empty else new_df
+        store.ensure_migrated()
+        store.write_scores(new_df)
+    if not proc.empty:
+        proc = proc.drop_duplicates(subset=["ticker", "year_quarter", "date"]).sort_values(["ticker", "date"])
+    return proc
+
+
+def _make_entry(row: dict, txt: str, key: str = None) -> dict:
+    """Build a processed row from a call's metadata, the raw LLM output and its request key."""
+    parsed = safe_json_load(txt)
+    entry = {
+        "date": row["date"],
+        "ticker": row["ticker"],
+        "year_quarter": row["year_quarter"],
+        "url": row.get("url", ""),
+        "analysis_json": txt,
+        "prompt_key": key,
+    }
+    for c in _result_cols():
+        entry[c] = parsed.get(c, None)
+    return entry
+
+
+def _row_text(row: dict):
+    """Transcript text carried by a job row."""
+    return row.get("earnings_call_raw_text")
+
+
+def _load_prompts(row: dict, load_text) -> dict:
+    """Load a call's transcript and build its prompts, or None (with a warning) if it has no transcript."""
+    text = load_text(row)
+    if not isinstance(text, str) or not text.strip():
+        print(f"⚠️ Skipping {row['ticker']} {row['year_quarter']} ({row['date']}) — empty transcript.")
+        return None
+    return transcript_prompts(text)
+
+
+def _score_online(jobs: list, max_concurrency: int, llm_client=None, limiter: RateLimiter = None, load_text=None):
+    """
+    Score rows through the thread pool, yielding processed entries as they complete. Every
+    section prompt is its own request, so the sections of one call are scored concurrently.
+    Transcripts are loaded and prompts built only as calls are submitted, at most
+    2 x max_concurrency calls ahead of the results, so memory does not grow with the job list.
+    """
+    if limiter is None:
+        limiter = RateLimiter()
+    load_text = load_text or _row_text
+    window = 2 * max(1, int(max_concurrency))
+    with ThreadPoolExecutor(max_workers=max(1, int(max_concurrency))) as ex:
+        futures = {}
+        calls = {}
+        rows = iter(enumerate(jobs))
+
+        def fill():
+            # Submit calls until the window is full or the jobs run out
+            while len(calls) < window:
+                for i, row in rows:
+                    prompts = _load_prompts(row, load_text)
+                    if prompts is not None:
+                        break
+                else:
+                    return
+                calls[i] = {"row": row, "key": prompts_key(prompts), "n": len(prompts), "outputs": {}}
+                for section, prompt in prompts.items():
+                    fut = ex.submit(call_gpt_nano, prompt, llm_client=llm_client, limiter=limiter)
+                    futures[fut] = (i, section)
+
+        fill()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i, section = futures.pop(fut)
+                call = calls[i]
+                call["outputs"][section] = fut.result()
+                if len(call["outputs"]) == call["n"]:
+                    del calls[i]
+                    yield _make_entry(call["row"], merge_section_outputs(call["outputs"]), call["key"])
+            fill()
+
+
+def custom_id(row: dict, section: str = None) -> str:
+    """Batch request id of a call: '{ticker}|{year_quarter}|{date}', plus '|{section}' for a section prompt."""
+    cid = f"{row['ticker']}|{row['year_quarter']}|{row['date']}"
+    return cid if section in (None, "full") else f"{cid}|{section}"
+
+
+def _score_batch(jobs: list, submitter, poll_interval: float = None, load_text=None):
+    """
+    Score rows through an offline batch: cached prompts are answered immediately, the rest are
+    streamed to a JSONL request file (one transcript in memory at a time), handed to
+    `submitter`, and merged back by custom_id once the result file is available. Yields
+    processed entries.
+    """
+    # Answers of a local batch backend (fake client) are kept out of the shared response cache
+    cache = get_response_cache() if USE_RESPONSE_CACHE and getattr(submitter, "shared_cache", True) else None
+    load_text = load_text or _row_text
+    pending = {}      # custom_id -> (call index, section, key)
+    calls = []        # calls waiting on batch outputs (metadata and outputs only)
+    ready = []        # entries answered entirely from the cache
+
+    def requests():
+        for row in jobs:
+            prompts = _load_prompts(row, load_text)
+            if prompts is None:
+                continue
+            call = {"row": row, "key": prompts_key(prompts), "outputs": {}}
+            for section, prompt in prompts.items():
+                key = prompt_key(prompt)
+                cached = cache.get(key) if cache is not None else None
+                if cached is not None:
+                    call["outputs"][section] = cached
+                else:
+                    cid = custom_id(row, section)
+                    pending[cid] = (len(calls), section, key)
+                    yield cid, request_params(prompt)
+            if len(call["outputs"]) == len(prompts):
+                ready.append(_make_entry(row, merge_section_outputs(call["outputs"]), call["key"]))
+            else:
+                calls.append(call)
+
+    request_path = os.path.join(BATCH_DIR, f"requests_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.jsonl")
+    n = write_batch_requests(requests(), request_path)
+    yield from ready
+    if not pending:
+        os.remove(request_path)
+        return
 
-def analyze_sentiment(all_calls: pd.DataFrame) -> pd.DataFrame:
+    batch_id = submitter.submit(request_path)
+    print(f"Submitted batch {batch_id} with {n} requests ({request_path}); waiting for results...")
+
+    result_path = submitter.wait(batch_id, poll_interval=BATCH_POLL_SECONDS if poll_interval is None else poll_interval)
+    results = read_batch_results(result_path)
+
+    failed = set()
+    for cid, (i, section, key) in pending.items():
+        txt = results.get(cid)
+        if txt is None:
+            # Leave failed / missing requests unprocessed so the next run resubmits them
+            failed.add(i)
+            continue
+        txt = txt.strip()
+        if cache is not None and safe_json_load(txt):
+            cache.put(key, txt)
+        calls[i]["outputs"][section] = txt
+    for i, call in enumerate(calls):
+        if i not in failed:
+            yield _make_entry(call["row"], merge_section_outputs(call["outputs"]), call["key"])
+    if failed:
+        print(f"⚠️ {len(failed)} calls had batch requests fail or go missing from {result_path}; they will be retried next run.")
+
+
+def analyze_sentiment(all_calls: pd.DataFrame, max_concurrency: int = MAX_CONCURRENCY,
+                      llm_client=None, limiter: RateLimiter = None,
+                      mode: str = "online", submitter=None, poll_interval: float = None,
+                      progress: ProgressLog = None, compact: bool = True,
+                      transcripts: store.TranscriptReader = None) -> pd.DataFrame:
     """
     Incrementally analyze sentiment for a combined DataFrame of transcripts.
 
+    In "online" mode, unprocessed calls across all tickers are scored by a thread pool that keeps
+    up to `max_concurrency` requests in flight, subject to a shared requests/tokens-per-minute
+    limiter. In "batch" mode, all pending prompts are written to a JSONL request file under
+    BATCH_DIR and handed to `submitter` (see batch.BatchSubmitter); outputs are merged back by
+    custom_id. Either way, results stream into the scores dataset of the store.
+
     Expected columns in `all_calls`:
       - ticker (str)
       - date (datetime-like or str)
       - year_quarter (str like '2023-year/1-quarter')
-      - earnings_call_raw_text (str transcript)
+      - earnings_call_raw_text (str transcript), optional: without it, transcripts are read
+        lazily from the store (see store.TranscriptReader) one call at a time as prompts are
+        built, so only metadata is held for the whole universe
+
+    The transcript column is never copied; only as many transcripts as there are calls in
+    flight are loaded and turned into prompts at once.
 
     Side effects:
-      - Writes per-ticker processed files at: earnings_calls/{ticker}/processed_earnings_calls.csv
-      - Writes/updates a global consolidated ROOT_PROGRESS_PATH 
+      - Upserts processed rows into the store's scores dataset (store.write_scores), which is
+        also where already processed calls are looked up (each row keeps the `prompt_key` of its request(s), so rows scored under an older
+        MODEL / PROMPT_HEADER / CHAR_CAP / sectioning or an older transcript can be identified)
+      - Appends new rows to the progress log at checkpoints and compacts it into the global
+        consolidated ROOT_PROGRESS_PATH at the end (see progress_log.ProgressLog)
+      - Reads/writes the response cache at RESPONSE_CACHE_PATH
     
-    Input:
+    Inputs:
     all_calls (pd.DataFrame): DataFrame containing all earnings calls transcripts to analyze sentiment for
+    max_concurrency (int): number of LLM requests in flight (1 = sequential)
+    llm_client: object exposing `responses.create` (defaults to the module OpenAI client)
+    limiter (RateLimiter): shared rate limiter (defaults to REQUESTS_PER_MINUTE / TOKENS_PER_MINUTE)
+    mode (str): "online" or "batch"
+    submitter (batch.BatchSubmitter): batch backend, required in batch mode
+    poll_interval (float): seconds between batch polls (defaults to BATCH_POLL_SECONDS)
+    progress (ProgressLog): progress log to append to (defaults to one on ROOT_PROGRESS_PATH)
+    compact (bool): compact the progress log into ROOT_PROGRESS_PATH at the end; callers running
+                    several analyses concurrently pass False and compact once themselves
+    transcripts (store.TranscriptReader): reader used when `all_calls` has no transcript column
 
     Output:
     consolidated_df (str): A consolidated DataFrame of processed rows (no transcripts)
     """
 
-    required = {"ticker", "date", "year_quarter", "earnings_call_raw_text"}
+    required = {"ticker", "date", "year_quarter"}
     missing = [c for c in required if c not in all_calls.columns]
     if missing:
         raise ValueError(f"analyze_sentiment: missing required columns: {missing}")
+    if mode not in ("online", "batch"):
+        raise ValueError(f"analyze_sentiment: unknown mode {mode!r}")
+    if mode == "batch" and submitter is None:
+        raise ValueError("analyze_sentiment: batch mode requires a submitter")
 
-    # Normalize types
-    df = all_calls.copy()
+    # Normalize types on a metadata-only frame (the transcript column is never copied)
+    df = all_calls[[c for c in ("ticker", "date", "year_quarter", "url") if c in all_calls.columns]].copy()
     df["ticker"] = df["ticker"].astype(str)
     df["year_quarter"] = df["year_quarter"].astype(str)
     df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
-
-    # Container to build the consolidated file at the end
-    consolidated_rows = []
-    total_new = 0
-    processed_since_save = 0
-
-    # Process per ticker to use per-ticker processed cache
+    if "url" not in df.columns:
+        df["url"] = ""
+
+    # Transcript bodies are looked up per call when its prompt is built
+    in_memory = "earnings_call_raw_text" in all_calls.columns
+    if in_memory:
+        texts = all_calls["earnings_call_raw_text"]
+        df["_pos"] = range(len(df))
+
+        def load_text(row):
+            return texts.iat[row["_pos"]]
+    else:
+        store.ensure_migrated()
+        reader = transcripts or store.TranscriptReader()
+
+        def load_text(row):
+            return reader.text(row["ticker"], row["year_quarter"], row["date"])
+
+    # Plan: load every ticker's processed rows and collect every unprocessed call
+    procs = _load_processed(sorted(df["ticker"].unique()))
+    jobs = []
     for ticker, tdf in df.groupby("ticker"):
-        ticker_dir = os.path.join("earnings_calls", ticker)
-        os.makedirs(ticker_dir, exist_ok=True)
-        processed_path = os.path.join(ticker_dir, "processed_earnings_calls.csv")
-
-        # Load existing processed (no transcripts)
-        if os.path.exists(processed_path):
-            proc = pd.read_csv(processed_path, dtype={"year_quarter": str})
-            if not proc.empty:
-                proc["date"] = pd.to_datetime(proc["date"], errors="coerce").dt.strftime("%Y-%m-%d")
-        else:
-            proc = pd.DataFrame(columns=["date", "ticker", "year_quarter", "url", "analysis_json"] + _result_cols())
+        proc = procs[ticker]
 
         # Keys that identify a call
         processed_keys = set(zip(proc.get("year_quarter", pd.Series(dtype=str)).astype(str),
                                  proc.get("date", pd.Series(dtype=str)).astype(str)))
 
-        # Prepare current ticker rows
-        tdf = tdf.copy()
-        tdf["url"] = tdf.get("url", "")
-
-        new_entries = []
-
-        for _, row in tdf.iterrows():
-            key = (row["year_quarter"], row["date"])
-            if key in processed_keys:
+        for row in tdf.to_dict(orient="records"):
+            if (row["year_quarter"], row["date"]) in processed_keys:
                 # already done; skip the API call
                 continue
 
-            text = row.get("earnings_call_raw_text")
-            if not isinstance(text, str) or not text.strip():
-                print(f"⚠️ Skipping {ticker} {row['year_quarter']} ({row['date']}) — empty transcript.")
-                continue
+            # Transcripts already in memory are checked now, lazily read ones when their prompt is built
+            if in_memory:
+                text = load_text(row)
+                if not isinstance(text, str) or not text.strip():
+                    print(f"⚠️ Skipping {ticker} {row['year_quarter']} ({row['date']}) — empty transcript.")
+                    continue
+            jobs.append(row)
+
+    # Score: stream results into per-ticker buffers as they complete
+    remaining = {}
+    for row in jobs:
+        remaining[row["ticker"]] = remaining.get(row["ticker"], 0) + 1
+    new_entries = {ticker: [] for ticker in remaining}
+    total_new = 0
+    processed_since_save = 0
 
-            prompt = build_prompt(text)
-            txt = call_gpt_nano(prompt)
-            parsed = safe_json_load(txt)
-
-            entry = {
-                "date": row["date"],
-                "ticker": ticker,
-                "year_quarter": row["year_quarter"],
-                "url": row.get("url", ""),
-                "analysis_json": txt,
-            }
-            for c in _result_cols():
-                entry[c] = parsed.get(c, None)
-
-            new_entries.append(entry)
+    # Checkpoints append only new rows to the progress log; the consolidated file is compacted at the end
+    if progress is None:
+        progress = ProgressLog(ROOT_PROGRESS_PATH)
+
+    def flush(ticker):
+        if new_entries[ticker]:
+            procs[ticker] = _save_processed(ticker, procs[ticker], new_entries[ticker])
+            progress.append(new_entries[ticker])
+            new_entries[ticker] = []
+
+    if mode == "batch":
+        entries = _score_batch(jobs, submitter, poll_interval, load_text)
+    else:
+        entries = _score_online(jobs, max_concurrency, llm_client, limiter, load_text)
+
+    if jobs:
+        for entry in entries:
+            ticker = entry["ticker"]
+            new_entries[ticker].append(entry)
+            remaining[ticker] -= 1
             total_new += 1
             processed_since_save += 1
 
+            if remaining[ticker] == 0:
+                flush(ticker)
+
             # Periodic save for safety
             if processed_since_save >= SAVE_EVERY:
-                if new_entries:
-                    proc = pd.concat([proc, pd.DataFrame(new_entries)], ignore_index=True)
-                    proc = proc.drop_duplicates(subset=["ticker", "year_quarter", "date"]).sort_values(["ticker", "date"])
-                    proc.to_csv(processed_path, index=False)
-                    new_entries.clear()
-
-                # Also refresh the global consolidated file
-                _write_global_progress(ROOT_PROGRESS_PATH)
+                for t in new_entries:
+                    flush(t)
                 processed_since_save = 0
 
-        # Final save for this ticker (append any remaining new entries)
-        if new_entries:
-            proc = pd.concat([proc, pd.DataFrame(new_entries)], ignore_index=True)
-
-        # Dedup & save per ticker
-        if not proc.empty:
-            proc = proc.drop_duplicates(subset=["ticker", "year_quarter", "date"]).sort_values(["ticker", "date"])
-            proc.to_csv(processed_path, index=False)
-
-        # After finishing this ticker, extend consolidated list with all rows from proc
-        consolidated_rows.extend(proc.to_dict(orient="records"))
+    # Dedup & save per ticker, then build the consolidated list with all rows
+    consolidated_rows = []
+    for ticker in procs:
+        if ticker in new_entries:
+            flush(ticker)
+        procs[ticker] = _save_processed(ticker, procs[ticker], [])
+        consolidated_rows.extend(procs[ticker].to_dict(orient="records"))
 
-    # Build and write consolidated global file
+    # Build consolidated results and compact them with the progress log into the global file
     consolidated_df = pd.DataFrame(consolidated_rows)
     if not consolidated_df.empty:
         consolidated_df = consolidated_df.drop_duplicates(subset=["ticker", "year_quarter", "date"]).sort_values(["ticker", "date"])
-        consolidated_df.to_csv(ROOT_PROGRESS_PATH, index=False)
+    if compact:
+        progress.compact(base=consolidated_df)
 
     print(f"Sentiment analysis complete. New calls processed: {total_new}")
     # Return consolidated results (no transcripts)
     return consolidated_df if not consolidated_df.empty else pd.DataFrame(
-        columns=["date", "ticker", "year_quarter", "url", "analysis_json"] + _result_cols()
+        columns=["date", "ticker", "year_quarter", "url", "analysis_json", "prompt_key"] + _result_cols()
     )
-
-
-def _write_global_progress(global_path: str):
-    """
-    Rebuild the global consolidated CSV from per-ticker processed files.
-
-    Input:
-    global_path (str): global progress file path
-    """
-    
-    rows = []
-    base = "earnings_calls"
-    if not os.path.isdir(base):
-        return
-    for ticker in os.listdir(base):
-        p = os.path.join(base, ticker, "processed_earnings_calls.csv")
-        if os.path.exists(p):
-            dfp = pd.read_csv(p, dtype={"year_quarter": str})
-            if not dfp.empty:
-                dfp["date"] = pd.to_datetime(dfp["date"], errors="coerce").dt.strftime("%Y-%m-%d")
-                rows.append(dfp)
-    if not rows:
-        return
-    out = pd.concat(rows, ignore_index=True)
-    out = out.drop_duplicates(subset=["ticker", "year_quarter", "date"]).sort_values(["ticker", "date"])
-    out.to_csv(global_path, index=False)
\ No newline at end of file
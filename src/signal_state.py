@@ -0,0 +1,206 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import factors
+import strategy
+from prices import load_prices
+
+
+SIGNAL_STATE_PATH = "signal_state.json"
+
+
+class SignalState:
+    """
+    Persistent per-ticker signal and equity state, so a quarterly refresh only processes the
+    new calls and the new price days instead of every ticker's whole history.
+
+    Per ticker it keeps:
+      - the running count, mean and M2 of the weighted sentiment blend (Welford), from which
+        each new call's expanding z-score is computed exactly as strategy.prepare_inputs does
+      - the equity of the strategy before the latest call's entry day, which is final: every
+        earlier trade has exited by then
+      - the calls that can still affect later days (those entered on the last two entry days)
+        with their z-scores, and the position held on the last price day
+
+    An update re-simulates only that tail, from the day before its first entry, through the
+    latest prices with the NumPy kernel, and returns the revised curve points. Calls dated on or
+    before a ticker's last ingested call are treated as already ingested, so the full call
+    history can be passed on every refresh. The state is tied to the strategy parameters, z
+    thresholds and score weighting; if they change, it is discarded and rebuilt from the calls
+    passed next.
+
+    Inputs:
+    path (str): JSON state file (default SIGNAL_STATE_PATH)
+    params (dict): strategy parameters (default strategy.strategy_params())
+    upper, lower (float): z-score thresholds (default strategy.Z_UPPER / Z_LOWER)
+    weights: weighting of the score columns (default strategy.SIGNAL_WEIGHTS; see factors.resolve_weights)
+    """
+
+    def __init__(self, path: str = SIGNAL_STATE_PATH, params: dict = None, upper: float = None, lower: float = None,
+                 weights=None):
+        self.path = path
+        self.params = strategy.strategy_params() if params is None else dict(params)
+        self.upper = strategy.Z_UPPER if upper is None else float(upper)
+        self.lower = strategy.Z_LOWER if lower is None else float(lower)
+        self.weights = factors.resolve_weights(strategy.SIGNAL_WEIGHTS if weights is None else weights,
+                                               strategy.score_columns)
+        self.tickers = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("config") == self._config():
+                self.tickers = saved.get("tickers", {})
+            else:
+                print(f"⚠️ Strategy parameters changed since {path} was written; rebuilding signal state from scratch.")
+
+    def _config(self) -> dict:
+        return {"params": self.params, "upper": self.upper, "lower": self.lower, "weights": self.weights.tolist()}
+
+    def save(self):
+        """Write the state file (atomic replace)."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"config": self._config(), "tickers": self.tickers}, f)
+        os.replace(tmp, self.path)
+
+    def reset(self, ticker: str = None):
+        """Forget one ticker's state (or every ticker's), e.g. after restating old calls."""
+        if ticker is None:
+            self.tickers = {}
+        else:
+            self.tickers.pop(ticker, None)
+
+    def zscore_stats(self, ticker: str) -> dict:
+        """Running mean and (sample) standard deviation of a ticker's sentiment blend, over its ingested calls."""
+        s = self.tickers[ticker]
+        std = np.sqrt(s["m2"] / (s["n"] - 1)) if s["n"] > 1 else float("nan")
+        return {"count": s["n"], "mean": s["mean"], "std": std}
+
+    def _new_calls(self, ticker: str, dates: np.ndarray, blend: np.ndarray):
+        """Z-scores of a ticker's new calls (sorted by date), folding each into the running stats."""
+        s = self.tickers.get(ticker)
+        if s is None:
+            s = {"n": 0, "mean": 0.0, "m2": 0.0, "last_call": None, "tail": [], "equity": 1.0,
+                 "curve_from": None, "window_start": None, "first_price": None, "position": 0.0}
+        z = np.full(len(blend), np.nan)
+        for i, x in enumerate(blend):
+            # Expanding z-score against the calls before this one, then fold it into the stats
+            if s["n"] > 1:
+                z[i] = (x - s["mean"]) / (np.sqrt(s["m2"] / (s["n"] - 1)) + 1e-12)
+            s["n"] += 1
+            delta = x - s["mean"]
+            s["mean"] += delta / s["n"]
+            s["m2"] += delta * (x - s["mean"])
+        if len(dates):
+            s["last_call"] = pd.Timestamp(dates[-1]).isoformat()
+        return s, z
+
+    def _extend(self, ticker: str, s: dict, new_dates: np.ndarray, new_z: np.ndarray,
+                index: pd.DatetimeIndex, prices: np.ndarray) -> dict:
+        """Re-simulate a ticker's tail through the latest prices and advance its settled state."""
+        # A new ticker starts at its own price window (strategy.price_window), whatever other
+        # tickers in the same update need
+        window_start = s["window_start"] or strategy.price_window(new_dates)[0]
+        first = int(np.searchsorted(index.asi8, pd.Timestamp(window_start).value))
+        index, prices = index[first:], prices[first:]
+        tail_dates = np.array([t["date"] for t in s["tail"]], dtype="datetime64[ns]")
+        tail_z = np.array([np.nan if t["z"] is None else t["z"] for t in s["tail"]], dtype=float)
+        dates = np.concatenate([tail_dates, new_dates])
+        z = np.concatenate([tail_z, new_z])
+
+        entry_pos = strategy.TradingCalendar(index).entry_positions(dates)
+        pos, daily_net, _ = strategy.simulate_ticker(prices, entry_pos, strategy.signals_from_z(z, self.upper, self.lower),
+                                                     self.params)
+
+        # Curve points from the first unsettled day on
+        start = 0 if s["curve_from"] is None else int(np.searchsorted(index.asi8, pd.Timestamp(s["curve_from"]).value))
+        if s["first_price"] is None:
+            s["first_price"] = float(prices[0])
+        out = {
+            "sentiment": pd.Series(s["equity"] * np.cumprod(1 + daily_net[start:]), index=index[start:]),
+            "buyhold": pd.Series(prices[start:] / s["first_price"], index=index[start:]),
+        }
+
+        # Days before the latest entry are final; keep the calls that can still affect later days
+        if len(entry_pos):
+            last_entry = int(entry_pos.max())
+            earlier = entry_pos[entry_pos < last_entry]
+            keep_from = int(earlier.max()) if len(earlier) else int(entry_pos.min())
+            s["equity"] = float(s["equity"] * np.prod(1 + daily_net[start:last_entry]))
+            s["curve_from"] = index[last_entry].isoformat()
+            s["window_start"] = index[max(keep_from - 1, 0)].isoformat()
+            keep = entry_pos >= keep_from
+            s["tail"] = [{"date": pd.Timestamp(d).isoformat(), "z": None if np.isnan(v) else float(v)}
+                         for d, v in zip(dates[keep], z[keep])]
+        s["position"] = float(pos[-1]) if len(pos) else 0.0
+        self.tickers[ticker] = s
+        return out
+
+    def update(self, calls: pd.DataFrame, price_df: pd.DataFrame = None, end=None, price_store=None,
+               save: bool = True) -> pd.DataFrame:
+        """
+        Ingest new scored calls and extend every affected ticker's equity curve through the
+        latest prices. Tickers seen for the first time are built from their full history.
+
+        Inputs:
+        calls (pd.DataFrame): scored calls (ticker, date and the strategy score columns); older
+                              calls already ingested are skipped
+        price_df (pd.DataFrame): close prices (dates x tickers); loaded from the price store if None
+        end: last date to load prices for when price_df is None (default today)
+        price_store (prices.PriceStore): price store to load from
+        save (bool): write the state file afterwards
+
+        Output:
+        revised (pd.DataFrame): `{ticker}_sentiment` and `{ticker}_buyhold` curve points from each
+        ticker's first unsettled day on; they replace the same dates of earlier results
+        (e.g. `revised.combine_first(curves)`)
+        """
+        dates = pd.to_datetime(calls["date"])
+        tickers = calls["ticker"].astype(str)
+        first_call = dates.groupby(tickers).min()
+        universe = first_call.index.tolist()
+
+        # Drop calls already ingested, then work on plain arrays sorted by (ticker, date)
+        last_call = pd.to_datetime(tickers.map({t: s["last_call"] for t, s in self.tickers.items()}))
+        new = (last_call.isna() | (dates > last_call)).to_numpy()
+        order = np.lexsort((dates.to_numpy()[new], tickers.to_numpy()[new]))
+        new_tickers = tickers.to_numpy()[new][order]
+        new_dates = dates.to_numpy(dtype="datetime64[ns]")[new][order]
+        blend = calls.loc[new, strategy.score_columns].fillna(0).to_numpy(dtype=float)[order] @ self.weights
+        names, first = np.unique(new_tickers, return_index=True)
+        bounds = dict(zip(names, zip(first, np.append(first[1:], len(new_tickers)))))
+
+        # Only prices from the earliest unsettled window on are needed
+        start = min(pd.Timestamp(self.tickers[t]["window_start"]) if self.tickers.get(t, {}).get("window_start")
+                    else first_call[t] - pd.Timedelta(days=10) for t in universe)
+        if price_df is None:
+            end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end)
+            price_df = load_prices(universe, start, end, store=price_store)
+        price_df = price_df[price_df.index >= start]
+        matrix = price_df.to_numpy(dtype=float)
+        columns = {c: i for i, c in enumerate(price_df.columns)}
+
+        revised = {}
+        for ticker in universe:
+            col = matrix[:, columns[ticker]] if ticker in columns else np.zeros(0)
+            valid = ~np.isnan(col)
+            if not valid.any():
+                print(f"⚠️ No prices for {ticker}; its calls were not ingested.")
+                continue
+            index, prices = price_df.index[valid], col[valid]
+            s = self.tickers.get(ticker)
+            if s is not None and s["curve_from"] is not None and index[-1] < pd.Timestamp(s["curve_from"]):
+                print(f"⚠️ Prices for {ticker} end before its settled curve; its calls were not ingested.")
+                continue
+            lo, hi = bounds.get(ticker, (0, 0))
+            if s is None and hi == lo:
+                continue
+            s, z = self._new_calls(ticker, new_dates[lo:hi], blend[lo:hi])
+            out = self._extend(ticker, s, new_dates[lo:hi], z, index, prices)
+            revised[f"{ticker}_sentiment"] = out["sentiment"]
+            revised[f"{ticker}_buyhold"] = out["buyhold"]
+
+        if save and self.path:
+            self.save()
+        return pd.DataFrame(revised)
@@ -0,0 +1,290 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import telemetry
+
+
+STORE_PATH = "store"
+MIGRATED_MARKER = "_MIGRATED"
+TEXT_CACHE_PARTITIONS = 8   # (ticker, year) partitions of transcript text a TranscriptReader keeps in memory
+
+# Transcripts and scores are separate datasets, so score reads never touch transcript text
+TRANSCRIPTS = "transcripts"
+SCORES = "scores"
+
+# The LLM sentiment scores of a call (the single definition, imported by the other modules)
+SCORE_COLUMNS = [
+    "forward_looking_sentiment",
+    "management_confidence",
+    "risk_and_uncertainty",
+    "qa_sentiment",
+    "opening_sentiment",
+    "financial_performance_sentiment",
+    "macroeconomic_reference_sentiment",
+]
+
+_SCHEMAS = {
+    TRANSCRIPTS: pa.schema([
+        ("year_quarter", pa.string()),
+        ("date", pa.timestamp("ns")),
+        ("earnings_call_raw_text", pa.large_string()),
+    ]),
+    SCORES: pa.schema(
+        [
+            ("year_quarter", pa.string()),
+            ("date", pa.timestamp("ns")),
+            ("url", pa.string()),
+            ("analysis_json", pa.string()),
+            ("prompt_key", pa.string()),
+        ]
+        + [(c, pa.float64()) for c in SCORE_COLUMNS]
+    ),
+}
+_KEYS = {TRANSCRIPTS: ["year_quarter"], SCORES: ["year_quarter", "date"]}
+
+_migrate_lock = threading.Lock()
+
+_PARTITIONING = ds.partitioning(pa.schema([("ticker", pa.string()), ("year", pa.int32())]), flavor="hive")
+
+
+def _partition_dir(kind: str, ticker: str, year: int, store_path: str = STORE_PATH) -> str:
+    return os.path.join(store_path, kind, f"ticker={ticker}", f"year={int(year)}")
+
+
+def _to_table(kind: str, df: pd.DataFrame) -> pa.Table:
+    schema = _SCHEMAS[kind]
+    out = pd.DataFrame(index=df.index)
+    for field in schema:
+        col = df[field.name] if field.name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if field.name == "date":
+            col = pd.to_datetime(col, errors="coerce")
+        elif pa.types.is_floating(field.type):
+            col = pd.to_numeric(col, errors="coerce")
+        else:
+            col = col.where(col.notna(), None)
+        out[field.name] = col
+    return pa.Table.from_pandas(out, schema=schema, preserve_index=False)
+
+
+def _upsert(kind: str, df: pd.DataFrame, store_path: str = STORE_PATH) -> int:
+    """
+    Merge rows into their (ticker, year) partitions, replacing rows with the same key.
+    Each touched partition is rewritten atomically (write to temp file, then rename).
+    """
+    if df is None or df.empty:
+        return 0
+    df = df.copy()
+    df["ticker"] = df["ticker"].astype(str)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date"])
+    keys = _KEYS[kind]
+    written = 0
+    with telemetry.timer("store_write", kind=kind, rows=len(df), partitions=0) as ev:
+        for (ticker, year), part in df.groupby([df["ticker"], df["date"].dt.year]):
+            part_dir = _partition_dir(kind, ticker, year, store_path)
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, "part-0.parquet")
+            new = _to_table(kind, part).to_pandas()
+            if os.path.exists(path):
+                old = pq.read_table(path).to_pandas()
+                new = pd.concat([old, new], ignore_index=True).drop_duplicates(subset=keys, keep="last")
+            new = new.sort_values("date")
+            tmp = f"{path}.tmp"
+            pq.write_table(_to_table(kind, new), tmp)
+            os.replace(tmp, path)
+            written += len(part)
+            ev["partitions"] += 1
+    return written
+
+
+def write_transcripts(df: pd.DataFrame, store_path: str = STORE_PATH) -> int:
+    """
+    Upsert scraped transcripts (ticker, year_quarter, date, earnings_call_raw_text) into the store.
+
+    Output:
+    n (int): number of rows written
+    """
+    return _upsert(TRANSCRIPTS, df, store_path)
+
+
+def write_scores(df: pd.DataFrame, store_path: str = STORE_PATH) -> int:
+    """
+    Upsert processed sentiment rows (ticker, year_quarter, date, url, analysis_json, prompt_key, scores).
+
+    Output:
+    n (int): number of rows written
+    """
+    return _upsert(SCORES, df, store_path)
+
+
+def _filter(tickers=None, start_date=None, end_date=None):
+    expr = None
+
+    def add(e):
+        return e if expr is None else expr & e
+
+    if tickers is not None:
+        expr = add(ds.field("ticker").isin([str(t) for t in tickers]))
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        expr = add(ds.field("year") >= start.year)
+        expr = add(ds.field("date") >= pa.scalar(start.value, pa.timestamp("ns")))
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        expr = add(ds.field("year") <= end.year)
+        expr = add(ds.field("date") <= pa.scalar(end.value, pa.timestamp("ns")))
+    return expr
+
+
+def _read(kind: str, tickers=None, start_date=None, end_date=None, columns=None, store_path: str = STORE_PATH) -> pd.DataFrame:
+    root = os.path.join(store_path, kind)
+    fields = ["ticker"] + [f.name for f in _SCHEMAS[kind]]
+    if columns is not None:
+        fields = [c for c in fields if c in set(columns) | {"ticker", "year_quarter", "date"}]
+    if not glob.glob(os.path.join(root, "ticker=*", "year=*", "*.parquet")):
+        return pd.DataFrame(columns=fields)
+
+    with telemetry.timer("store_read", kind=kind) as ev:
+        dataset = ds.dataset(root, format="parquet", partitioning=_PARTITIONING)
+        # Partition filters prune whole ticker/year directories; the date filter is pushed into the scan
+        table = dataset.to_table(columns=fields, filter=_filter(tickers, start_date, end_date))
+        df = table.to_pandas()
+        ev["rows"] = len(df)
+    return df.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+
+def read_transcripts(tickers=None, start_date=None, end_date=None, columns=None, store_path: str = STORE_PATH) -> pd.DataFrame:
+    """
+    Load transcripts from the store, reading only the matching ticker/year partitions.
+
+    Inputs:
+    tickers (list[str]): restrict to these tickers (all if None)
+    start_date, end_date: inclusive date range (open-ended if None)
+    columns (list[str]): subset of columns; pass ["ticker", "year_quarter", "date"] to skip transcript text
+
+    Output:
+    df (pd.DataFrame): ticker, year_quarter, date[, earnings_call_raw_text]
+    """
+    return _read(TRANSCRIPTS, tickers, start_date, end_date, columns, store_path)
+
+
+class TranscriptReader:
+    """
+    Lazy access to transcript bodies in the store, for callers that load only call metadata
+    eagerly. Text is read one (ticker, year) partition at a time, memory-mapped and only when
+    asked for; the last few partitions are kept so consecutive calls of a ticker don't re-read
+    the file. Thread-safe.
+
+    Inputs:
+    store_path (str): store root
+    cache_partitions (int): partitions kept in memory (default TEXT_CACHE_PARTITIONS)
+    """
+
+    def __init__(self, store_path: str = STORE_PATH, cache_partitions: int = None):
+        self.store_path = store_path
+        self.cache_partitions = max(1, TEXT_CACHE_PARTITIONS if cache_partitions is None else cache_partitions)
+        self._partitions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _partition(self, ticker: str, year: int) -> dict:
+        key = (ticker, year)
+        with self._lock:
+            if key in self._partitions:
+                self._partitions.move_to_end(key)
+                return self._partitions[key]
+        path = os.path.join(_partition_dir(TRANSCRIPTS, ticker, year, self.store_path), "part-0.parquet")
+        texts = {}
+        if os.path.exists(path):
+            with telemetry.timer("store_text_read", kind=TRANSCRIPTS) as ev:
+                table = pq.read_table(path, columns=["year_quarter", "earnings_call_raw_text"], memory_map=True)
+                texts = dict(zip(table.column("year_quarter").to_pylist(),
+                                 table.column("earnings_call_raw_text").to_pylist()))
+                ev["rows"] = len(texts)
+        with self._lock:
+            self._partitions[key] = texts
+            while len(self._partitions) > self.cache_partitions:
+                self._partitions.popitem(last=False)
+        return texts
+
+    def text(self, ticker: str, year_quarter: str, date):
+        """
+        Transcript text of one call.
+
+        Inputs:
+        ticker (str): ticker symbol
+        year_quarter (str): '{year}-year/{quarter}-quarter'
+        date: call date (selects the year partition)
+
+        Output:
+        text (str | None): transcript text, or None if the store has no such call
+        """
+        date = pd.to_datetime(date, errors="coerce")
+        if pd.isna(date):
+            return None
+        return self._partition(str(ticker), int(date.year)).get(str(year_quarter))
+
+
+def read_scores(tickers=None, start_date=None, end_date=None, columns=None, store_path: str = STORE_PATH) -> pd.DataFrame:
+    """
+    Load processed sentiment rows from the store (never touches transcript text).
+
+    Inputs:
+    tickers (list[str]): restrict to these tickers (all if None)
+    start_date, end_date: inclusive date range (open-ended if None)
+    columns (list[str]): subset of columns (ticker, year_quarter and date are always included)
+
+    Output:
+    df (pd.DataFrame): processed rows, one per call
+    """
+    return _read(SCORES, tickers, start_date, end_date, columns, store_path)
+
+
+def has_store(kind: str = TRANSCRIPTS, store_path: str = STORE_PATH) -> bool:
+    """Whether any partition of the given dataset exists."""
+    return bool(glob.glob(os.path.join(store_path, kind, "ticker=*", "year=*", "*.parquet")))
+
+
+def migrate_csv_layout(base: str = "earnings_calls", store_path: str = STORE_PATH) -> dict:
+    """
+    One-shot migration of the per-ticker CSV layout
+    (earnings_calls/{ticker}/scraped_earnings_calls.csv and processed_earnings_calls.csv)
+    into the partitioned store. Safe to rerun: rows are upserted by key.
+
+    Inputs:
+    base (str): root of the per-ticker CSV directories
+    store_path (str): store root
+
+    Output:
+    counts (dict): number of transcript and score rows migrated
+    """
+    counts = {TRANSCRIPTS: 0, SCORES: 0}
+    for ticker_dir in sorted(glob.glob(os.path.join(base, "*"))):
+        if not os.path.isdir(ticker_dir):
+            continue
+        scraped = os.path.join(ticker_dir, "scraped_earnings_calls.csv")
+        if os.path.exists(scraped):
+            counts[TRANSCRIPTS] += write_transcripts(pd.read_csv(scraped), store_path)
+        processed = os.path.join(ticker_dir, "processed_earnings_calls.csv")
+        if os.path.exists(processed):
+            counts[SCORES] += write_scores(pd.read_csv(processed, dtype={"year_quarter": str}), store_path)
+    print(f"Migrated {counts[TRANSCRIPTS]} transcripts and {counts[SCORES]} scored calls into {store_path}/")
+    return counts
+
+
+def ensure_migrated(base: str = "earnings_calls", store_path: str = STORE_PATH):
+    """Run migrate_csv_layout once per store (tracked by a marker file) before the store is first used."""
+    marker = os.path.join(store_path, MIGRATED_MARKER)
+    if os.path.exists(marker):
+        return
+    with _migrate_lock:
+        if os.path.exists(marker):
+            return
+        migrate_csv_layout(base, store_path)
+        os.makedirs(store_path, exist_ok=True)
+        with open(marker, "w") as f:
+            f.write(pd.Timestamp.now().isoformat())
@@ -1,8 +1,15 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import yfinance as yf
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime as dt
+from prices import load_prices
+import factors
+import store
+import telemetry
 
 # Strategy Parameters
 POSITION_SIZE = 0.65
@@ -10,140 +17,471 @@ STOP_LOSS = 0.15
 TAKE_PROFIT = 0.50
 USE_TRAILING = False
 TRAIL_GIVEUP = 0.10
+COMMISSION_BP = 2
+Z_UPPER = 0.75      # long when the sentiment z-score is at or above this
+Z_LOWER = -0.75     # short when it is at or below this
+SIGNAL_WEIGHTS = "equal"   # blend of the score columns that is z-scored: a factors.WEIGHTINGS name or {column: weight}
 
-score_columns = [
-    "forward_looking_sentiment",
-    "management_confidence",
-    "risk_and_uncertainty",
-    "qa_sentiment",
-    "opening_sentiment",
-    "financial_performance_sentiment",
-    "macroeconomic_reference_sentiment"
-]
+# Execution
+N_JOBS = 1          # worker processes for the per-ticker simulations (1 = in-process)
+CHUNK_SIZE = None   # tickers per task (default: spread evenly, ~4 tasks per worker)
 
-def backtest_sentiment_strategy(all_calls: pd.DataFrame):
+# Why a trade was closed (trade ledger `exit_reason`, indexed by the kernel's exit codes)
+EXIT_REASONS = ["next_call", "stop_loss", "take_profit", "trailing_stop", "end_of_data"]
+
+score_columns = store.SCORE_COLUMNS
+
+def simulate_trades_batch(prices: np.ndarray, rets: np.ndarray, entry_idx: np.ndarray, exit_idx: np.ndarray,
+                          signals: np.ndarray, position_size, stop_loss, take_profit, use_trailing, trail_giveup,
+                          commission_bp):
     """
-    This function forms a strategy around each ticker's deviation in overall earnings call sentiment score over time
-    The ticker's price data is scraped to serve as a comparison between the sentiment strategy and buy/hold
+    Positional NumPy kernel simulating one ticker's trades on plain float arrays, for P parameter
+    sets at once (each strategy parameter is a length-P array; simulate_trades is the P = 1 case).
+
+    Each trade holds sig * position_size from its entry until the first day its PnL hits the
+    stop loss, take profit or trailing stop (found with a cumulative max / argmax over the
+    trade's window), or until its planned exit. Trades are given in processing order; a later
+    trade overrides the positions of an earlier one on the days its window covers.
+
+    Inputs:
+    prices (np.ndarray): prices on the ticker's trading days
+    rets (np.ndarray): daily returns on the same days
+    entry_idx (np.ndarray[int]): entry position of each trade (non-decreasing)
+    exit_idx (np.ndarray[int]): planned exit position of each trade (next call's entry or last day)
+    signals (np.ndarray): +1 / -1 direction of each trade
+    position_size, stop_loss, take_profit, use_trailing, trail_giveup, commission_bp (array-like, (P,)):
+        strategy parameters
+
+    Output:
+    pos (np.ndarray): (P, days) daily position
+    daily_net (np.ndarray): (P, days) daily strategy return net of costs
+    actual_exit (np.ndarray[int]): (P, trades) realized exit position of each trade
+    trade_pnl (np.ndarray): (P, trades) PnL of each trade
+    exit_code (np.ndarray[int8]): (P, trades) index into EXIT_REASONS of each trade's exit
+    """
+    n = len(prices)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    exit_idx = np.asarray(exit_idx, dtype=np.int64)
+    signals = np.asarray(signals, dtype=np.float64)
+    size = np.asarray(position_size, dtype=np.float64)
+    P, T = len(size), len(entry_idx)
+    sl = np.asarray(stop_loss, dtype=np.float64)[:, None]
+    tp = np.asarray(take_profit, dtype=np.float64)[:, None]
+    trail = np.asarray(use_trailing, dtype=bool)
+    giveup = np.asarray(trail_giveup, dtype=np.float64)
+    per_side_cost = np.asarray(commission_bp, dtype=np.float64) / 10000.0
+    cost = np.zeros((P, n))
+
+    if T == 0:
+        pos = np.zeros((P, n))
+        return (pos, pos_returns(pos, rets[None, :]) + cost, np.zeros((P, 0), dtype=np.int64),
+                np.zeros((P, 0)), np.zeros((P, 0), dtype=np.int8))
+
+    # (trades x window) matrix of prices from entry to planned exit
+    lengths = exit_idx - entry_idx + 1
+    offsets = np.arange(lengths.max())
+    in_window = offsets[None, :] < lengths[:, None]
+    window_idx = np.minimum(entry_idx[:, None] + offsets[None, :], n - 1)
+    entry_price = prices[entry_idx]
+    pnl = signals[:, None] * (prices[window_idx] / entry_price[:, None] - 1.0)
+
+    # (P, trades, window) exit conditions
+    stopped = (pnl[None] <= -sl[:, :, None]) | (pnl[None] >= tp[:, :, None])
+    if trail.any():
+        best_fav = np.maximum.accumulate(np.maximum(pnl, 0.0), axis=1)
+        gave_up = (best_fav > 0)[None] & ((best_fav - pnl)[None] >= giveup[:, None, None])
+        stopped |= trail[:, None, None] & gave_up
+    stopped &= in_window[None]
+    hit = stopped.any(axis=2)
+    first = stopped.argmax(axis=2)
+    actual_exit = np.where(hit, entry_idx[None, :] + first, exit_idx[None, :])
+
+    # Stop loss takes precedence over take profit over trailing stop on the exit day
+    exit_pnl = pnl[np.arange(T)[None, :], first]
+    planned_end = np.broadcast_to(exit_idx == n - 1, hit.shape)
+    exit_code = np.select([~hit & planned_end, ~hit, exit_pnl <= -sl, exit_pnl >= tp],
+                          [4, 0, 1, 2], 3).astype(np.int8)
+
+    # Each day belongs to the last trade entered on or before it; held until that trade's exit
+    days = np.arange(n)
+    owner = np.searchsorted(entry_idx, days, side="right") - 1
+    owned = np.maximum(owner, 0)
+    held = (owner >= 0) & (days[None, :] <= actual_exit[:, owned])
+    pos = np.where(held, signals[owned][None, :] * size[:, None], 0.0)
+
+    # Costs on entries & exits
+    rows = np.broadcast_to(np.arange(P)[:, None], (P, T))
+    side_cost = np.broadcast_to(per_side_cost[:, None], (P, T))
+    np.subtract.at(cost, (rows, np.broadcast_to(entry_idx, (P, T))), side_cost)
+    np.subtract.at(cost, (rows, actual_exit), side_cost)
+
+    trade_pnl = signals[None, :] * (prices[actual_exit] / entry_price[None, :] - 1.0)
+    return pos, pos_returns(pos, rets[None, :]) + cost, actual_exit, trade_pnl, exit_code
+
+
+def simulate_trades(prices: np.ndarray, rets: np.ndarray, entry_idx: np.ndarray, exit_idx: np.ndarray,
+                    signals: np.ndarray, position_size: float = POSITION_SIZE, stop_loss: float = STOP_LOSS,
+                    take_profit: float = TAKE_PROFIT, use_trailing: bool = USE_TRAILING,
+                    trail_giveup: float = TRAIL_GIVEUP, commission_bp: float = COMMISSION_BP):
+    """
+    simulate_trades_batch for a single parameter set.
+
+    Output:
+    pos (np.ndarray): daily position
+    daily_net (np.ndarray): daily strategy return net of costs
+    actual_exit (np.ndarray[int]): realized exit position of each trade
+    trade_pnl (np.ndarray): PnL of each trade
+    exit_code (np.ndarray[int8]): index into EXIT_REASONS of each trade's exit
+    """
+    out = simulate_trades_batch(prices, rets, entry_idx, exit_idx, signals, [position_size], [stop_loss],
+                                [take_profit], [use_trailing], [trail_giveup], [commission_bp])
+    return tuple(a[0] for a in out)
+
+
+def pos_returns(pos: np.ndarray, rets: np.ndarray) -> np.ndarray:
+    """Daily strategy returns of a position series (NaN returns count as 0)."""
+    return np.nan_to_num(pos * rets, nan=0.0)
+
+
+def strategy_params() -> dict:
+    """Current strategy parameters, passed explicitly to the simulation (and to worker processes)."""
+    return {
+        "position_size": POSITION_SIZE,
+        "stop_loss": STOP_LOSS,
+        "take_profit": TAKE_PROFIT,
+        "use_trailing": USE_TRAILING,
+        "trail_giveup": TRAIL_GIVEUP,
+        "commission_bp": COMMISSION_BP,
+    }
+
+
+def signals_from_z(z: np.ndarray, upper: float = None, lower: float = None) -> np.ndarray:
+    """
+    Turn z-scores into +1 / 0 / -1 signals (NaN z-scores give no signal).
+
+    Inputs:
+    z (np.ndarray): z-scores
+    upper, lower (float): signal thresholds (default Z_UPPER / Z_LOWER)
+    """
+    upper = Z_UPPER if upper is None else upper
+    lower = Z_LOWER if lower is None else lower
+    signal = np.zeros(len(z), dtype=np.int64)
+    signal[z >= upper] = 1
+    signal[z <= lower] = -1
+    return signal
+
+
+class TradingCalendar:
+    """
+    Trading days of a price index, mapping whole arrays of dates to integer positions with a
+    single searchsorted. Built once per price index and shared by every ticker trading on it.
+
+    Input:
+    index (pd.DatetimeIndex): sorted trading days
+    """
+
+    def __init__(self, index):
+        self.index = pd.DatetimeIndex(index)
+        self._ns = self.index.asi8
+
+    def __len__(self):
+        return len(self._ns)
+
+    def entry_positions(self, dates) -> np.ndarray:
+        """
+        Position of the entry day for each call date: the next trading day after a date that is
+        itself a trading day, otherwise the first trading day on/after it. Dates after the last
+        trading day (and missing dates) map to the last day.
+
+        Input:
+        dates: array-like of call dates
+
+        Output: np.ndarray[int64] of positions (empty if the calendar has no trading days)
+        """
+        n = len(self._ns)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        d = pd.DatetimeIndex(dates).asi8
+        i = np.searchsorted(self._ns, d, side='left')
+        on_day = (i < n) & (self._ns[np.minimum(i, n - 1)] == d)
+        pos = np.where(on_day, i + 1, i)
+        pos = np.minimum(pos, n - 1)
+        pos[pd.isna(pd.DatetimeIndex(dates))] = n - 1
+        return pos.astype(np.int64)
+
+
+def price_window(dates):
+    """
+    Price range a backtest of these call dates needs: the first call minus 10 days through the
+    last call plus 10 days.
 
     Input:
+    dates: array-like of call dates
+
+    Output: (start, end) timestamps (end exclusive, as load_prices expects)
+    """
+    dates = pd.DatetimeIndex(dates)
+    return dates.min() - pd.Timedelta(days=10), dates.max() + pd.Timedelta(days=10)
+
+
+def prepare_inputs(all_calls: pd.DataFrame, price_df: pd.DataFrame = None, price_store=None, weights=None) -> dict:
+    """
+    Precompute everything the simulations need, once: prices, sentiment z-scores and each
+    call's entry position on its ticker's trading days. Reused across backtests, parameter
+    sweeps and what-if runs.
+
+    Inputs:
+    all_calls (pd.DataFrame): dataframe of all earnings calls sentiment data
+    price_df (pd.DataFrame): close prices (dates x tickers); loaded from the price store if None
+    price_store (prices.PriceStore): price store to load from (defaults to prices.load_prices' store)
+    weights: weighting of the score columns whose blend is z-scored (default SIGNAL_WEIGHTS;
+             see factors.resolve_weights)
+
+    Output:
+    inputs (dict):
+      - tickers (list[str]): tickers with at least one price (others are skipped with a warning)
+      - price_df (pd.DataFrame): close prices for `tickers`
+      - calls (dict[str, dict]): per ticker, arrays `dates`, `z` and `entry_pos` (sorted by date),
+        its shared TradingCalendar and its `rows` in `factors`
+      - factors (factors.FactorSignals): per-factor statistics, to re-weight with with_weights(...)
+      - weights (np.ndarray): the weighting `z` was computed with
+    """
+    weights = SIGNAL_WEIGHTS if weights is None else weights
+    with telemetry.timer("signal_prepare", calls=len(all_calls)) as ev:
+        engine = factors.FactorSignals(all_calls, score_columns)
+        w = factors.resolve_weights(weights, score_columns)
+        z = engine.blend(w)
+        ev["tickers"] = len(engine.tickers)
+
+    tickers = list(engine.tickers)
+    if price_df is None:
+        start, end = price_window(engine.dates)
+        with telemetry.timer("price_load", tickers=len(tickers)):
+            price_df = load_prices(tickers, start, end, store=price_store)
+    price_df = price_df.reindex(columns=tickers)
+
+    # A ticker without a single price can't be simulated
+    priced = price_df.notna().any().to_numpy()
+    for ticker in np.array(tickers, dtype=object)[~priced]:
+        print(f"⚠️ No prices for {ticker}; skipping it in the backtest.")
+    if not priced.all():
+        tickers = [t for t, ok in zip(tickers, priced) if ok]
+        price_df = price_df[tickers]
+
+    # One calendar per distinct set of trading days (tickers with identical price coverage share it)
+    valid = price_df.notna().to_numpy()
+    calendars = {}
+
+    calls = {}
+    for col, ticker in enumerate(tickers):
+        key = valid[:, col].tobytes()
+        if key not in calendars:
+            calendars[key] = TradingCalendar(price_df.index[valid[:, col]])
+        calendar = calendars[key]
+
+        lo, hi = engine.bounds[ticker]
+        calls[ticker] = {
+            "dates": engine.dates[lo:hi],
+            "z": z[lo:hi],
+            "entry_pos": calendar.entry_positions(engine.dates[lo:hi]),
+            "calendar": calendar,
+            "rows": slice(lo, hi),
+        }
+    return {"tickers": tickers, "price_df": price_df, "calls": calls, "factors": engine, "weights": w}
+
+
+def with_weights(inputs: dict, weights) -> dict:
+    """
+    prepare_inputs(...) result re-weighted: the same prices, calendars and entry positions, with
+    z-scores of another blend of the score columns. The factor statistics are not recomputed.
+
+    Inputs:
+    inputs (dict): prepare_inputs(...) result
+    weights: weighting of the score columns (see factors.resolve_weights)
+    """
+    engine = inputs["factors"]
+    w = factors.resolve_weights(weights, engine.factors)
+    z = engine.blend(w)
+    calls = {ticker: {**c, "z": z[c["rows"]]} for ticker, c in inputs["calls"].items()}
+    return {**inputs, "calls": calls, "weights": w}
+
+
+def plan_trades(entry_pos: np.ndarray, signals: np.ndarray, n_days: int):
+    """
+    Trades of one ticker: entry positions of signalled calls and their planned exits (the next,
+    strictly later, call entry, else the last trading day).
+
+    Output:
+    entry_idx, exit_idx, trade_signals (np.ndarray)
+    """
+    trades = signals != 0
+    entry_idx = entry_pos[trades]
+    all_entries = np.sort(entry_pos)
+    nxt = np.searchsorted(all_entries, entry_idx, side='right')
+    exit_idx = np.where(nxt < len(all_entries), all_entries[np.minimum(nxt, len(all_entries) - 1)], n_days - 1)
+    return entry_idx, exit_idx, signals[trades]
+
+
+def simulate_ticker(prices: np.ndarray, entry_pos: np.ndarray, signals: np.ndarray, params: dict):
+    """
+    Simulate one ticker's strategy from its prices (trading days only) and call signals.
+
+    Output:
+    pos (np.ndarray): daily position
+    daily_net (np.ndarray): daily strategy return net of costs
+    trades (dict): per-trade arrays `signal`, `entry_pos`, `exit_pos`, `pnl` and `exit_code`
+    """
+    rets = np.zeros(len(prices))
+    rets[1:] = prices[1:] / prices[:-1] - 1
+    entry_idx, exit_idx, trade_signals = plan_trades(entry_pos, signals, len(prices))
+    pos, daily_net, actual_exit, trade_pnl, exit_code = simulate_trades(
+        prices, rets, entry_idx, exit_idx, trade_signals, **params)
+    trades = {"signal": trade_signals.astype(np.int8), "entry_pos": entry_idx, "exit_pos": actual_exit,
+              "pnl": trade_pnl, "exit_code": exit_code}
+    return pos, daily_net, trades
+
+
+def trade_ledger(tickers: list, price_df: pd.DataFrame, trades: dict) -> pd.DataFrame:
+    """
+    Columnar trade ledger from the per-ticker trade arrays of simulate_ticker.
+
+    Inputs:
+    tickers (list[str]): ticker of each price column
+    price_df (pd.DataFrame): close prices the trades were simulated on
+    trades (dict): price column -> simulate_ticker trades dict
+
+    Output:
+    ledger (pd.DataFrame): one row per trade with ticker (categorical), signal, entry/exit
+    positions (on the ticker's trading days) and dates, entry/exit prices, pnl and exit_reason
+    (categorical, from EXIT_REASONS)
+    """
+    cols = [c for c in sorted(trades) if len(trades[c]["entry_pos"])]
+    if not cols:
+        return pd.DataFrame({
+            "ticker": pd.Categorical([], categories=tickers), "signal": np.zeros(0, dtype=np.int8),
+            "entry_pos": np.zeros(0, dtype=np.int32), "exit_pos": np.zeros(0, dtype=np.int32),
+            "entry_date": pd.DatetimeIndex([]), "exit_date": pd.DatetimeIndex([]),
+            "entry_price": np.zeros(0), "exit_price": np.zeros(0), "pnl": np.zeros(0),
+            "exit_reason": pd.Categorical([], categories=EXIT_REASONS),
+        })
+
+    parts = {k: [] for k in ("entry_date", "exit_date", "entry_price", "exit_price")}
+    for c in cols:
+        px = price_df[tickers[c]].dropna()
+        t = trades[c]
+        parts["entry_date"].append(px.index.values[t["entry_pos"]])
+        parts["exit_date"].append(px.index.values[t["exit_pos"]])
+        parts["entry_price"].append(px.values[t["entry_pos"]])
+        parts["exit_price"].append(px.values[t["exit_pos"]])
+
+    counts = [len(trades[c]["entry_pos"]) for c in cols]
+    codes = np.repeat(np.asarray(cols), counts)
+    return pd.DataFrame({
+        "ticker": pd.Categorical.from_codes(codes, categories=tickers),
+        "signal": np.concatenate([trades[c]["signal"] for c in cols]),
+        "entry_pos": np.concatenate([trades[c]["entry_pos"] for c in cols]).astype(np.int32),
+        "exit_pos": np.concatenate([trades[c]["exit_pos"] for c in cols]).astype(np.int32),
+        **{k: np.concatenate(v) for k, v in parts.items()},
+        "pnl": np.concatenate([trades[c]["pnl"] for c in cols]),
+        "exit_reason": pd.Categorical.from_codes(np.concatenate([trades[c]["exit_code"] for c in cols]),
+                                                 categories=EXIT_REASONS),
+    })
+
+
+# Per-process state of backtest workers: memory-mapped price matrix and parameters
+_worker = {}
+
+
+def _init_worker(prices_path: str, params: dict):
+    _worker["prices"] = np.load(prices_path, mmap_mode="r")
+    _worker["params"] = params
+
+
+def _run_chunk(tasks: list) -> list:
+    """Worker entry point: simulate a chunk of (column, entry positions, signals) tasks against the shared price matrix."""
+    out = []
+    for col, entry_pos, signals in tasks:
+        row = np.asarray(_worker["prices"][col])
+        prices = row[~np.isnan(row)]
+        out.append((col, *simulate_ticker(prices, entry_pos, signals, _worker["params"])))
+    return out
+
+
+def _run_parallel(price_df: pd.DataFrame, tasks: list, n_jobs: int, chunk_size: int, params: dict) -> dict:
+    """
+    Run per-ticker simulations in a process pool. The price matrix is written once to a
+    memory-mapped .npy file (one contiguous row per ticker) that every worker maps read-only,
+    so tasks only carry a column number and the ticker's entry positions and signals.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="backtest_")
+    try:
+        prices_path = os.path.join(tmp_dir, "prices.npy")
+        with telemetry.timer("npy_write", path=prices_path, rows=price_df.shape[1]):
+            np.save(prices_path, np.ascontiguousarray(price_df.to_numpy(dtype=np.float64).T))
+
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(tasks) // (n_jobs * 4)))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(prices_path, params)) as ex:
+            for chunk in ex.map(_run_chunk, chunks):
+                for col, *result in chunk:
+                    results[col] = result
+        return results
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def backtest_sentiment_strategy(all_calls: pd.DataFrame, n_jobs: int = None, chunk_size: int = None,
+                                inputs: dict = None, return_trades: bool = False):
+    """
+    This function forms a strategy around each ticker's deviation in (weighted) earnings call sentiment score over time
+    The ticker's price data is scraped to serve as a comparison between the sentiment strategy and buy/hold
+
+    Inputs:
     all_calls (pd.DataFrame): dataframe of all earnings calls sentiment data
+    n_jobs (int): worker processes for the per-ticker simulations (defaults to N_JOBS; 1 = in-process)
+    chunk_size (int): tickers per worker task (defaults to CHUNK_SIZE)
+    inputs (dict): precomputed prepare_inputs(...) result; skips price loading and z-scores
+    return_trades (bool): also return the trade ledger and the daily positions
 
     Output:
     results (pd.DataFrame): dataframe of returns for each ticker and strategy
+    trades (pd.DataFrame): trade_ledger(...) of every trade (only if return_trades)
+    positions (pd.DataFrame): daily position per ticker (dates x tickers, NaN on days a ticker
+                              has no price; only if return_trades)
     """
 
-    all_calls = all_calls.fillna(0)
-    all_calls['overall_sentiment'] = all_calls[score_columns].mean(axis=1)
-    earnings_call_df = all_calls[['date', 'ticker', 'overall_sentiment']]
-    earnings_call_df['date'] = pd.to_datetime(earnings_call_df['date'])
+    n_jobs = N_JOBS if n_jobs is None else n_jobs
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+
+    if inputs is None:
+        inputs = prepare_inputs(all_calls)
+    tickers, price_df = inputs["tickers"], inputs["price_df"]
+    params = strategy_params()
 
-    tickers = earnings_call_df['ticker'].unique().tolist()
-    start = earnings_call_df['date'].min() - pd.Timedelta(days=10)
-    end   = earnings_call_df['date'].max() + pd.Timedelta(days=10)
+    # One task per ticker: its price column and its calls' entry positions & signals
+    tasks = []
+    for col, ticker in enumerate(tickers):
+        calls = inputs["calls"][ticker]
+        tasks.append((col, calls["entry_pos"], signals_from_z(calls["z"])))
 
-    price_df = yf.download(tickers, start=start, end=end)['Close']
+    with telemetry.timer("backtest_simulate", tickers=len(tickers)):
+        if n_jobs > 1 and len(tickers) > 1:
+            sims = _run_parallel(price_df, tasks, min(n_jobs, len(tickers)), chunk_size, params)
+        else:
+            sims = {}
+            for col, entry_pos, signals in tasks:
+                prices = price_df[tickers[col]].dropna().to_numpy(dtype=float)
+                sims[col] = simulate_ticker(prices, entry_pos, signals, params)
 
     results = {}
 
-    for ticker in tickers:
+    for col, ticker in enumerate(tickers):
         px = price_df[ticker].dropna()
-        rets = px.pct_change().fillna(0.0)
-        trading_index = px.index
-
-        ec = earnings_call_df[earnings_call_df.ticker == ticker].sort_values('date').copy()
-        ec['mu'] = ec['overall_sentiment'].shift().expanding().mean()
-        ec['sig'] = ec['overall_sentiment'].shift().expanding().std()
-        ec['z_overall'] = (ec['overall_sentiment'] - ec['mu']) / (ec['sig'] + 1e-12)
-
-        # Signal thresholds
-        upper, lower = 0.75, -0.75
-        ec['signal'] = 0
-        ec.loc[ec['z_overall'] >= upper, 'signal'] = 1
-        ec.loc[ec['z_overall'] <= lower, 'signal'] = -1
-
-        # Map to next trading day
-        def next_trading_day(d):
-            if d in trading_index:
-                i = trading_index.get_loc(d)
-                return trading_index[min(i + 1, len(trading_index) - 1)]
-            else:
-                i = trading_index.get_indexer([d], method='bfill')[0]
-                return trading_index[i]
-
-        ec['entry_date'] = ec['date'].apply(next_trading_day)
-        ec = ec.dropna(subset=['entry_date'])
-
-        # Initialize position and tracking
-        pos = pd.Series(0.0, index=trading_index)
-        trade_entries, trade_exits, trade_pnls = [], [], []
-
-        for i, row in ec.iterrows():
-            sig = row['signal']
-            if sig == 0:
-                continue
-
-            entry = row['entry_date']
-            # Find next earnings call
-            nxt = ec.loc[ec['entry_date'] > entry, 'entry_date'].min()
-            last = trading_index[-1]
-            exit_plan = nxt if pd.notna(nxt) else last
-
-            # Defensive alignment
-            if entry not in trading_index:
-                entry = trading_index[trading_index.get_indexer([entry], method='bfill')[0]]
-            if exit_plan not in trading_index:
-                exit_plan = trading_index[trading_index.get_indexer([exit_plan], method='bfill')[0]]
-
-            entry_price = px.loc[entry]
-            best_fav = 0.0
-            actual_exit = exit_plan
-
-            window = pos.loc[entry:exit_plan].index
-            for d in window:
-                pnl = sig * (px.loc[d] / entry_price - 1.0)
-                if pnl > best_fav:
-                    best_fav = pnl
-
-                stopped = False
-                if pnl <= -STOP_LOSS:
-                    actual_exit = d; stopped = True
-                elif pnl >= TAKE_PROFIT:
-                    actual_exit = d; stopped = True
-                elif USE_TRAILING and best_fav > 0 and (best_fav - pnl) >= TRAIL_GIVEUP:
-                    actual_exit = d; stopped = True
-
-                pos.loc[d] = sig * POSITION_SIZE
-                if stopped:
-                    break
-
-            # Flat after exit until next signal
-            start_idx = trading_index.get_loc(actual_exit)
-            end_idx   = trading_index.get_loc(exit_plan)
-            if isinstance(start_idx, slice): start_idx = start_idx.start
-            if isinstance(end_idx, slice):   end_idx = end_idx.stop - 1
-            if start_idx + 1 <= end_idx:
-                after = trading_index[start_idx + 1: end_idx + 1]
-                pos.loc[after] = 0.0
-
-            # Record trade PnL
-            trade_entries.append(entry)
-            trade_exits.append(actual_exit)
-            trade_pnls.append(sig * (px.loc[actual_exit] / entry_price - 1.0))
-
-        # Daily returns
-        strategy_daily = (pos * rets).fillna(0.0)
-
-        # Costs on entries & exits
-        commission_bp = 2
-        per_side_cost = commission_bp / 10000.0
-        cost_series = pd.Series(0.0, index=rets.index)
-        for d in trade_entries:
-            cost_series.loc[d] -= per_side_cost
-        for d in trade_exits:
-            cost_series.loc[d] -= per_side_cost
-
-        strategy_daily_net = (strategy_daily + cost_series).astype(float)
+        strategy_daily_net = pd.Series(sims[col][1], index=px.index)
 
         # Curves
         strategy_curve_net = (1 + strategy_daily_net).cumprod().rename(f"{ticker}_sentiment")
@@ -153,4 +491,13 @@ def backtest_sentiment_strategy(all_calls: pd.DataFrame):
         results[f"{ticker}_sentiment"] = strategy_curve_net
         results[f"{ticker}_buyhold"] = bh_curve
 
-    return pd.DataFrame(results)
\ No newline at end of file
+    if not return_trades:
+        return pd.DataFrame(results)
+
+    valid = price_df.notna().to_numpy()
+    positions = np.full(valid.shape, np.nan)
+    for col in range(len(tickers)):
+        positions[valid[:, col], col] = sims[col][0]
+    positions = pd.DataFrame(positions, index=price_df.index, columns=tickers)
+    trades = trade_ledger(tickers, price_df, {col: sims[col][2] for col in sims})
+    return pd.DataFrame(results), trades, positions
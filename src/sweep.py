@@ -0,0 +1,198 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import strategy
+
+
+# Parameters that can be swept, with the strategy module global providing each default
+SWEEP_PARAMS = {
+    "position_size": "POSITION_SIZE",
+    "stop_loss": "STOP_LOSS",
+    "take_profit": "TAKE_PROFIT",
+    "use_trailing": "USE_TRAILING",
+    "trail_giveup": "TRAIL_GIVEUP",
+    "commission_bp": "COMMISSION_BP",
+    "upper": "Z_UPPER",
+    "lower": "Z_LOWER",
+}
+PARAM_CHUNK = 256        # combinations simulated together per ticker (bounds memory)
+TRADING_DAYS = 252
+
+
+def expand_grid(grid: dict) -> pd.DataFrame:
+    """
+    Cartesian product of a parameter grid, filling unswept parameters from the strategy defaults.
+
+    Input:
+    grid (dict): parameter name -> list of values (names from SWEEP_PARAMS)
+
+    Output:
+    combos (pd.DataFrame): one row per combination, one column per parameter
+    """
+    unknown = set(grid) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"expand_grid: unknown parameters {sorted(unknown)}")
+    names = list(SWEEP_PARAMS)
+    values = [list(grid[n]) if n in grid else [getattr(strategy, SWEEP_PARAMS[n])] for n in names]
+    return pd.DataFrame(list(itertools.product(*values)), columns=names)
+
+
+def simulate_trades_batch(prices: np.ndarray, rets: np.ndarray, entry_idx: np.ndarray, exit_idx: np.ndarray,
+                          signals: np.ndarray, combos: pd.DataFrame):
+    """
+    strategy.simulate_trades_batch over the rows of a parameter frame: one ticker, one set of
+    trades, P parameter combinations simulated at once.
+
+    Output:
+    daily_net (np.ndarray): (P, days) daily strategy returns net of costs
+    trade_pnl (np.ndarray): (P, trades) PnL of each trade
+    """
+    params = {k: combos[k].to_numpy() for k in strategy.strategy_params()}
+    _, daily_net, _, trade_pnl, _ = strategy.simulate_trades_batch(prices, rets, entry_idx, exit_idx, signals, **params)
+    return daily_net, trade_pnl
+
+
+def _curve_metrics(daily_net: np.ndarray) -> dict:
+    """Per-row total return, annualized Sharpe and max drawdown of (P, days) daily returns."""
+    curve = np.cumprod(1 + daily_net, axis=1)
+    std = daily_net.std(axis=1, ddof=1) if daily_net.shape[1] > 1 else np.zeros(len(daily_net))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, daily_net.mean(axis=1) / std * np.sqrt(TRADING_DAYS), np.nan)
+    drawdown = (curve / np.maximum.accumulate(curve, axis=1) - 1).min(axis=1)
+    return {"total_return": curve[:, -1] - 1, "sharpe": sharpe, "max_drawdown": drawdown}
+
+
+def _sweep_group(inputs: dict, combos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Evaluate combinations that share the same signal thresholds (hence the same trades),
+    vectorized over the remaining parameters. Returns one metrics row per combination.
+    """
+    upper, lower = combos["upper"].iloc[0], combos["lower"].iloc[0]
+    P = len(combos)
+    sums = {k: np.zeros(P) for k in ("total_return", "sharpe", "max_drawdown", "excess_return")}
+    counts = {k: np.zeros(P) for k in sums}
+    trades = np.zeros(P)
+    wins = np.zeros(P)
+    decided = np.zeros(P)     # trades with non-zero PnL (flat trades are neither wins nor losses)
+
+    for ticker in inputs["tickers"]:
+        prices = inputs["price_df"][ticker].dropna().to_numpy(dtype=float)
+        if len(prices) == 0:
+            continue
+        calls = inputs["calls"][ticker]
+        rets = np.zeros(len(prices))
+        rets[1:] = prices[1:] / prices[:-1] - 1
+        entry_idx, exit_idx, sig = strategy.plan_trades(
+            calls["entry_pos"], strategy.signals_from_z(calls["z"], upper, lower), len(prices))
+        bh_return = prices[-1] / prices[0] - 1
+
+        for start in range(0, P, PARAM_CHUNK):
+            chunk = combos.iloc[start:start + PARAM_CHUNK]
+            sl = slice(start, start + len(chunk))
+            daily_net, trade_pnl = simulate_trades_batch(prices, rets, entry_idx, exit_idx, sig.astype(float), chunk)
+            m = _curve_metrics(daily_net)
+            m["excess_return"] = m["total_return"] - bh_return
+            for k in sums:
+                ok = ~np.isnan(m[k])
+                sums[k][sl] += np.where(ok, m[k], 0.0)
+                counts[k][sl] += ok
+            trades[sl] += trade_pnl.shape[1]
+            wins[sl] += (trade_pnl > 0).sum(axis=1)
+            decided[sl] += (trade_pnl != 0).sum(axis=1)
+
+    out = combos.reset_index(drop=True).copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k in sums:
+            out[f"mean_{k}"] = np.where(counts[k] > 0, sums[k] / counts[k], np.nan)
+        out["trades"] = trades.astype(int)
+        out["hit_rate"] = np.where(decided > 0, wins / decided, np.nan)
+    return out
+
+
+_worker = {}
+
+
+def _init_worker(inputs: dict):
+    _worker["inputs"] = inputs
+
+
+def _run_group(combos: pd.DataFrame) -> pd.DataFrame:
+    return _sweep_group(_worker["inputs"], combos)
+
+
+def sweep_parameters(grid: dict, all_calls: pd.DataFrame = None, inputs: dict = None,
+                     price_df: pd.DataFrame = None, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Evaluate every combination of a strategy parameter grid against the same prices and signals.
+
+    Prices and z-scores are prepared once. Combinations sharing the same z thresholds share
+    their trades and are simulated together, broadcasting over the parameter axis; distinct
+    threshold groups run in a process pool when n_jobs > 1.
+
+    Inputs:
+    grid (dict): parameter name -> list of values, e.g.
+                 {"stop_loss": [0.05, 0.1, 0.15], "upper": [0.5, 0.75, 1.0], "use_trailing": [False, True]}
+                 (names from SWEEP_PARAMS; unswept parameters use the strategy defaults)
+    all_calls (pd.DataFrame): earnings calls sentiment data (ignored if `inputs` is given)
+    inputs (dict): precomputed strategy.prepare_inputs(...) result
+    price_df (pd.DataFrame): close prices, to skip the download when building inputs
+    n_jobs (int): worker processes across threshold groups
+
+    Output:
+    results (pd.DataFrame): one row per combination with its parameters and metrics
+    (mean total/excess return, Sharpe and max drawdown across tickers, trades, hit rate)
+    """
+    if inputs is None:
+        if all_calls is None:
+            raise ValueError("sweep_parameters: pass all_calls or inputs")
+        inputs = strategy.prepare_inputs(all_calls, price_df)
+
+    combos = expand_grid(grid)
+    groups = [g for _, g in combos.groupby(["upper", "lower"], sort=False)]
+
+    if n_jobs > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(groups)), initializer=_init_worker,
+                                 initargs=(inputs,)) as ex:
+            parts = list(ex.map(_run_group, groups))
+    else:
+        parts = [_sweep_group(inputs, g) for g in groups]
+
+    order = pd.concat([g.index.to_series() for g in groups]).to_numpy()
+    results = pd.concat(parts, ignore_index=True)
+    results.index = order
+    return results.sort_index().reset_index(drop=True)
+
+
+def sweep_weightings(weightings, grid: dict = None, all_calls: pd.DataFrame = None, inputs: dict = None,
+                     price_df: pd.DataFrame = None, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Evaluate several weightings of the score columns, each over the same parameter grid.
+
+    Prices, entry positions and the per-factor statistics are prepared once; each weighting only
+    re-blends the factor z-scores (strategy.with_weights) before its sweep.
+
+    Inputs:
+    weightings (dict | list): name -> weighting, or a list of factors.WEIGHTINGS names
+    grid (dict): parameter grid for sweep_parameters (default: the strategy defaults only)
+    all_calls (pd.DataFrame): earnings calls sentiment data (ignored if `inputs` is given)
+    inputs (dict): precomputed strategy.prepare_inputs(...) result
+    price_df (pd.DataFrame): close prices, to skip the download when building inputs
+    n_jobs (int): worker processes across threshold groups
+
+    Output:
+    results (pd.DataFrame): sweep_parameters results of every weighting, with a `weighting` column
+    """
+    if inputs is None:
+        if all_calls is None:
+            raise ValueError("sweep_weightings: pass all_calls or inputs")
+        inputs = strategy.prepare_inputs(all_calls, price_df)
+    if not isinstance(weightings, dict):
+        weightings = {name: name for name in weightings}
+
+    parts = []
+    for name, weights in weightings.items():
+        results = sweep_parameters(grid or {}, inputs=strategy.with_weights(inputs, weights), n_jobs=n_jobs)
+        results.insert(0, "weighting", name)
+        parts.append(results)
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,191 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+
+# Structured events, one JSON object per line. Off unless the TELEMETRY_PATH environment
+# variable names a file (relative paths are relative to the working directory); None = in-memory only
+TELEMETRY_PATH = os.getenv("TELEMETRY_PATH") or None
+TELEMETRY_MAX_BYTES = 50 * 1024 * 1024   # the file is rotated to `<path>.1` beyond this size
+# Latency histogram bucket upper bounds, in seconds (log-spaced from 1 ms to 5 min)
+LATENCY_BUCKETS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300]
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram: count, sum, min and max are exact, quantiles are the upper
+    bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+
+class Telemetry:
+    """
+    Thread-safe recorder of timed events. Every event is aggregated in memory (latency histogram,
+    error count and the sum of its numeric fields) and, when `path` is set, appended to a JSONL
+    file as {"ts", "event", "seconds", "error", ...fields}. Once the file would grow past
+    `max_bytes` it is renamed to `<path>.1` (replacing the previous one) and a new file is
+    started, so at most about twice `max_bytes` is kept on disk.
+
+    Inputs:
+    path (str): JSONL output file (None = in-memory only)
+    buckets (list[float]): latency histogram bucket bounds, in seconds
+    max_bytes (int): size at which the file is rotated (default TELEMETRY_MAX_BYTES)
+    """
+
+    def __init__(self, path: str = None, buckets=LATENCY_BUCKETS, max_bytes: int = None):
+        self.path = path
+        self.buckets = buckets
+        self.max_bytes = TELEMETRY_MAX_BYTES if max_bytes is None else max_bytes
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def event(self, name: str, seconds: float = None, error: bool = False, **fields):
+        """Record one event, with its duration in seconds when timed."""
+        record = {"ts": round(time.time(), 3), "event": name}
+        if seconds is not None:
+            record["seconds"] = round(seconds, 6)
+        if error:
+            record["error"] = True
+        record.update(fields)
+        line = json.dumps(record, default=str) if self.path else None
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"hist": Histogram(self.buckets), "count": 0, "errors": 0, "sums": {}}
+            stats["count"] += 1
+            stats["errors"] += bool(error)
+            if seconds is not None:
+                stats["hist"].add(seconds)
+            for k, v in fields.items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    stats["sums"][k] = stats["sums"].get(k, 0) + v
+            if line is not None:
+                self._write(line + "\n")
+
+    def _write(self, line: str):
+        """Append one line to the JSONL file, rotating it first if it would grow past max_bytes (lock held)."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        size = self._file.tell()
+        if size and size + len(line.encode("utf-8")) > self.max_bytes:
+            self._file.close()
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(line)
+        self._file.flush()
+
+    @contextmanager
+    def timer(self, name: str, **fields):
+        """
+        Time a with-block and record it as one event. The yielded dict can be filled with more
+        fields inside the block; an exception marks the event as an error and propagates.
+        """
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield fields
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.event(name, time.perf_counter() - t0, error=error, **fields)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Per event: count, errors, total and quantile latencies (ms), and the total of every
+        numeric field (e.g. tokens, cost, retries, rows).
+        """
+        rows = []
+        with self._lock:
+            for name, s in sorted(self._stats.items()):
+                h = s["hist"]
+                row = {"event": name, "count": s["count"], "errors": s["errors"], "total_s": round(h.total, 3)}
+                if h.count:
+                    row.update({
+                        "mean_ms": round(1000 * h.total / h.count, 2),
+                        "p50_ms": round(1000 * h.quantile(0.5), 2),
+                        "p90_ms": round(1000 * h.quantile(0.9), 2),
+                        "p99_ms": round(1000 * h.quantile(0.99), 2),
+                        "max_ms": round(1000 * h.max, 2),
+                    })
+                row.update(s["sums"])
+                rows.append(row)
+        return pd.DataFrame(rows).set_index("event") if rows else pd.DataFrame()
+
+    def reset(self):
+        """Forget the in-memory aggregates (the JSONL file is kept)."""
+        with self._lock:
+            self._stats = {}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """The process-wide recorder, created on first use and writing to TELEMETRY_PATH (if set)."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry(TELEMETRY_PATH)
+    return _telemetry
+
+
+def set_telemetry(telemetry: Telemetry):
+    """Replace the process-wide recorder (e.g. with an in-memory one for a run); returns the previous one."""
+    global _telemetry
+    with _telemetry_lock:
+        previous, _telemetry = _telemetry, telemetry
+    return previous
+
+
+def event(name: str, seconds: float = None, error: bool = False, **fields):
+    """Record an event on the process-wide recorder."""
+    get_telemetry().event(name, seconds, error=error, **fields)
+
+
+def timer(name: str, **fields):
+    """Time a with-block on the process-wide recorder (see Telemetry.timer)."""
+    return get_telemetry().timer(name, **fields)
+
+
+def summary() -> pd.DataFrame:
+    """Summary of the process-wide recorder (see Telemetry.summary)."""
+    return get_telemetry().summary()
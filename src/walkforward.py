@@ -0,0 +1,215 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import strategy
+import sweep
+
+
+TRAIN_PERIOD = "3Y"      # length of each training window (see period_offset)
+TEST_PERIOD = "1Y"       # length of each out-of-sample window; windows step forward by this much
+ANCHORED = False         # True: every training window starts at the beginning of the data
+OBJECTIVE = "mean_sharpe"  # sweep_parameters column maximized on the training window
+
+
+def slice_inputs(inputs: dict, start: pd.Timestamp, end: pd.Timestamp) -> dict:
+    """
+    Restrict prepared inputs to start <= date < end without recomputing anything: prices are
+    sliced and each call's entry position is re-based onto the window's trading days. Calls
+    entering outside the window are dropped. Z-scores are kept as computed on the full history;
+    they are expanding (each uses only earlier calls), so they carry no look-ahead.
+
+    Output:
+    inputs (dict): same layout as strategy.prepare_inputs
+    """
+    price_df = inputs["price_df"]
+    in_window = (price_df.index >= start) & (price_df.index < end)
+    window_df = price_df.loc[in_window]
+
+    calls = {}
+    for ticker in inputs["tickers"]:
+        c = inputs["calls"][ticker]
+        days = c["calendar"].index
+        first, last = np.searchsorted(days.asi8, [pd.Timestamp(start).value, pd.Timestamp(end).value])
+        keep = (c["entry_pos"] >= first) & (c["entry_pos"] < last)
+        calls[ticker] = {
+            "dates": c["dates"][keep],
+            "z": c["z"][keep],
+            "entry_pos": c["entry_pos"][keep] - first,
+            "calendar": strategy.TradingCalendar(days[first:last]),
+        }
+    return {"tickers": list(inputs["tickers"]), "price_df": window_df, "calls": calls}
+
+
+# Period units as fixed-length DateOffset keywords and multipliers; the pandas "start" aliases
+# (YS, QS, MS) are accepted too but read as plain lengths, never snapped to period boundaries
+_PERIOD_UNITS = {"Y": ("years", 1), "A": ("years", 1), "Q": ("months", 3), "M": ("months", 1),
+                 "W": ("weeks", 1), "D": ("days", 1)}
+_PERIOD = re.compile(r"^\s*(\d*)\s*([YAQMWD])S?\s*$", re.IGNORECASE)
+
+
+def period_offset(period) -> pd.DateOffset:
+    """
+    Fixed-length offset of a window period such as "3Y", "18M", "2Q", "6MS" or "90D".
+
+    Input:
+    period (str | pd.DateOffset): period string, or an offset used as is
+
+    Output: pd.DateOffset moving a date by exactly that many years/months/weeks/days
+    """
+    if isinstance(period, pd.DateOffset):
+        return period
+    match = _PERIOD.match(str(period))
+    if match is None:
+        raise ValueError(f"period_offset: unsupported period {period!r} (expected e.g. '3Y', '6M', '2Q', '90D')")
+    unit, scale = _PERIOD_UNITS[match.group(2).upper()]
+    n = int(match.group(1) or 1)
+    if n <= 0:
+        raise ValueError(f"period_offset: period {period!r} must be positive")
+    return pd.DateOffset(**{unit: n * scale})
+
+
+def make_folds(index: pd.DatetimeIndex, train: str = None, test: str = None, anchored: bool = None) -> list:
+    """
+    Train/test windows over a date index: consecutive test windows of length `test` cover the
+    data after the first training window, each preceded by a training window of length `train`
+    (or everything before it when anchored). Periods are fixed lengths (period_offset), counted
+    from the first date of the index; test window k starts `train + k * test` after it.
+
+    Output:
+    folds (list[tuple]): (train_start, train_end, test_start, test_end), ends exclusive
+    """
+    train = period_offset(TRAIN_PERIOD if train is None else train)
+    test = period_offset(TEST_PERIOD if test is None else test)
+    anchored = ANCHORED if anchored is None else anchored
+    if len(index) == 0:
+        return []
+    first, last = index.min(), index.max()
+    data_start = first.normalize()
+
+    def shift(n_test: int) -> pd.Timestamp:
+        # data_start + train + n_test * test as one offset, so month ends don't drift
+        # (Jan 31 + 1 month + 1 month would give Mar 28)
+        kwds = dict(train.kwds)
+        for unit, n in test.kwds.items():
+            kwds[unit] = kwds.get(unit, 0) + n * n_test
+        return data_start + pd.DateOffset(**kwds)
+
+    folds = []
+    k = 0
+    test_start = shift(0)
+    while test_start <= last:
+        test_end = shift(k + 1)
+        train_start = data_start if anchored else test_start - train
+        folds.append((max(train_start, data_start), test_start, test_start, test_end))
+        test_start = test_end
+        k += 1
+    return folds
+
+
+def _daily_returns(inputs: dict, combo: pd.DataFrame) -> dict:
+    """Per-ticker daily strategy returns (pd.Series on the ticker's trading days) for one combination."""
+    upper, lower = combo["upper"].iloc[0], combo["lower"].iloc[0]
+    out = {}
+    for ticker in inputs["tickers"]:
+        px = inputs["price_df"][ticker].dropna()
+        if px.empty:
+            continue
+        prices = px.to_numpy(dtype=float)
+        rets = np.zeros(len(prices))
+        rets[1:] = prices[1:] / prices[:-1] - 1
+        calls = inputs["calls"][ticker]
+        entry_idx, exit_idx, sig = strategy.plan_trades(
+            calls["entry_pos"], strategy.signals_from_z(calls["z"], upper, lower), len(prices))
+        daily_net, _ = sweep.simulate_trades_batch(prices, rets, entry_idx, exit_idx, sig.astype(float), combo)
+        out[ticker] = pd.Series(daily_net[0], index=px.index)
+    return out
+
+
+def _run_fold(inputs: dict, fold: tuple, grid: dict, objective: str) -> dict:
+    """Select parameters on the fold's training window and evaluate them on its test window."""
+    train_start, train_end, test_start, test_end = fold
+    results = sweep.sweep_parameters(grid, inputs=slice_inputs(inputs, train_start, train_end))
+    scores = results[objective].to_numpy(dtype=float)
+    best = int(np.nanargmax(scores)) if np.isfinite(scores).any() else 0
+    combo = results.loc[[best], list(sweep.SWEEP_PARAMS)].reset_index(drop=True)
+
+    test_inputs = slice_inputs(inputs, test_start, test_end)
+    test_metrics = sweep._sweep_group(test_inputs, combo).iloc[0]
+    row = {"train_start": train_start, "train_end": train_end, "test_start": test_start, "test_end": test_end,
+           **combo.iloc[0].to_dict(), f"train_{objective}": scores[best]}
+    row.update({f"test_{k}": test_metrics[k] for k in test_metrics.index if k not in sweep.SWEEP_PARAMS})
+    return {"row": row, "daily": _daily_returns(test_inputs, combo)}
+
+
+_worker = {}
+
+
+def _init_worker(inputs: dict, grid: dict, objective: str):
+    _worker.update(inputs=inputs, grid=grid, objective=objective)
+
+
+def _run_fold_worker(fold: tuple) -> dict:
+    return _run_fold(_worker["inputs"], fold, _worker["grid"], _worker["objective"])
+
+
+def walk_forward(grid: dict, all_calls: pd.DataFrame = None, inputs: dict = None, price_df: pd.DataFrame = None,
+                 train: str = None, test: str = None, anchored: bool = None, objective: str = None,
+                 n_jobs: int = 1):
+    """
+    Walk-forward evaluation: on each fold, pick the parameter combination of `grid` that
+    maximizes `objective` over the training window, apply it to the following test window,
+    and stitch the out-of-sample results together.
+
+    Prices, z-scores and entry positions are prepared once; folds only slice them. Trades still
+    open at the end of a window are closed on its last day. Folds run in a process pool when
+    n_jobs > 1.
+
+    Inputs:
+    grid (dict): parameter grid, as for sweep.sweep_parameters
+    all_calls (pd.DataFrame): earnings calls sentiment data (ignored if `inputs` is given)
+    inputs (dict): precomputed strategy.prepare_inputs(...) result
+    price_df (pd.DataFrame): close prices, to skip the download when building inputs
+    train, test (str): window lengths, e.g. "3Y" or "6M" (see period_offset; default TRAIN_PERIOD / TEST_PERIOD)
+    anchored (bool): grow the training window from the start of the data (default ANCHORED)
+    objective (str): sweep_parameters column to maximize (default OBJECTIVE)
+    n_jobs (int): worker processes across folds
+
+    Output:
+    folds (pd.DataFrame): one row per fold with its windows, chosen parameters, training
+                          objective and out-of-sample metrics
+    curves (pd.DataFrame): stitched out-of-sample `{ticker}_sentiment` curves and the
+                           `{ticker}_buyhold` curves over the same span
+    """
+    objective = OBJECTIVE if objective is None else objective
+    if inputs is None:
+        if all_calls is None:
+            raise ValueError("walk_forward: pass all_calls or inputs")
+        inputs = strategy.prepare_inputs(all_calls, price_df)
+
+    folds = make_folds(inputs["price_df"].index, train, test, anchored)
+    if not folds:
+        raise ValueError("walk_forward: not enough data for one train/test fold")
+
+    if n_jobs > 1 and len(folds) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(folds)), initializer=_init_worker,
+                                 initargs=(inputs, grid, objective)) as ex:
+            parts = list(ex.map(_run_fold_worker, folds))
+    else:
+        parts = [_run_fold(inputs, fold, grid, objective) for fold in folds]
+
+    table = pd.DataFrame([p["row"] for p in parts])
+    table.index.name = "fold"
+
+    curves = {}
+    oos_start = folds[0][2]
+    for ticker in inputs["tickers"]:
+        pieces = [p["daily"][ticker] for p in parts if ticker in p["daily"]]
+        if not pieces:
+            continue
+        daily = pd.concat(pieces)
+        curves[f"{ticker}_sentiment"] = (1 + daily).cumprod()
+        px = inputs["price_df"][ticker].dropna()
+        px = px[px.index >= oos_start]
+        curves[f"{ticker}_buyhold"] = px / px.iloc[0]
+    return table, pd.DataFrame(curves)
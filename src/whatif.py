@@ -0,0 +1,96 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import strategy
+
+
+MAX_CACHED = 4096        # per-ticker simulations kept in memory (LRU)
+
+
+class WhatIfBacktester:
+    """
+    Interactive re-simulation over precomputed signals and prices.
+
+    Prices, returns, z-scores and entry positions are prepared once (strategy.prepare_inputs).
+    Each request then only runs the NumPy kernel for the (ticker, thresholds, parameters)
+    combinations it has not seen yet: planned trades are cached per ticker and threshold pair,
+    daily returns per ticker and full parameter set. Moving one slider back and forth, or
+    adding a ticker, recomputes nothing that is already cached.
+
+    Inputs:
+    inputs (dict): strategy.prepare_inputs(...) result
+    max_cached (int): per-ticker simulations kept in memory
+    """
+
+    def __init__(self, inputs: dict, max_cached: int = MAX_CACHED):
+        self.tickers = list(inputs["tickers"])
+        self.max_cached = max_cached
+        self._data = {}
+        for ticker in self.tickers:
+            px = inputs["price_df"][ticker].dropna()
+            prices = px.to_numpy(dtype=float)
+            if len(prices) == 0:
+                continue
+            rets = np.zeros(len(prices))
+            rets[1:] = prices[1:] / prices[:-1] - 1
+            calls = inputs["calls"][ticker]
+            self._data[ticker] = {
+                "index": px.index,
+                "prices": prices,
+                "rets": rets,
+                "entry_pos": calls["entry_pos"],
+                "z": calls["z"],
+                "buyhold": (px / px.iloc[0]).rename(f"{ticker}_buyhold"),
+            }
+        self._trades = {}
+        self._daily = OrderedDict()
+
+    def _plan(self, ticker: str, upper: float, lower: float):
+        key = (ticker, upper, lower)
+        if key not in self._trades:
+            d = self._data[ticker]
+            signals = strategy.signals_from_z(d["z"], upper, lower)
+            self._trades[key] = strategy.plan_trades(d["entry_pos"], signals, len(d["prices"]))
+        return self._trades[key]
+
+    def _simulate(self, ticker: str, params: dict, upper: float, lower: float) -> np.ndarray:
+        key = (ticker, upper, lower, tuple(sorted(params.items())))
+        if key in self._daily:
+            self._daily.move_to_end(key)
+            return self._daily[key]
+        d = self._data[ticker]
+        entry_idx, exit_idx, signals = self._plan(ticker, upper, lower)
+        daily_net = strategy.simulate_trades(d["prices"], d["rets"], entry_idx, exit_idx, signals, **params)[1]
+        self._daily[key] = daily_net
+        if len(self._daily) > self.max_cached:
+            self._daily.popitem(last=False)
+        return daily_net
+
+    def curves(self, params: dict = None, upper: float = None, lower: float = None, tickers=None) -> pd.DataFrame:
+        """
+        Strategy and buy & hold curves for a parameter set, in the layout of
+        strategy.backtest_sentiment_strategy.
+
+        Inputs:
+        params (dict): overrides of strategy.strategy_params() (position_size, stop_loss, ...)
+        upper, lower (float): z-score thresholds (default strategy.Z_UPPER / Z_LOWER)
+        tickers (list[str]): subset of tickers (all if None)
+
+        Output:
+        results (pd.DataFrame): `{ticker}_sentiment` and `{ticker}_buyhold` curves
+        """
+        full = strategy.strategy_params()
+        full.update(params or {})
+        upper = strategy.Z_UPPER if upper is None else float(upper)
+        lower = strategy.Z_LOWER if lower is None else float(lower)
+
+        results = {}
+        for ticker in (self.tickers if tickers is None else tickers):
+            if ticker not in self._data:
+                continue
+            d = self._data[ticker]
+            daily_net = self._simulate(ticker, full, upper, lower)
+            results[f"{ticker}_sentiment"] = pd.Series(np.cumprod(1 + daily_net), index=d["index"],
+                                                       name=f"{ticker}_sentiment")
+            results[f"{ticker}_buyhold"] = d["buyhold"]
+        return pd.DataFrame(results)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own empty working directory, with in-memory telemetry and no shared LLM cache."""
+    import sentiment
+    import telemetry
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sentiment, "_response_cache", None)
+    previous = telemetry.set_telemetry(telemetry.Telemetry(None))
+    yield tmp_path
+    if sentiment._response_cache is not None:
+        sentiment._response_cache.close()
+    telemetry.set_telemetry(previous)
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import sentiment
+import store
+from batch import LocalBatchSubmitter, read_batch_results
+from fakes import FakeResponsesClient, fake_scores
+
+
+class SelectiveClient(FakeResponsesClient):
+    """Fake client failing every request whose prompt mentions `marker`."""
+
+    def __init__(self, marker: str):
+        super().__init__()
+        self.marker = marker
+
+    def create(self, model=None, input="", **kwargs):
+        if self.marker in input:
+            raise RuntimeError("fake client: rejected request")
+        return super().create(model=model, input=input, **kwargs)
+
+
+def make_calls():
+    rows = []
+    for ticker in ("AAA", "BBB"):
+        for q in (1, 2):
+            rows.append({
+                "ticker": ticker,
+                "date": f"2023-{3 * q:02d}-15",
+                "year_quarter": f"2023-year/{q}-quarter",
+                "earnings_call_raw_text": f"{ticker} quarter {q}: demand was solid.",
+            })
+    rows[-1]["earnings_call_raw_text"] += " FAIL"
+    return pd.DataFrame(rows)
+
+
+def test_batch_round_trip_merges_by_custom_id():
+    calls = make_calls()
+    client = SelectiveClient("FAIL")
+    submitter = LocalBatchSubmitter("local_batches", client, polls_until_done=1)
+
+    out = sentiment.analyze_sentiment(calls, mode="batch", submitter=submitter, poll_interval=0)
+
+    # Every request went through one batch; the failed one is reported as such in the result file
+    (batch_id,) = os.listdir("local_batches")
+    results = read_batch_results(os.path.join("local_batches", batch_id, "output.jsonl"))
+    assert len(results) == len(calls)
+    failed = sentiment.custom_id({"ticker": "BBB", "year_quarter": "2023-year/2-quarter", "date": "2023-06-15"})
+    assert results[failed] is None
+
+    # Results are merged back onto the right calls; the failed call stays unprocessed
+    ok = calls.iloc[:-1]
+    assert sorted(zip(out["ticker"], out["year_quarter"])) == sorted(zip(ok["ticker"], ok["year_quarter"]))
+    for row in ok.to_dict(orient="records"):
+        got = out[(out["ticker"] == row["ticker"]) & (out["year_quarter"] == row["year_quarter"])].iloc[0]
+        prompt = sentiment.transcript_prompts(row["earnings_call_raw_text"])["full"]
+        assert json.loads(got["analysis_json"]) == fake_scores(prompt)
+        for col, value in fake_scores(prompt).items():
+            assert got[col] == pytest.approx(value)
+    assert list(store.read_scores(tickers=["BBB"])["year_quarter"]) == ["2023-year/1-quarter"]
+
+    # The next run resubmits only the failed call
+    retry = LocalBatchSubmitter("retry_batches", FakeResponsesClient())
+    out = sentiment.analyze_sentiment(calls, mode="batch", submitter=retry, poll_interval=0)
+    assert retry.llm_client.calls == 1
+    assert len(out) == len(calls)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import factors
+import strategy
+from test_strategy import random_calls
+
+
+def reference_overall_z(all_calls: pd.DataFrame) -> pd.DataFrame:
+    """
+    The original signal (before FactorSignals): each ticker's expanding z-score of the mean of
+    the score columns against its earlier calls. Sorted by (ticker, date).
+    """
+    all_calls = all_calls.fillna(0)
+    all_calls["overall_sentiment"] = all_calls[strategy.score_columns].mean(axis=1)
+    out = []
+    for ticker, ec in all_calls.groupby("ticker"):
+        ec = ec.sort_values("date").copy()
+        ec["mu"] = ec["overall_sentiment"].shift().expanding().mean()
+        ec["sig"] = ec["overall_sentiment"].shift().expanding().std()
+        ec["z_overall"] = (ec["overall_sentiment"] - ec["mu"]) / (ec["sig"] + 1e-12)
+        out.append(ec)
+    return pd.concat(out).sort_values(["ticker", "date"], kind="stable").reset_index(drop=True)
+
+
+def direct_z(all_calls: pd.DataFrame, values: np.ndarray, engine: factors.FactorSignals) -> np.ndarray:
+    """Expanding z-score of a per-call series computed on its own, in the engine's call order."""
+    df = pd.DataFrame({"ticker": all_calls["ticker"].to_numpy(), "date": pd.to_datetime(all_calls["date"]).to_numpy(),
+                       "x": values}).sort_values(["ticker", "date"], kind="stable")
+    prior = df.groupby("ticker")["x"]
+    mu = prior.transform(lambda s: s.shift().expanding().mean())
+    sig = prior.transform(lambda s: s.shift().expanding().std())
+    z = ((df["x"] - mu) / (sig + 1e-12)).set_axis(pd.MultiIndex.from_frame(df[["ticker", "date"]]))
+    order = engine.frame()
+    return z.reindex(pd.MultiIndex.from_arrays([order["ticker"], order["date"]])).to_numpy()
+
+
+@pytest.fixture
+def calls():
+    calls = random_calls(["AAA", "BBB", "CCC"], quarters=12, seed=11)
+    # Missing scores count as 0, as in the original signal
+    calls.loc[[3, 17, 30], "qa_sentiment"] = np.nan
+    return calls.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_equal_blend_reproduces_overall_sentiment_z(calls):
+    engine = factors.FactorSignals(calls, strategy.score_columns)
+    got = engine.frame("equal").sort_values(["ticker", "date"], kind="stable").reset_index(drop=True)
+    expected = reference_overall_z(calls)
+
+    assert list(got["ticker"]) == list(expected["ticker"])
+    np.testing.assert_array_equal(got["date"].to_numpy(), pd.to_datetime(expected["date"]).to_numpy())
+    np.testing.assert_array_equal(np.isnan(got["z_blend"]), np.isnan(expected["z_overall"]))
+    np.testing.assert_allclose(got["z_blend"], expected["z_overall"], rtol=1e-9, atol=1e-12)
+
+    # prepare_inputs' z is the same signal
+    inputs = strategy.prepare_inputs(calls, price_df=pd.DataFrame(1.0, index=pd.bdate_range("2021-01-01", "2024-06-30"),
+                                                                   columns=["AAA", "BBB", "CCC"]), weights="equal")
+    z = np.concatenate([inputs["calls"][t]["z"] for t in ["AAA", "BBB", "CCC"]])
+    np.testing.assert_allclose(z, expected["z_overall"], rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("weights", [
+    "risk_adjusted",
+    "outlook",
+    "fundamentals",
+    {"qa_sentiment": 3, "opening_sentiment": -0.5, "macroeconomic_reference_sentiment": 1},
+    [0.3, -1.2, 0.0, 2.0, 0.1, -0.4, 0.9],
+])
+def test_blend_equals_z_score_of_the_blended_series(calls, weights):
+    engine = factors.FactorSignals(calls, strategy.score_columns)
+    w = factors.resolve_weights(weights, strategy.score_columns)
+    blended = calls[strategy.score_columns].fillna(0).to_numpy() @ w
+
+    expected = direct_z(calls, blended, engine)
+    got = engine.blend(weights)
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+    # Scaling the weights doesn't change the z-score
+    if not isinstance(weights, str):
+        scaled = {k: 5 * v for k, v in weights.items()} if isinstance(weights, dict) else [5 * v for v in weights]
+        np.testing.assert_allclose(engine.blend(scaled), got, rtol=1e-12, atol=1e-12)
+
+
+def test_per_factor_z_and_blend_many(calls):
+    engine = factors.FactorSignals(calls, strategy.score_columns)
+    values = calls[strategy.score_columns].fillna(0).to_numpy()
+    for i, column in enumerate(strategy.score_columns):
+        np.testing.assert_allclose(engine.z[:, i], direct_z(calls, values[:, i], engine), rtol=1e-9, atol=1e-12)
+
+    many = engine.blend_many(["equal", "outlook", "risk_adjusted"])
+    for k, weights in enumerate(["equal", "outlook", "risk_adjusted"]):
+        np.testing.assert_allclose(many[:, k], engine.blend(weights), rtol=1e-12, atol=1e-12)
+
+
+def test_resolve_weights_rejects_bad_weightings():
+    with pytest.raises(ValueError):
+        factors.resolve_weights("unknown", strategy.score_columns)
+    with pytest.raises(ValueError):
+        factors.resolve_weights({"not_a_factor": 1}, strategy.score_columns)
+    with pytest.raises(ValueError):
+        factors.resolve_weights([1, 2], strategy.score_columns)
+    with pytest.raises(ValueError):
+        factors.resolve_weights(dict.fromkeys(strategy.score_columns, 0), strategy.score_columns)
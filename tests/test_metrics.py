@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from metrics import PORTFOLIO, trade_metrics
+
+
+def ledger(rows):
+    return pd.DataFrame({"ticker": pd.Categorical([t for t, _ in rows], categories=["AAA", "BBB", "CCC"]),
+                         "pnl": [p for _, p in rows]})
+
+
+def test_flat_trades_are_neither_wins_nor_losses():
+    trades = ledger([("AAA", 0.02), ("AAA", 0.0), ("AAA", -0.01), ("AAA", 0.0),
+                     ("BBB", 0.0), ("BBB", -0.03)])
+    stats = trade_metrics(trades, ["AAA", "BBB", "CCC"])
+
+    assert stats.loc["AAA", "trades"] == 4
+    assert stats.loc["AAA", "hit_rate"] == 0.5
+    assert stats.loc["AAA", "avg_win"] == 0.02
+    assert stats.loc["AAA", "avg_loss"] == -0.01
+
+    assert stats.loc["BBB", "hit_rate"] == 0.0
+    assert np.isnan(stats.loc["BBB", "avg_win"])
+    assert stats.loc["BBB", "avg_loss"] == -0.03
+
+    assert stats.loc[PORTFOLIO, "trades"] == 6
+    assert stats.loc[PORTFOLIO, "hit_rate"] == 1 / 3
+    assert np.isclose(stats.loc[PORTFOLIO, "avg_loss"], -0.02)
+
+
+def test_only_flat_trades_have_no_hit_rate():
+    stats = trade_metrics(ledger([("CCC", 0.0), ("CCC", 0.0)]), ["AAA", "BBB", "CCC"])
+    assert stats.loc["CCC", "trades"] == 2
+    assert stats.loc["CCC", ["hit_rate", "avg_win", "avg_loss"]].isna().all()
+    assert stats.loc["AAA", "trades"] == 0 and np.isnan(stats.loc["AAA", "hit_rate"])
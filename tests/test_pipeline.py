@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+import scraper
+from fakes import FakeResponsesClient
+from scraper import ScrapeLedger
+
+# AAA 2023 Q2 has no transcript and Q3 errors; every other quarter has one
+NO_TRANSCRIPT = {"AAA/transcripts/2023-year/2-quarter"}
+BROKEN = {"AAA/transcripts/2023-year/3-quarter"}
+
+
+class FakeElement:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeDriver:
+    """Selenium stand-in serving a transcript per quarter page, recording every visited URL."""
+
+    visited = []
+    _lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            self.visited.append(url)
+        if any(url.endswith(page) for page in BROKEN):
+            raise RuntimeError("page crashed")
+        self.url = url
+
+    def find_element(self, *args):
+        if any(self.url.endswith(page) for page in NO_TRANSCRIPT):
+            return FakeElement("Menu\nNo transcript yet\nFooter")
+        body = f"Revenue grew at {self.url} and management sounded confident about demand. " * 20
+        return FakeElement(f"Menu\nEarnings Call Transcript\n{body}\nFooter")
+
+    def quit(self):
+        pass
+
+
+def fake_prices(tickers, start, end):
+    index = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), name="Date")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({t: 100 * np.cumprod(1 + rng.normal(0, 0.01, len(index))) for t in tickers}, index=index)
+
+
+def run(tickers):
+    return pipeline.run_pipeline(tickers, pd.Timestamp("2023-01-01"), pd.Timestamp("2023-12-31"),
+                                 scrape_workers=1, score_workers=1, llm_client=FakeResponsesClient())
+
+
+def test_second_run_skips_quarters_the_ledger_marked(monkeypatch):
+    monkeypatch.setattr(scraper, "make_driver", FakeDriver)
+    monkeypatch.setattr(scraper, "PROBE_BEFORE_SCRAPE", False)
+    monkeypatch.setattr(pipeline, "load_prices", fake_prices)
+    FakeDriver.visited = []
+
+    scores, curves = run(["AAA", "BBB"])
+    assert len(FakeDriver.visited) == 8
+    assert sorted(scores.loc[scores["ticker"] == "AAA", "year_quarter"]) == ["2023-year/1-quarter",
+                                                                            "2023-year/4-quarter"]
+    assert list(curves.columns) == ["AAA_sentiment", "AAA_buyhold", "BBB_sentiment", "BBB_buyhold"]
+
+    ledger = ScrapeLedger(scraper.LEDGER_PATH)
+    assert ledger.get("AAA", "2023-year/2-quarter")["status"] == "missing"
+    assert ledger.get("AAA", "2023-year/3-quarter")["status"] == "failed"
+    assert ledger.summary() == {"done": 6, "missing": 1, "failed": 1}
+
+    # The missing page is negative-cached and the failed one is backing off: no browser visits
+    FakeDriver.visited = []
+    scores, _ = run(["AAA", "BBB"])
+    assert FakeDriver.visited == []
+    assert len(scores) == 6
+
+    # Once the failed quarter's backoff has passed it is retried, and only it
+    monkeypatch.setattr(scraper, "RETRY_BASE_SECONDS", 0)
+    run(["AAA"])
+    assert [url.split("/quote/")[1] for url in FakeDriver.visited] == ["AAA/transcripts/2023-year/3-quarter"]
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy
+from portfolio import build_portfolio, limit_positions
+from test_strategy import random_calls, random_walk
+
+INDEX = pd.bdate_range("2023-01-02", periods=6)
+
+
+def frame(columns: dict) -> pd.DataFrame:
+    return pd.DataFrame(columns, index=INDEX, dtype=float)
+
+
+def flat_prices(tickers):
+    return frame({t: [100.0] * len(INDEX) for t in tickers})
+
+
+def test_equal_weight_gives_each_ticker_one_slot():
+    positions = frame({"AAA": [0.65] * 6, "BBB": [0, -0.65, -0.65, -0.65, 0, 0], "CCC": [0] * 6})
+    port, w = build_portfolio(positions, flat_prices(positions), allocation="equal_weight",
+                              commission_bp=0, return_weights=True)
+    np.testing.assert_allclose(w.to_numpy(), positions.to_numpy() / 3)
+    assert list(port["n_positions"]) == [1, 2, 2, 2, 1, 1]
+    np.testing.assert_allclose(port["gross_exposure"], positions.abs().sum(axis=1) / 3)
+    np.testing.assert_allclose(port["net_exposure"], positions.sum(axis=1) / 3)
+
+
+def test_active_splits_capital_across_open_positions():
+    positions = frame({"AAA": [0.65] * 6, "BBB": [0, -0.65, -0.65, -0.65, 0, 0], "CCC": [0] * 6})
+    _, w = build_portfolio(positions, flat_prices(positions), allocation="active", commission_bp=0,
+                           return_weights=True)
+    n_open = (positions != 0).sum(axis=1).to_numpy()[:, None]
+    np.testing.assert_allclose(w.to_numpy(), positions.to_numpy() / n_open)
+
+
+def test_returns_and_costs_follow_the_weights():
+    positions = frame({"AAA": [0, 1, 1, 1, 0, 0], "BBB": [0, 0, -1, -1, -1, 0]})
+    prices = frame({"AAA": [100, 100, 110, 99, 99, 99], "BBB": [50, 50, 50, 55, 44, 44]})
+    port, w = build_portfolio(positions, prices, allocation="equal_weight", commission_bp=10, return_weights=True)
+
+    rets = prices.pct_change().fillna(0).to_numpy()
+    traded = np.abs(np.diff(w.to_numpy(), axis=0, prepend=0)).sum(axis=1)
+    expected = (w.to_numpy() * rets).sum(axis=1) - traded * 10 / 10000
+    np.testing.assert_allclose(port["return"], expected)
+    np.testing.assert_allclose(port["cost"], traded * 10 / 10000)
+    np.testing.assert_allclose(port["nav"], np.cumprod(1 + expected))
+
+
+@pytest.mark.parametrize("allocation", ["equal_weight", "active"])
+def test_gross_exposure_is_capped(allocation):
+    # 2x positions push gross exposure above the cap under either allocation
+    positions = frame({"AAA": [2.0] * 6, "BBB": [-2.0] * 6, "CCC": [0, 0, 2.0, 2.0, 2.0, 0]})
+    port, w = build_portfolio(positions, flat_prices(positions), allocation=allocation, gross_cap=0.8,
+                              commission_bp=0, return_weights=True)
+    np.testing.assert_allclose(port["gross_exposure"], 0.8)
+    np.testing.assert_allclose(w.abs().sum(axis=1), 0.8)
+    # Scaling keeps the relative weights
+    np.testing.assert_allclose(w["AAA"], -w["BBB"])
+
+    uncapped = build_portfolio(positions, flat_prices(positions), allocation=allocation, gross_cap=10, commission_bp=0)
+    divisor = 3 if allocation == "equal_weight" else (positions != 0).sum(axis=1)
+    np.testing.assert_allclose(uncapped["gross_exposure"], positions.abs().sum(axis=1) / divisor)
+    assert (uncapped["gross_exposure"] > 0.8).all()
+
+
+def test_limit_positions_keeps_slots_until_closed():
+    held = np.array([
+        [1, 1, 0, 0],
+        [1, 1, 1, 0],   # CCC finds no free slot
+        [0, 1, 1, 1],   # AAA closed: DDD takes the slot; CCC stays skipped for its whole life
+        [0, 1, 1, 1],
+        [1, 0, 0, 1],   # BBB closed: AAA re-enters
+    ], dtype=bool)
+    new_trade = held & ~np.vstack([np.zeros((1, 4), dtype=bool), held[:-1]])
+    accepted = limit_positions(held, new_trade, max_positions=2)
+    np.testing.assert_array_equal(accepted, np.array([
+        [1, 1, 0, 0],
+        [1, 1, 0, 0],
+        [0, 1, 0, 1],
+        [0, 1, 0, 1],
+        [1, 0, 0, 1],
+    ], dtype=bool))
+
+
+def test_max_positions_truncates_the_book():
+    positions = frame({"AAA": [0.65, 0.65, 0.65, 0, 0, 0], "BBB": [0, 0.65, 0.65, 0.65, 0.65, 0],
+                       "CCC": [0, 0.65, 0.65, 0.65, 0.65, 0.65]})
+    port, w = build_portfolio(positions, flat_prices(positions), allocation="equal_weight", max_positions=2,
+                              commission_bp=0, return_weights=True)
+    assert port["n_positions"].max() == 2
+    # CCC entered on the day the book was full and is never taken, even after AAA closes
+    assert (w["CCC"] == 0).all()
+    # equal_weight divides by max_positions, not by the number of tickers
+    np.testing.assert_allclose(w["AAA"], positions["AAA"] / 2)
+    np.testing.assert_allclose(w["BBB"], positions["BBB"] / 2)
+
+
+def test_float32_nav_matches_float64():
+    tickers = [f"T{i:02d}" for i in range(12)]
+    prices = random_walk(tickers, seed=7)
+    inputs = strategy.prepare_inputs(random_calls(tickers, seed=7), price_df=prices)
+    _, _, positions = strategy.backtest_sentiment_strategy(None, inputs=inputs, return_trades=True)
+
+    for allocation in ("equal_weight", "active"):
+        full = build_portfolio(positions, prices, allocation=allocation, max_positions=5)
+        half = build_portfolio(positions, prices, allocation=allocation, max_positions=5, dtype="float32",
+                               chunk_size=5)
+        np.testing.assert_allclose(half["nav"], full["nav"], rtol=1e-5)
+        np.testing.assert_array_equal(half["n_positions"], full["n_positions"])
+        assert full["nav"].iloc[-1] != 1.0
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from prices import PriceSource, PriceStore
+
+
+class FakeSource(PriceSource):
+    """
+    Business-day prices up to today, recording each fetch. Tickers in `failing` are reported
+    as failed, tickers in `listed` have no prices before their listing date, and every fetch
+    raises while `broken` is set.
+    """
+
+    def __init__(self, failing=(), listed=None):
+        self.failing = set(failing)
+        self.listed = {t: pd.Timestamp(d) for t, d in (listed or {}).items()}
+        self.broken = False
+        self.fetches = []
+
+    def fetch(self, tickers, start, end):
+        self.fetches.append((tuple(tickers), start, end))
+        if self.broken:
+            raise ConnectionError("connection reset")
+        index = pd.bdate_range(start, min(end, pd.Timestamp.today().normalize() + pd.Timedelta(days=1))
+                               - pd.Timedelta(days=1), name="Date")
+        out = pd.DataFrame(index=index)
+        for t in tickers:
+            if t in self.failing:
+                continue
+            listed = index >= self.listed.get(t, start)
+            if listed.any():
+                out[t] = np.where(listed, np.arange(len(index), dtype=float) + 100, np.nan)
+        out.attrs["failed"] = sorted(self.failing & set(tickers))
+        return out
+
+
+def test_failed_ticker_is_fetched_again():
+    source = FakeSource(failing={"BBB"})
+    store = PriceStore("cache", source)
+
+    first = store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+    assert first["AAA"].notna().all() and first["BBB"].isna().all()
+
+    source.failing.clear()
+    second = store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+    assert source.fetches[-1][0] == ("BBB",)
+    assert second["BBB"].notna().all()
+
+    # Both are covered now: nothing is fetched
+    store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+    assert len(source.fetches) == 2
+
+
+def test_empty_store_and_empty_fetch_returns_empty_frame():
+    store = PriceStore("cache", FakeSource(failing={"AAA", "BBB"}))
+
+    out = store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+
+    assert out.empty and isinstance(out.index, pd.DatetimeIndex)
+    assert list(out.columns) == ["AAA", "BBB"]
+
+    # A second request on the (empty) saved store behaves the same
+    out = store.get(["AAA"], "2023-01-02", "2023-02-01")
+    assert out.empty and isinstance(out.index, pd.DatetimeIndex)
+
+
+def test_empty_fetch_is_covered():
+    # BBB lists in March: January has no prices, and that is not fetched again
+    source = FakeSource(listed={"BBB": "2023-03-01"})
+    store = PriceStore("cache", source)
+
+    first = store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+    assert first["AAA"].notna().all() and first["BBB"].isna().all()
+    store.get(["AAA", "BBB"], "2023-01-02", "2023-02-01")
+    assert len(source.fetches) == 1
+
+    # Extending the range fetches only the new dates
+    out = store.get(["BBB"], "2023-01-02", "2023-04-01")
+    assert source.fetches[-1] == (("BBB",), pd.Timestamp("2023-02-01"), pd.Timestamp("2023-04-01"))
+    assert out["BBB"].first_valid_index() == pd.Timestamp("2023-03-01")
+
+
+def test_fetch_errors_are_fetched_again(capsys):
+    source = FakeSource()
+    store = PriceStore("cache", source)
+    source.broken = True
+
+    out = store.get(["AAA"], "2023-01-02", "2023-02-01")
+    assert out.empty
+    assert "Price fetch failed" in capsys.readouterr().out
+
+    source.broken = False
+    out = store.get(["AAA"], "2023-01-02", "2023-02-01")
+    assert len(source.fetches) == 2 and out["AAA"].notna().all()
+
+
+def test_dates_after_today_are_fetched_again():
+    source = FakeSource()
+    store = PriceStore("cache", source)
+    today = pd.Timestamp.today().normalize()
+    end = today + pd.Timedelta(days=30)
+
+    store.get(["AAA"], today - pd.Timedelta(days=30), end)
+    store.get(["AAA"], today - pd.Timedelta(days=30), end)
+    # The second request only asks for the days after today
+    assert len(source.fetches) == 2
+    assert source.fetches[-1] == (("AAA",), today + pd.Timedelta(days=1), end)
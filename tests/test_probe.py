@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from probe import TranscriptIndex
+
+AAA_LISTED = ["2023-year/1-quarter", "2023-year/2-quarter", "2023-year/4-quarter", "2024-year/1-quarter"]
+
+
+class TranscriptSite(BaseHTTPRequestHandler):
+    """
+    Stub transcript site, recording every requested path:
+      - AAA: listing page linking four quarters, 2023 Q3 missing, and quarter pages before 2023 gone
+      - BBB: 404 everywhere (ticker not covered)
+      - CCC: listing rendered only by JavaScript, and a 404 page for 2023 Q2
+    """
+
+    hits = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        # /quote/{ticker}/transcripts/[{year}-year/{quarter}-quarter]
+        ticker, rest = self.path.split("/")[2], "/".join(self.path.split("/")[4:])
+        if ticker == "BBB":
+            code, body = 404, "not found"
+        elif not rest and ticker == "AAA":
+            code, body = 200, "".join(f'<a href="/quote/AAA/transcripts/{q}">{q}</a>' for q in AAA_LISTED)
+        elif not rest:
+            code, body = 200, '<div id="root"></div>'
+        elif (ticker, rest) == ("CCC", "2023-year/2-quarter") or rest.startswith("2022"):
+            code, body = 404, ""
+        else:
+            code, body = 200, "<html></html>"
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+
+@pytest.fixture
+def base_url():
+    TranscriptSite.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TranscriptSite)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/quote/{{ticker}}/transcripts/"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+JOBS = [
+    ("AAA", "2022-year/4-quarter"), ("AAA", "2023-year/1-quarter"), ("AAA", "2023-year/3-quarter"),
+    ("AAA", "2024-year/1-quarter"), ("AAA", "2024-year/2-quarter"),
+    ("BBB", "2023-year/1-quarter"),
+    ("CCC", "2023-year/1-quarter"), ("CCC", "2023-year/2-quarter"),
+]
+
+
+def test_filter_jobs_keeps_only_scrapable_quarters(base_url):
+    index = TranscriptIndex(base_url, path="idx.json", limiter=None)
+    kept, skipped = index.filter_jobs(JOBS)
+
+    assert kept == [("AAA", "2023-year/1-quarter"), ("AAA", "2024-year/1-quarter"), ("AAA", "2024-year/2-quarter"),
+                    ("CCC", "2023-year/1-quarter")]
+    assert skipped == [
+        ("AAA", "2022-year/4-quarter", "page not found"),
+        ("AAA", "2023-year/3-quarter", "quarter not listed"),
+        ("BBB", "2023-year/1-quarter", "ticker not covered"),
+        ("CCC", "2023-year/2-quarter", "page not found"),
+    ]
+
+    saved = json.load(open("idx.json"))
+    assert saved["AAA"]["status"] == "listed" and saved["AAA"]["quarters"] == AAA_LISTED
+    assert saved["BBB"]["status"] == "not_covered"
+    assert saved["CCC"]["status"] == "unknown" and saved["CCC"]["missing"] == ["2023-year/2-quarter"]
+
+
+def test_cached_index_is_reused_until_the_ttl(base_url):
+    first = TranscriptIndex(base_url, path="idx.json", ttl_days=1, limiter=None)
+    expected = first.filter_jobs(JOBS)
+
+    # A new instance reads the cache file: same verdicts, no listing is fetched and missing pages
+    # are not probed again; only kept quarters the listing cannot vouch for are re-probed
+    TranscriptSite.hits.clear()
+    second = TranscriptIndex(base_url, path="idx.json", ttl_days=1, limiter=None)
+    assert second.filter_jobs(JOBS) == expected
+    assert sorted(TranscriptSite.hits) == ["/quote/AAA/transcripts/2024-year/2-quarter",
+                                           "/quote/CCC/transcripts/2023-year/1-quarter"]
+
+    # Past the TTL the listing is fetched again
+    TranscriptSite.hits.clear()
+    fetched_at = second.entries["AAA"]["fetched_at"]
+    entry = second.lookup("AAA", now=fetched_at + 86400 + 1)
+    assert TranscriptSite.hits == ["/quote/AAA/transcripts/"]
+    assert entry["quarters"] == AAA_LISTED and entry["fetched_at"] > fetched_at
@@ -0,0 +1,139 @@
+import os
+
+import pandas as pd
+import pytest
+
+import sentiment
+import store
+from fakes import FakeResponsesClient, fake_scores
+
+
+def make_calls(tickers=("AAA", "BBB"), quarters=3):
+    rows = []
+    for ticker in tickers:
+        for q in range(1, quarters + 1):
+            rows.append({
+                "ticker": ticker,
+                "date": f"2023-{3 * q:02d}-15",
+                "year_quarter": f"2023-year/{q}-quarter",
+                "url": "",
+                "earnings_call_raw_text": f"{ticker} quarter {q}: revenue grew and margins held steady.",
+            })
+    return pd.DataFrame(rows)
+
+
+class CountingLimiter(sentiment.RateLimiter):
+    """Unlimited rate limiter counting its acquisitions."""
+
+    def __init__(self):
+        super().__init__(None, None)
+        self.acquired = 0
+
+    def acquire(self, tokens: int):
+        self.acquired += 1
+        super().acquire(tokens)
+
+
+def expected_scores(text: str) -> dict:
+    prompts = sentiment.transcript_prompts(text)
+    assert list(prompts) == ["full"]
+    return fake_scores(prompts["full"])
+
+
+def test_analyze_sentiment_writes_processed_rows_to_the_store():
+    calls = make_calls()
+    client = FakeResponsesClient(seed=0)
+    limiter = CountingLimiter()
+
+    out = sentiment.analyze_sentiment(calls, max_concurrency=4, llm_client=client, limiter=limiter)
+
+    assert len(out) == len(calls)
+    assert client.calls == len(calls) and limiter.acquired == len(calls)
+    assert client.max_in_flight <= 4
+    for ticker, group in calls.groupby("ticker"):
+        proc = store.read_scores(tickers=[ticker])
+        assert sorted(proc["year_quarter"]) == sorted(group["year_quarter"])
+        for row in group.to_dict(orient="records"):
+            got = proc[proc["year_quarter"] == row["year_quarter"]].iloc[0]
+            for col, value in expected_scores(row["earnings_call_raw_text"]).items():
+                assert got[col] == pytest.approx(value)
+
+    # A second run finds everything processed and makes no requests
+    sentiment.analyze_sentiment(calls, llm_client=client, limiter=limiter)
+    assert client.calls == len(calls)
+
+
+def test_call_gpt_nano_retries_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(sentiment, "backoff_delay", lambda attempt: delays.append(attempt) or 0.0)
+    client = FakeResponsesClient(fail_first=2)
+    limiter = CountingLimiter()
+
+    txt = sentiment.call_gpt_nano("prompt", max_retries=5, llm_client=client, limiter=limiter)
+
+    assert sentiment.safe_json_load(txt) == fake_scores(sentiment.request_params("prompt")["input"])
+    assert client.calls == 3 and client.errors == 2
+    assert limiter.acquired == 3          # every attempt waits on the limiter
+    assert delays == [0, 1]               # exponential backoff after each failure
+
+
+def test_call_gpt_nano_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(sentiment, "backoff_delay", lambda attempt: 0.0)
+    client = FakeResponsesClient(fail_first=10)
+
+    assert sentiment.call_gpt_nano("prompt", max_retries=3, llm_client=client) is None
+    assert client.calls == 3
+
+
+def test_analyze_sentiment_recovers_from_transient_failures(monkeypatch):
+    monkeypatch.setattr(sentiment, "backoff_delay", lambda attempt: 0.0)
+    calls = make_calls(tickers=("AAA",))
+    client = FakeResponsesClient(fail_first=2)
+
+    out = sentiment.analyze_sentiment(calls, max_concurrency=1, llm_client=client, limiter=CountingLimiter())
+
+    assert client.calls == len(calls) + 2
+    assert out[sentiment._result_cols()].notna().all().all()
+
+
+class GarbageClient(FakeResponsesClient):
+    """Fake client answering with text that is not JSON."""
+
+    def create(self, **kwargs):
+        resp = super().create(**kwargs)
+        resp.output_text = "Sorry, I cannot help with that."
+        return resp
+
+
+def test_fake_client_bypasses_shared_cache():
+    sentiment.analyze_sentiment(make_calls(), llm_client=FakeResponsesClient(), limiter=CountingLimiter())
+
+    assert sentiment._response_cache is None
+    assert not os.path.exists(sentiment.RESPONSE_CACHE_PATH)
+
+
+def test_only_parseable_responses_are_cached():
+    from llm_cache import ResponseCache
+
+    cache = ResponseCache("cache.sqlite")
+    key = sentiment.prompt_key("prompt")
+
+    assert sentiment.call_gpt_nano("prompt", llm_client=GarbageClient(), cache=cache)
+    assert cache.get(key) is None
+
+    txt = sentiment.call_gpt_nano("prompt", llm_client=FakeResponsesClient(), cache=cache)
+    assert cache.get(key) == txt
+    client = FakeResponsesClient()
+    assert sentiment.call_gpt_nano("prompt", llm_client=client, cache=cache) == txt
+    assert client.calls == 0
+    cache.close()
+
+
+def test_calls_are_scored_with_one_prompt_by_default(monkeypatch):
+    text = ("Operator: welcome to the call.\n" + "Revenue grew and margins held steady. " * 30
+            + "\nOperator: we will now begin the question-and-answer session.\n" + "Analyst: how is demand? " * 30)
+    assert sentiment.transcript_prompts(text) == {"full": sentiment.build_prompt(text)}
+
+    # Sectioned scoring splits the same call, so its scores would not compare with the history
+    monkeypatch.setattr(sentiment, "SECTIONED_SCORING", True)
+    assert set(sentiment.transcript_prompts(text)) == {"prepared", "qa"}
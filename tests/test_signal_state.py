@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy
+from signal_state import SignalState
+from test_strategy import random_calls, random_walk
+
+
+@pytest.fixture
+def history():
+    """Calls of AAA and BBB from 2021, a second AAA call on an existing call date, and CCC listed from 2022."""
+    calls = random_calls(["AAA", "BBB"], quarters=10, seed=3)
+    extra = random_calls(["AAA"], quarters=10, seed=4).iloc[[5]]
+    extra["date"] = calls.loc[(calls["ticker"] == "AAA"), "date"].iloc[5]
+    late = random_calls(["CCC"], quarters=10, seed=5)
+    late = late[late["date"] >= "2022-01-01"]
+    calls = pd.concat([calls, extra, late], ignore_index=True)
+    return calls, random_walk(["AAA", "BBB", "CCC"], seed=3)
+
+
+def full_recompute(calls: pd.DataFrame, prices: pd.DataFrame, ticker: str):
+    """backtest_sentiment_strategy of one ticker over its price window (first call - 10 days on)."""
+    own = calls[calls["ticker"] == ticker]
+    lo, _ = strategy.price_window(pd.to_datetime(own["date"]))
+    px = prices.loc[prices.index >= lo, [ticker]]
+    inputs = strategy.prepare_inputs(own, price_df=px)
+    return strategy.backtest_sentiment_strategy(None, inputs=inputs, return_trades=True)
+
+
+@pytest.mark.parametrize("cutoffs", [
+    ["2021-09-30", "2022-03-31", "2022-05-15", "2023-12-31"],
+    ["2021-06-30", "2021-12-31", "2022-06-30", "2022-12-31", "2023-06-30", "2023-12-31"],
+])
+def test_incremental_refreshes_match_a_full_recompute(history, cutoffs):
+    calls, prices = history
+    state = SignalState(path="state.json")
+    curves = pd.DataFrame()
+
+    for cutoff in pd.to_datetime(cutoffs):
+        # Every refresh passes the whole history so far and prices up to the cutoff
+        seen = calls[pd.to_datetime(calls["date"]) <= cutoff]
+        px = prices[prices.index <= cutoff]
+        curves = state.update(seen, price_df=px).combine_first(curves)
+
+        for ticker in sorted(seen["ticker"].unique()):
+            expected, _, positions = full_recompute(seen, px, ticker)
+            for col in (f"{ticker}_sentiment", f"{ticker}_buyhold"):
+                got = curves[col].dropna()
+                pd.testing.assert_index_equal(got.index, expected[col].index)
+                np.testing.assert_allclose(got.to_numpy(), expected[col].to_numpy(), rtol=1e-12, atol=0)
+            assert state.tickers[ticker]["position"] == positions[ticker].dropna().iloc[-1]
+
+
+def test_state_file_resumes_where_it_stopped(history):
+    calls, prices = history
+    cutoffs = pd.to_datetime(["2022-03-31", "2023-12-31"])
+    curves = pd.DataFrame()
+    for cutoff in cutoffs:
+        # A fresh instance per refresh: everything carries over through the state file
+        seen = calls[pd.to_datetime(calls["date"]) <= cutoff]
+        curves = SignalState(path="state.json").update(seen, price_df=prices[prices.index <= cutoff]).combine_first(curves)
+
+    state = SignalState(path="state.json")
+    for ticker in ("AAA", "BBB", "CCC"):
+        expected, _, positions = full_recompute(calls, prices[prices.index <= cutoffs[-1]], ticker)
+        np.testing.assert_allclose(curves[f"{ticker}_sentiment"].dropna().to_numpy(),
+                                   expected[f"{ticker}_sentiment"].to_numpy(), rtol=1e-12, atol=0)
+        assert state.tickers[ticker]["position"] == positions[ticker].dropna().iloc[-1]
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import store
+
+
+def transcripts(tickers=("AAA", "BBB"), years=(2022, 2023), text="call"):
+    rows = []
+    for ticker in tickers:
+        for year in years:
+            for q in (1, 2, 3, 4):
+                rows.append({"ticker": ticker, "year_quarter": f"{year}-year/{q}-quarter",
+                             "date": f"{year}-{3 * q:02d}-15", "earnings_call_raw_text": f"{ticker} {year}Q{q} {text}"})
+    return pd.DataFrame(rows)
+
+
+def scores(calls, value=0.5):
+    out = calls[["ticker", "year_quarter", "date"]].copy()
+    for c in store.SCORE_COLUMNS:
+        out[c] = value
+    out["analysis_json"] = "{}"
+    return out
+
+
+def test_upsert_replaces_rows_with_the_same_key():
+    assert store.write_transcripts(transcripts()) == 16
+    store.write_transcripts(transcripts(tickers=("AAA",), years=(2023,), text="rescraped"))
+
+    df = store.read_transcripts()
+    assert len(df) == 16
+    assert not df.duplicated(["ticker", "year_quarter"]).any()
+    aaa_2023 = df[(df["ticker"] == "AAA") & (df["date"].dt.year == 2023)]
+    assert aaa_2023["earnings_call_raw_text"].str.endswith("rescraped").all()
+    assert df[df["ticker"] == "BBB"]["earnings_call_raw_text"].str.endswith(" call").all()
+
+    store.write_scores(scores(transcripts(), 0.1))
+    store.write_scores(scores(transcripts(tickers=("BBB",), years=(2022,)), 0.9))
+    s = store.read_scores()
+    assert len(s) == 16
+    bbb_2022 = (s["ticker"] == "BBB") & (s["date"].dt.year == 2022)
+    assert np.all(s.loc[bbb_2022, store.SCORE_COLUMNS] == 0.9)
+    assert np.all(s.loc[~bbb_2022, store.SCORE_COLUMNS] == 0.1)
+
+
+def test_reads_only_touch_matching_partitions():
+    store.write_transcripts(transcripts(tickers=("AAA", "BBB", "CCC")))
+    store.write_scores(scores(transcripts(tickers=("AAA", "BBB", "CCC"))))
+
+    # Corrupt partitions the reads below must prune: reading them would raise
+    for kind, ticker, year in [(store.TRANSCRIPTS, "CCC", 2022), (store.TRANSCRIPTS, "BBB", 2022),
+                               (store.SCORES, "CCC", 2023)]:
+        with open(os.path.join(store._partition_dir(kind, ticker, year), "part-0.parquet"), "wb") as f:
+            f.write(b"not parquet")
+
+    df = store.read_transcripts(tickers=["AAA", "BBB"], start_date="2023-04-01", end_date="2023-09-30")
+    assert sorted(zip(df["ticker"], df["year_quarter"])) == [
+        ("AAA", "2023-year/2-quarter"), ("AAA", "2023-year/3-quarter"),
+        ("BBB", "2023-year/2-quarter"), ("BBB", "2023-year/3-quarter"),
+    ]
+    meta = store.read_transcripts(tickers=["AAA"], columns=["ticker", "year_quarter", "date"])
+    assert len(meta) == 8 and "earnings_call_raw_text" not in meta.columns
+
+    s = store.read_scores(tickers=["AAA", "BBB"], columns=["qa_sentiment"])
+    assert len(s) == 16 and list(s.columns) == ["ticker", "year_quarter", "date", "qa_sentiment"]
+
+
+def test_migrate_csv_layout_is_idempotent():
+    calls = transcripts()
+    for ticker, group in calls.groupby("ticker"):
+        os.makedirs(os.path.join("earnings_calls", ticker))
+        group.drop(columns="ticker").assign(ticker=ticker).to_csv(
+            os.path.join("earnings_calls", ticker, "scraped_earnings_calls.csv"), index=False)
+        scores(group).to_csv(os.path.join("earnings_calls", ticker, "processed_earnings_calls.csv"), index=False)
+
+    assert store.migrate_csv_layout() == {store.TRANSCRIPTS: 16, store.SCORES: 16}
+    store.migrate_csv_layout()
+    df = store.read_transcripts()
+    assert len(df) == 16
+    assert sorted(df["earnings_call_raw_text"]) == sorted(calls["earnings_call_raw_text"])
+    assert len(store.read_scores()) == 16
+
+    # ensure_migrated runs the migration once per store
+    store.ensure_migrated()
+    assert os.path.exists(os.path.join(store.STORE_PATH, store.MIGRATED_MARKER))
+    os.remove(os.path.join("earnings_calls", "AAA", "scraped_earnings_calls.csv"))
+    calls.iloc[:1].assign(earnings_call_raw_text="changed").to_csv(
+        os.path.join("earnings_calls", "AAA", "scraped_earnings_calls.csv"), index=False)
+    store.ensure_migrated()
+    assert "changed" not in set(store.read_transcripts(tickers=["AAA"])["earnings_call_raw_text"])
@@ -0,0 +1,275 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy
+
+
+def random_walk(tickers, start="2021-01-01", end="2023-12-31", seed=0) -> pd.DataFrame:
+    """Seeded random-walk close prices on business days (dates x tickers)."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, end)
+    steps = rng.normal(0.0003, 0.025, (len(index), len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=list(tickers))
+
+
+def random_calls(tickers, quarters=10, seed=0) -> pd.DataFrame:
+    """Quarterly calls with seeded random scores, dated a few days into each quarter."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for ticker in tickers:
+        for q, quarter in enumerate(pd.date_range("2021-02-01", periods=quarters, freq="QS-FEB")):
+            row = {"ticker": ticker, "date": quarter + pd.Timedelta(days=int(rng.integers(0, 20)))}
+            row.update({c: round(float(rng.uniform(-1, 1)), 3) for c in strategy.score_columns})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def reference_daily_net(px: pd.Series, ec: pd.DataFrame, params: dict) -> pd.Series:
+    """
+    The original per-day backtest loop (before the NumPy kernel), kept as the reference the
+    kernel must reproduce. `ec` holds one ticker's calls (date, signal), sorted by date.
+    """
+    rets = px.pct_change().fillna(0.0)
+    trading_index = px.index
+
+    def next_trading_day(d):
+        if d in trading_index:
+            i = trading_index.get_loc(d)
+            return trading_index[min(i + 1, len(trading_index) - 1)]
+        else:
+            i = trading_index.get_indexer([d], method='bfill')[0]
+            return trading_index[i]
+
+    ec = ec.copy()
+    ec['entry_date'] = ec['date'].apply(next_trading_day)
+    ec = ec.dropna(subset=['entry_date'])
+
+    pos = pd.Series(0.0, index=trading_index)
+    trade_entries, trade_exits = [], []
+
+    for i, row in ec.iterrows():
+        sig = row['signal']
+        if sig == 0:
+            continue
+
+        entry = row['entry_date']
+        nxt = ec.loc[ec['entry_date'] > entry, 'entry_date'].min()
+        last = trading_index[-1]
+        exit_plan = nxt if pd.notna(nxt) else last
+
+        if entry not in trading_index:
+            entry = trading_index[trading_index.get_indexer([entry], method='bfill')[0]]
+        if exit_plan not in trading_index:
+            exit_plan = trading_index[trading_index.get_indexer([exit_plan], method='bfill')[0]]
+
+        entry_price = px.loc[entry]
+        best_fav = 0.0
+        actual_exit = exit_plan
+
+        window = pos.loc[entry:exit_plan].index
+        for d in window:
+            pnl = sig * (px.loc[d] / entry_price - 1.0)
+            if pnl > best_fav:
+                best_fav = pnl
+
+            stopped = False
+            if pnl <= -params["stop_loss"]:
+                actual_exit = d; stopped = True
+            elif pnl >= params["take_profit"]:
+                actual_exit = d; stopped = True
+            elif params["use_trailing"] and best_fav > 0 and (best_fav - pnl) >= params["trail_giveup"]:
+                actual_exit = d; stopped = True
+
+            pos.loc[d] = sig * params["position_size"]
+            if stopped:
+                break
+
+        start_idx = trading_index.get_loc(actual_exit)
+        end_idx = trading_index.get_loc(exit_plan)
+        if start_idx + 1 <= end_idx:
+            pos.loc[trading_index[start_idx + 1: end_idx + 1]] = 0.0
+
+        trade_entries.append(entry)
+        trade_exits.append(actual_exit)
+
+    strategy_daily = (pos * rets).fillna(0.0)
+    per_side_cost = params["commission_bp"] / 10000.0
+    cost_series = pd.Series(0.0, index=rets.index)
+    for d in trade_entries:
+        cost_series.loc[d] -= per_side_cost
+    for d in trade_exits:
+        cost_series.loc[d] -= per_side_cost
+    return (strategy_daily + cost_series).astype(float)
+
+
+def reference_backtest(all_calls: pd.DataFrame, price_df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    """The original backtest_sentiment_strategy, on given prices and with explicit parameters."""
+    all_calls = all_calls.fillna(0)
+    all_calls['overall_sentiment'] = all_calls[strategy.score_columns].mean(axis=1)
+    earnings_call_df = all_calls[['date', 'ticker', 'overall_sentiment']].copy()
+    earnings_call_df['date'] = pd.to_datetime(earnings_call_df['date'])
+
+    results = {}
+    for ticker in earnings_call_df['ticker'].unique():
+        px = price_df[ticker].dropna()
+        ec = earnings_call_df[earnings_call_df.ticker == ticker].sort_values('date').copy()
+        ec['mu'] = ec['overall_sentiment'].shift().expanding().mean()
+        ec['sig'] = ec['overall_sentiment'].shift().expanding().std()
+        ec['z_overall'] = (ec['overall_sentiment'] - ec['mu']) / (ec['sig'] + 1e-12)
+        ec['signal'] = 0
+        ec.loc[ec['z_overall'] >= strategy.Z_UPPER, 'signal'] = 1
+        ec.loc[ec['z_overall'] <= strategy.Z_LOWER, 'signal'] = -1
+
+        daily_net = reference_daily_net(px, ec[['date', 'signal']], params)
+        results[f"{ticker}_sentiment"] = (1 + daily_net).cumprod()
+        results[f"{ticker}_buyhold"] = px / px.iloc[0]
+    return pd.DataFrame(results)
+
+
+def kernel_daily_net(px: pd.Series, ec: pd.DataFrame, params: dict) -> np.ndarray:
+    entry_pos = strategy.TradingCalendar(px.index).entry_positions(ec['date'])
+    return strategy.simulate_ticker(px.to_numpy(dtype=float), entry_pos, ec['signal'].to_numpy(), params)[1]
+
+
+@pytest.fixture(params=[False, True], ids=["fixed_stops", "trailing"])
+def params(request, monkeypatch):
+    monkeypatch.setattr(strategy, "USE_TRAILING", request.param)
+    monkeypatch.setattr(strategy, "TRAIL_GIVEUP", 0.05)
+    monkeypatch.setattr(strategy, "STOP_LOSS", 0.08)
+    monkeypatch.setattr(strategy, "TAKE_PROFIT", 0.12)
+    return strategy.strategy_params()
+
+
+def test_backtest_matches_reference_loop(params):
+    tickers = ["AAA", "BBB", "CCC", "DDD"]
+    price_df = random_walk(tickers, seed=1)
+    calls = random_calls(tickers, quarters=11, seed=2)
+
+    expected = reference_backtest(calls, price_df, params)
+    inputs = strategy.prepare_inputs(calls, price_df=price_df)
+    curves = strategy.backtest_sentiment_strategy(None, inputs=inputs)
+
+    assert list(curves.columns) == list(expected.columns)
+    np.testing.assert_array_equal(curves.to_numpy(), expected.to_numpy())
+    # The stops are exercised, not just the planned exits
+    _, trades, _ = strategy.backtest_sentiment_strategy(None, inputs=inputs, return_trades=True)
+    assert set(trades["exit_reason"]) - {"next_call", "end_of_data"}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kernel_matches_reference_loop_on_edge_cases(params, seed):
+    rng = np.random.default_rng(seed)
+    px = random_walk(["X"], start="2022-01-03", end="2022-12-30", seed=seed)["X"]
+    days = px.index
+    dates = [
+        days[0] - pd.Timedelta(days=30),          # before the price range
+        days[0] - pd.Timedelta(days=3),           # also maps to the first entry day
+        days[40],                                 # on a trading day: enters the next day
+        days[40] + pd.Timedelta(hours=12),        # between trading days: same entry day as above
+        days[90],
+        days[150] + pd.Timedelta(hours=6),
+        days[151],                                # same entry day as the previous call
+        days[200],
+        days[-1],                                 # last trading day: clamps to it
+        days[-1] + pd.Timedelta(days=20),         # after the price range
+    ]
+    ec = pd.DataFrame({"date": pd.DatetimeIndex(dates), "signal": rng.choice([-1, 0, 0, 1], len(dates))})
+    ec.loc[2, "signal"] = 1                       # a same-day pair with at least one trade
+    ec.loc[6, "signal"] = -1
+
+    expected = reference_daily_net(px, ec, params)
+    np.testing.assert_array_equal(kernel_daily_net(px, ec, params), expected.to_numpy())
+
+
+def test_kernel_ignores_signal_zero_calls_except_as_exits(params):
+    px = random_walk(["X"], start="2022-01-03", end="2022-06-30", seed=7)["X"]
+    days = px.index
+    ec = pd.DataFrame({"date": [days[5], days[30], days[60]], "signal": [1, 0, 0]})
+
+    expected = reference_daily_net(px, ec, params)
+    np.testing.assert_array_equal(kernel_daily_net(px, ec, params), expected.to_numpy())
+    no_trades = ec.assign(signal=0)
+    assert not kernel_daily_net(px, no_trades, params).any()
+
+
+def test_batch_kernel_rows_match_single_runs():
+    rng = np.random.default_rng(3)
+    prices = random_walk(["X"], start="2022-01-03", end="2022-12-30", seed=3)["X"].to_numpy()
+    rets = np.zeros(len(prices))
+    rets[1:] = prices[1:] / prices[:-1] - 1
+    entry_pos = np.sort(rng.choice(len(prices), 12, replace=False))
+    entry_idx, exit_idx, signals = strategy.plan_trades(entry_pos, rng.choice([-1, 1], 12), len(prices))
+    combos = [
+        {"position_size": size, "stop_loss": sl, "take_profit": tp, "use_trailing": trail,
+         "trail_giveup": 0.04, "commission_bp": bp}
+        for size, sl, tp, trail, bp in [(0.65, 0.15, 0.5, False, 2), (1.0, 0.05, 0.1, True, 0),
+                                        (0.3, 0.08, 0.2, True, 5), (0.5, 0.5, 1.0, False, 2)]
+    ]
+
+    batch = strategy.simulate_trades_batch(prices, rets, entry_idx, exit_idx, signals,
+                                           **{k: [c[k] for c in combos] for k in combos[0]})
+    for p, combo in enumerate(combos):
+        single = strategy.simulate_trades(prices, rets, entry_idx, exit_idx, signals, **combo)
+        for got, expected in zip(batch, single):
+            np.testing.assert_array_equal(got[p], expected)
+
+
+def test_empty_calendar_maps_to_no_positions():
+    calendar = strategy.TradingCalendar(pd.DatetimeIndex([]))
+    assert len(calendar.entry_positions(pd.DatetimeIndex(["2023-01-05", "2023-02-01"]))) == 0
+
+
+def test_tickers_without_prices_are_skipped(capsys):
+    price_df = random_walk(["AAA", "BBB", "CCC"], seed=4)
+    price_df["BBB"] = np.nan                           # all-NaN column
+    calls = random_calls(["AAA", "BBB", "CCC", "ZZZ"], seed=5)   # ZZZ has no price column at all
+
+    inputs = strategy.prepare_inputs(calls, price_df=price_df)
+    curves, trades, positions = strategy.backtest_sentiment_strategy(None, inputs=inputs, return_trades=True)
+
+    assert inputs["tickers"] == ["AAA", "CCC"]
+    assert list(curves.columns) == ["AAA_sentiment", "AAA_buyhold", "CCC_sentiment", "CCC_buyhold"]
+    assert list(positions.columns) == ["AAA", "CCC"]
+    out = capsys.readouterr().out
+    assert "No prices for BBB" in out and "No prices for ZZZ" in out
+
+    # The remaining tickers are simulated exactly as on their own
+    alone = strategy.prepare_inputs(calls[calls["ticker"] == "CCC"], price_df=price_df[["CCC"]])
+    np.testing.assert_array_equal(curves["CCC_sentiment"].to_numpy(),
+                                  strategy.backtest_sentiment_strategy(None, inputs=alone)["CCC_sentiment"].to_numpy())
+
+
+@pytest.mark.parametrize("n_jobs, chunk_size", [(2, None), (3, 2)])
+def test_parallel_backtest_matches_serial(params, n_jobs, chunk_size):
+    tickers = [f"T{i}" for i in range(7)]
+    price_df = random_walk(tickers, seed=8)
+    # Late listings and an early delisting leave NaN gaps in the shared price matrix
+    price_df.loc[price_df.index < "2021-09-01", "T2"] = np.nan
+    price_df.loc[price_df.index < "2022-03-01", "T5"] = np.nan
+    price_df.loc[price_df.index > "2023-03-31", "T4"] = np.nan
+    inputs = strategy.prepare_inputs(random_calls(tickers, quarters=11, seed=8), price_df=price_df)
+
+    serial = strategy.backtest_sentiment_strategy(None, inputs=inputs, n_jobs=1, return_trades=True)
+    parallel = strategy.backtest_sentiment_strategy(None, inputs=inputs, n_jobs=n_jobs, chunk_size=chunk_size,
+                                                    return_trades=True)
+
+    for got, expected in zip(parallel, serial):
+        pd.testing.assert_frame_equal(got, expected)
+    assert len(serial[1]) and set(serial[1]["exit_reason"]) - {"next_call", "end_of_data"}
+
+
+def test_entry_positions_match_reference_next_trading_day():
+    days = random_walk(["X"], start="2022-01-03", end="2022-12-30").index
+    rng = np.random.default_rng(6)
+    dates = pd.DatetimeIndex(sorted(days[0] - pd.Timedelta(days=40)
+                                    + pd.to_timedelta(rng.integers(0, 440 * 24, 300), unit="h")))
+
+    def next_trading_day(d):
+        if d in days:
+            return min(days.get_loc(d) + 1, len(days) - 1)
+        i = days.get_indexer([d], method='bfill')[0]
+        return i if i >= 0 else len(days) - 1
+
+    expected = [next_trading_day(d) for d in dates]
+    np.testing.assert_array_equal(strategy.TradingCalendar(days).entry_positions(dates), expected)
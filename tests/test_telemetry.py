@@ -0,0 +1,40 @@
+import json
+import os
+
+import telemetry
+
+
+def test_default_recorder_writes_no_file(monkeypatch):
+    monkeypatch.setattr(telemetry, "TELEMETRY_PATH", None)
+    telemetry.set_telemetry(None)
+
+    with telemetry.timer("stage", rows=3):
+        pass
+    telemetry.event("stage", 0.01, rows=2)
+
+    assert os.listdir(".") == []
+    assert telemetry.summary().loc["stage", "count"] == 2
+    assert telemetry.summary().loc["stage", "rows"] == 5
+
+
+def test_file_is_rotated_past_max_bytes():
+    recorder = telemetry.Telemetry("events.jsonl", max_bytes=400)
+    for i in range(20):
+        recorder.event("fetch", 0.5, page=i)
+    recorder.close()
+
+    assert os.path.getsize("events.jsonl") <= 400 and os.path.getsize("events.jsonl.1") <= 400
+    pages = []
+    for path in ("events.jsonl.1", "events.jsonl"):
+        with open(path, encoding="utf-8") as f:
+            pages += [json.loads(line)["page"] for line in f]
+    # Only the latest rotation is kept, and the newest events are all there
+    assert pages == list(range(20 - len(pages), 20))
+
+    # A new recorder continues the existing file and rotates it at the same size
+    recorder = telemetry.Telemetry("events.jsonl", max_bytes=400)
+    for i in range(20, 25):
+        recorder.event("fetch", 0.5, page=i)
+    recorder.close()
+    assert os.path.getsize("events.jsonl") <= 400
+    assert recorder.summary().loc["fetch", "count"] == 5
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from walkforward import make_folds, period_offset
+
+INDEX = pd.bdate_range("2020-01-31", "2024-12-31")
+
+
+@pytest.mark.parametrize("anchored", [False, True])
+@pytest.mark.parametrize("train, test, train_len, test_len", [
+    ("1YS", "6MS", pd.DateOffset(years=1), pd.DateOffset(months=6)),
+    ("2Y", "1Q", pd.DateOffset(years=2), pd.DateOffset(months=3)),
+    ("18M", "1M", pd.DateOffset(months=18), pd.DateOffset(months=1)),
+])
+def test_folds_have_the_configured_lengths(anchored, train, test, train_len, test_len):
+    folds = make_folds(INDEX, train, test, anchored)
+    start = INDEX[0]
+    assert folds
+
+    def months(offset):
+        return 12 * offset.kwds.get("years", 0) + offset.kwds.get("months", 0)
+
+    for k, (train_start, train_end, test_start, test_end) in enumerate(folds):
+        # Boundaries are fixed lengths from the data start, not snapped to period boundaries
+        assert train_end == test_start
+        assert test_start == start + pd.DateOffset(months=months(train_len) + k * months(test_len))
+        assert test_end == start + pd.DateOffset(months=months(train_len) + (k + 1) * months(test_len))
+        if anchored:
+            assert train_start == start
+        else:
+            assert train_start == max(test_start - train_len, start)
+
+    # Test windows tile the data after the first training window without overlapping
+    for (_, _, _, prev_end), (_, _, next_start, _) in zip(folds, folds[1:]):
+        assert prev_end == next_start
+    assert folds[-1][2] <= INDEX[-1] < folds[-1][3]
+
+
+def test_rolling_training_windows_do_not_reach_into_their_test_window():
+    for train_start, train_end, test_start, test_end in make_folds(INDEX, "1Y", "6M", anchored=False):
+        assert train_start < train_end <= test_start < test_end
+        assert (INDEX[(INDEX >= train_start) & (INDEX < train_end)] < test_start).all()
+
+
+def test_period_offset():
+    assert period_offset("3YS") == pd.DateOffset(years=3)
+    assert period_offset("2q") == pd.DateOffset(months=6)
+    assert period_offset("M") == pd.DateOffset(months=1)
+    assert period_offset(pd.DateOffset(days=90)) == pd.DateOffset(days=90)
+    with pytest.raises(ValueError):
+        period_offset("3 fortnights")
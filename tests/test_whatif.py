@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy
+from test_strategy import random_calls, random_walk
+from whatif import WhatIfBacktester
+
+
+@pytest.fixture
+def inputs():
+    tickers = ["AAA", "BBB", "CCC"]
+    prices = random_walk(tickers, seed=5)
+    # CCC lists a year late, so the tickers have different price windows
+    prices.loc[prices.index < "2022-01-01", "CCC"] = np.nan
+    calls = random_calls(tickers, quarters=11, seed=5)
+    calls = calls[(calls["ticker"] != "CCC") | (calls["date"] >= "2022-01-01")]
+    return strategy.prepare_inputs(calls, price_df=prices)
+
+
+def count_simulations(monkeypatch) -> list:
+    calls = []
+    simulate = strategy.simulate_trades
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(strategy, "simulate_trades", counted)
+    return calls
+
+
+@pytest.mark.parametrize("params, upper, lower", [
+    ({}, None, None),
+    ({"position_size": 1.0, "stop_loss": 0.05, "take_profit": 0.1}, None, None),
+    ({"use_trailing": True, "trail_giveup": 0.04, "commission_bp": 10}, 0.5, -1.0),
+    ({"stop_loss": 0.3}, 1.5, -0.25),
+])
+def test_curves_match_a_full_backtest(inputs, monkeypatch, params, upper, lower):
+    got = WhatIfBacktester(inputs).curves(params, upper=upper, lower=lower)
+
+    # The same overrides applied to the module settings the full backtest reads
+    overrides = {k.upper(): v for k, v in params.items()}
+    if upper is not None:
+        overrides.update(Z_UPPER=upper, Z_LOWER=lower)
+    for name, value in overrides.items():
+        monkeypatch.setattr(strategy, name, value)
+    expected = strategy.backtest_sentiment_strategy(None, inputs=inputs)
+
+    assert list(got.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(got, expected, check_freq=False, check_names=False)
+
+
+def test_cache_hits_return_the_same_curves(inputs, monkeypatch):
+    simulations = count_simulations(monkeypatch)
+    whatif = WhatIfBacktester(inputs, max_cached=6)
+
+    first = whatif.curves({"stop_loss": 0.05})
+    assert len(simulations) == 3
+    other = whatif.curves({"stop_loss": 0.2})
+    assert len(simulations) == 6
+    # Moving the slider back is served from the cache
+    pd.testing.assert_frame_equal(whatif.curves({"stop_loss": 0.05}), first)
+    pd.testing.assert_frame_equal(whatif.curves({"stop_loss": 0.2}), other)
+    assert len(simulations) == 6
+
+    # A ticker subset reuses the cached simulations of those tickers
+    subset = whatif.curves({"stop_loss": 0.05}, tickers=["BBB"])
+    pd.testing.assert_frame_equal(subset, first[["BBB_sentiment", "BBB_buyhold"]].dropna(how="all"),
+                                  check_freq=False)
+    assert len(simulations) == 6
+
+
+def test_least_recently_used_simulations_are_evicted(inputs, monkeypatch):
+    simulations = count_simulations(monkeypatch)
+    whatif = WhatIfBacktester(inputs, max_cached=3)
+
+    first = whatif.curves({"stop_loss": 0.05})
+    whatif.curves({"stop_loss": 0.2})
+    assert len(simulations) == 6 and len(whatif._daily) == 3
+    # The first parameter set was evicted: it is simulated again, with the same result
+    pd.testing.assert_frame_equal(whatif.curves({"stop_loss": 0.05}), first)
+    assert len(simulations) == 9